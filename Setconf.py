@@ -1,65 +1,289 @@
 #!/usr/bin/env python3
-import argparse, getpass, pathlib, sys
-from rich.console import Console
-from rich.panel import Panel
-from napalm import get_network_driver
+# Tunge afhængigheder importeres først på den sti der bruger dem:
+# napalm kun når der faktisk skal forbindes, rich kun når stdout er en terminal.
+import argparse, atexit, getpass, os, pathlib, sys, time
+from functools import lru_cache
 
-console = Console()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "intermediate"))
+import devsession, getconf, iosconf, phasetimer
+from runcache import CACHE_DIR, RunningCache, predict_noop
+
+_console = None
+
+class PushFailed(Exception):
+    """Push fejlede midt i en session. Sessionen er i ukendt tilstand (timeout, død kanal, halv
+    candidate) og skal lukkes frem for at komme tilbage i poolen – derfor en exception og ikke en status."""
+
+def say(msg, style=None):
+    """Print en statuslinje – med rich-farver på en terminal, ellers som ren tekst."""
+    global _console
+    if sys.stdout.isatty():
+        try:
+            if _console is None:
+                from rich.console import Console
+                _console = Console()
+            _console.print(msg, style=style, markup=False)
+            return
+        except ImportError:
+            pass
+    print(msg)
+
+def show_diff(diff):
+    if sys.stdout.isatty():
+        try:
+            from rich.panel import Panel
+            say(Panel.fit(diff, title="Diff", border_style="yellow")); return
+        except ImportError:
+            pass
+    print("--- Diff ---"); print(diff.rstrip()); print("------------")
 
 def read_text(path): return pathlib.Path(path).read_text(encoding="utf-8")
 
-def setconf_ssh(host, username, password, port, mode, filepath, auto_yes, rollback_on_error):
-    driver = get_network_driver("ios")
-    dev = driver(hostname=host, username=username, password=password, optional_args={"port": port})
-    dev.open()
-    try:
-        if mode == "replace":
-            dev.load_replace_candidate(filename=filepath)
+def snippet_files(spec):
+    """Filer i en -f/file-angivelse: sti, liste af stier eller ';'-separeret streng; mapper
+    foldes ud til deres filer sorteret efter navn (skjulte filer springes over)."""
+    if isinstance(spec, str): spec = [p for p in spec.split(";") if p.strip()]
+    out = []
+    for p in spec:
+        p = p.strip()
+        if os.path.isdir(p):
+            out += sorted(os.path.join(p, n) for n in os.listdir(p)
+                          if not n.startswith(".") and os.path.isfile(os.path.join(p, n)))
         else:
-            dev.load_merge_candidate(filename=filepath)
-        diff = dev.compare_config() or ""
+            out.append(p)
+    return tuple(out)
+
+@lru_cache(maxsize=256)
+def _candidate(files):
+    if len(files) == 1: return read_text(files[0])
+    return iosconf.render(iosconf.merge_snippets([read_text(f) for f in files], list(files)))
+
+def candidate_text(spec):
+    """Én candidate ud fra én eller flere snippets: flere filer flettes lokalt (iosconf.merge_snippets),
+    så enheden får ét load og ét commit. Kaster OSError/iosconf.MergeConflict."""
+    files = snippet_files(spec)
+    if not files: raise OSError(f"ingen configfiler i {spec}")
+    return _candidate(files)
+
+def setconf_ssh(host, username, password, port, mode, filepath, auto_yes, rollback_on_error,
+                backup=None, after=None, pool=None, cache=None, force=False, prune=False):
+    """Push config over én session: (backup) -> load candidate -> diff -> commit -> (re-fetch).
+    `filepath` kan være flere snippets/mapper (se candidate_text). `backup`/`after` er filer til
+    startup+running før og running efter commit. Returnerer exit-kode."""
+    status, _ = push_device(host, username, password, port, mode, filepath, auto_yes, rollback_on_error,
+                            backup, after, pool, cache=cache, force=force, prune=prune)
+    return 2 if status == "failed" else 0
+
+def push_device(host, username, password, port, mode, filepath, auto_yes, rollback_on_error,
+                backup=None, after=None, pool=None, verbose=True, cache=None, force=False, prune=False):
+    """Som setconf_ssh, men returnerer (status, fejl) med status committed/unchanged/skipped/aborted/failed.
+    Med en RunningCache springes enheden over uden at forbinde, hvis den cachede running-config er
+    frisk og allerede indeholder kandidaten (medmindre `force`). `prune`: se iosconf.delta_patch."""
+    note = say if verbose else (lambda msg, style=None: None)
+    if cache is not None and not force:
+        ent = cache.get(host)
+        if cache.fresh(ent):
+            with phasetimer.phase(host, "predict_noop"): noop = predict_noop(candidate_text(filepath), ent["running"], mode, prune)
+            if noop:
+                note(f"Ingen ændringer ifølge cachet running-config (fingerprint {ent['fingerprint'][:12]}) – "
+                     "springer over. Brug --force for at pushe alligevel.", "green")
+                return "skipped", None
+    pool = pool or devsession.default_pool()
+    try:
+        with pool.session(host, username, password, {"port": port}) as dev:
+            return _push(dev, host, mode, candidate_text(filepath), auto_yes, rollback_on_error, backup, after, verbose,
+                         cache, prune)
+    except PushFailed as e:
+        if cache is not None: cache.invalidate(host)
+        return "failed", str(e)
+
+def _push(dev, host, mode, candidate, auto_yes, rollback_on_error, backup, after, verbose=True, cache=None, prune=False):
+    phase = lambda name: phasetimer.phase(host, name)
+    note = say if verbose else (lambda msg, style=None: None)
+    def refetch():
+        with phase("refetch_running"): running = dev.get_config(retrieve="running").get("running", "") or ""
+        if cache is not None: cache.put(host, running)
+        return running
+    try:
+        cfgs = None
+        if backup:
+            with phase("backup_get_config"): cfgs = dev.get_config(retrieve="all")
+            getconf.write_file(backup, getconf.format_backup(cfgs, True))
+            note(f"Backup gemt -> {backup}", "green")
+        if mode == "delta":
+            # candidate er den ønskede config; kun forskellen til running-config pushes (med merge)
+            if cfgs is None:
+                with phase("get_running"): cfgs = dev.get_config(retrieve="running")
+            running = cfgs.get("running", "") or ""
+            with phase("delta_patch"): candidate = iosconf.delta_patch(running, candidate, prune)
+            if not candidate:
+                note("Ingen ændringer. Intet at committe.", "green")
+                if cache is not None: cache.put(host, running)
+                return "unchanged", None
+            note(f"Delta: {candidate.count(chr(10))} linjer pushes med merge.")
+        with phase(f"load_{mode}_candidate"):
+            if mode == "replace":
+                dev.load_replace_candidate(config=candidate)
+            else:
+                dev.load_merge_candidate(config=candidate)
+        with phase("compare_config"): diff = dev.compare_config() or ""
         if not diff.strip():
-            console.print("[green]Ingen ændringer. Intet at committe.[/green]")
-            dev.discard_config()
-            return 0
-        console.print(Panel.fit(diff, title="Diff", border_style="yellow"))
+            note("Ingen ændringer. Intet at committe.", "green")
+            with phase("discard_config"): dev.discard_config()
+            # running er uændret: gem den vi allerede har (backup/delta) frem for en ekstra hentning
+            if cache is not None and cfgs is not None: cache.put(host, cfgs.get("running", "") or "")
+            return "unchanged", None
+        if verbose: show_diff(diff)
         if not auto_yes:
             ans = input("Commit? [y/N]: ").strip().lower()
             if ans != "y":
                 dev.discard_config()
-                console.print("[yellow]Afbrudt. Ingen ændringer gemt.[/yellow]")
-                return 0
-        dev.commit_config()
-        console.print("[green]Commit OK. write mem håndteres af device/napalm.[/green]")
-        return 0
+                note("Afbrudt. Ingen ændringer gemt.", "yellow")
+                return "aborted", None
+        with phase("commit_config"): dev.commit_config()
+        note("Commit OK. write mem håndteres af device/napalm.", "green")
+        if after or cache is not None:
+            running = refetch()
+        if after:
+            getconf.write_file(after, f"--- RUNNING ({getconf.ts()}) ---\n{running}\n")
+            note(f"Running-config efter commit gemt -> {after}", "green")
+        return "committed", None
     except Exception as e:
-        console.print(f"[red]Fejl: {e}[/red]")
+        note(f"Fejl: {e}", "red"); err = str(e) or type(e).__name__
         if rollback_on_error:
             try:
-                dev.rollback()
-                console.print("[yellow]Rollback udført.[/yellow]")
+                with phase("rollback"): dev.rollback()
+                note("Rollback udført.", "yellow"); err += " (rollback udført)"
             except Exception as e2:
-                console.print(f"[red]Rollback fejlede: {e2}[/red]")
-        return 2
-    finally:
-        dev.close()
+                note(f"Rollback fejlede: {e2}", "red"); err += f" (rollback fejlede: {e2})"
+        raise PushFailed(err) from e
+
+# ==================== Rollout i bølger ====================
+def wave_sizes(total, canary=1, growth=2.0, max_wave=None):
+    """Bølgestørrelser: canary først, derefter voksende med `growth` (højst `max_wave`)."""
+    sizes = []; size = max(1, canary); left = total
+    while left > 0:
+        n = min(left, size if max_wave is None else min(size, max_wave))
+        sizes.append(n); left -= n
+        size = max(size + 1, int(size * growth))
+    return sizes
+
+def run_rollout(devices, defaults, jobs=10, canary=1, growth=2.0, max_wave=None, max_fail=0.1, rollback=False,
+                cache=None, force=False, prune=False):
+    """Push til alle enheder i bølger med højst `jobs` samtidige sessioner. Stopper før næste
+    bølge hvis andelen af fejlede enheder overstiger `max_fail`.
+    Returnerer (resultater, antal ikke-forsøgte) med resultater som (host, status, sek, fejl)."""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    pool = devsession.default_pool()
+    pool.max_size = max(pool.max_size, jobs)
+
+    def one(d):
+        t0 = time.perf_counter()
+        try:
+            status, err = push_device(d["host"], d.get("user") or defaults["user"], d.get("password") or defaults["password"],
+                                      int(d.get("port") or defaults["port"]), d.get("mode") or defaults["mode"],
+                                      d["file"], True, rollback, verbose=False, cache=cache, force=force, prune=prune)
+        except Exception as e:          # typisk forbindelsesfejl
+            status, err = "failed", str(e) or type(e).__name__
+        return d["host"], status, time.perf_counter() - t0, err
+
+    results = []; pos = 0; sizes = wave_sizes(len(devices), canary, growth, max_wave)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+        for w, size in enumerate(sizes, 1):
+            batch = devices[pos:pos + size]; pos += size
+            say(f"Bølge {w}/{len(sizes)}: {len(batch)} enheder", "bold")
+            for fut in as_completed([ex.submit(one, d) for d in batch]):
+                host, status, sec, err = fut.result(); results.append((host, status, sec, err))
+                if status == "failed": say(f"  FEJL {host}: {err}", "red")
+                else: say(f"  OK   {host}: {status}  {sec:.1f}s", "green")
+            failed = sum(1 for r in results if r[1] == "failed")
+            if failed / len(results) > max_fail:
+                say(f"STOP: {failed}/{len(results)} fejlede ({failed / len(results):.0%} > {max_fail:.0%}) – "
+                    f"{len(devices) - pos} enheder ikke forsøgt.", "red")
+                break
+    return results, len(devices) - pos
 
 def main():
     ap = argparse.ArgumentParser(prog="Setconf", description="Upload config via NAPALM (merge/replace med diff).")
-    ap.add_argument("-s","--ssh", required=True, help="IP/DNS")
+    ap.add_argument("-s","--ssh", help="IP/DNS")
     ap.add_argument("--port", type=int, default=22)
-    ap.add_argument("-u","--user", required=True)
-    ap.add_argument("-p","--pass")
-    ap.add_argument("-f","--file", required=True, help="Lokal configfil")
-    ap.add_argument("-m","--mode", choices=["merge","replace"], default="merge")
+    ap.add_argument("-u","--user")
+    ap.add_argument("-p","--pass", dest="password")
+    ap.add_argument("-f","--file", nargs="+", help="Lokal configfil; flere filer/mapper flettes til én candidate")
+    ap.add_argument("-m","--mode", choices=["merge","replace","delta"], default="merge",
+                    help="delta: -f er den ønskede config; kun forskellen til running pushes (merge med 'no'-linjer)")
+    ap.add_argument("--prune", action="store_true",
+                    help="Med --mode delta: -f er HELE configen; sektioner og globale linjer der ikke står i den fjernes")
     ap.add_argument("--yes", action="store_true", help="Commit uden prompt")
     ap.add_argument("--rollback", action="store_true", help="Rollback på fejl")
+    ap.add_argument("--backup", metavar="FIL", help="Gem startup+running før push (samme SSH-session)")
+    ap.add_argument("--after", metavar="FIL", help="Hent og gem running-config efter commit (samme SSH-session)")
+    ap.add_argument("--timings", metavar="FIL", help="Skriv tid pr. fase som JSON-linjer ('-' = stderr)")
+    ap.add_argument("--timing-summary", action="store_true", help="Vis tid pr. fase til sidst")
+    ca = ap.add_argument_group("no-op-cache")
+    ca.add_argument("--force", action="store_true", help="Push selvom cachen forudsiger at intet ændres")
+    ca.add_argument("--cache-dir", default=CACHE_DIR, help=f"Cache af senest kendte running-config (default: {CACHE_DIR})")
+    ca.add_argument("--cache-ttl", type=float, default=24, help="Timer før en cachet running-config regnes for forældet (default 24)")
+    ca.add_argument("--no-cache", action="store_true", help="Brug/opdatér ikke cachen")
+    ro = ap.add_argument_group("rollout i bølger")
+    ro.add_argument("--rollout", metavar="FIL", help="CSV/JSON med host, file (fil, mappe eller ';'-separeret liste; valgfrit user, password, port, mode)")
+    ro.add_argument("-j","--jobs", type=int, default=10, help="Max samtidige sessioner (default 10)")
+    ro.add_argument("--canary", type=int, default=1, help="Antal enheder i første bølge (default 1)")
+    ro.add_argument("--growth", type=float, default=2.0, help="Vækstfaktor pr. bølge (default 2)")
+    ro.add_argument("--max-wave", type=int, help="Max enheder pr. bølge")
+    ro.add_argument("--max-fail", type=float, default=10, help="Stop når over denne procent af enhederne er fejlet (default 10)")
     args = ap.parse_args()
+    if args.timings or args.timing_summary:
+        phasetimer.enable(args.timings)
+        atexit.register(getconf.finish_timings, args.timing_summary)
 
-    if args.pass is None:
-        args.pass = getpass.getpass("SSH password: ")
+    cache = None if args.no_cache else RunningCache(args.cache_dir, args.cache_ttl * 3600)
 
-    rc = setconf_ssh(args.ssh, args.user, args.pass, args.port, args.mode, args.file, args.yes, args.rollback)
+    if args.rollout:
+        try: devices = getconf.load_inventory(args.rollout)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: kan ikke læse rollout-fil: {e}", file=sys.stderr); sys.exit(2)
+        bad = [d.get("host") or "?" for d in devices if not d.get("host") or not d.get("file")]
+        if bad:
+            print(f"ERROR: rækker uden host/file: {', '.join(bad)}", file=sys.stderr); sys.exit(2)
+        bad = []
+        for spec in {d["file"] for d in devices}:
+            try: candidate_text(spec)
+            except (OSError, iosconf.MergeConflict) as e: bad.append(f"{spec}: {e}")
+        if bad:
+            print(f"ERROR: configfiler kan ikke bruges: {'; '.join(bad[:5])}", file=sys.stderr); sys.exit(2)
+        if not args.user and not all(d.get("user") for d in devices): args.user = input("SSH username: ").strip()
+        if args.password is None and not all(d.get("password") for d in devices):
+            args.password = getpass.getpass("SSH password: ")
+        sizes = wave_sizes(len(devices), args.canary, args.growth, args.max_wave)
+        if not args.yes:
+            ans = input(f"Push til {len(devices)} enheder i {len(sizes)} bølger ({', '.join(map(str, sizes))})? [y/N]: ")
+            if ans.strip().lower() != "y":
+                say("Afbrudt.", "yellow"); sys.exit(0)
+        defaults = {"user": args.user, "password": args.password, "port": args.port, "mode": args.mode}
+        results, skipped = run_rollout(devices, defaults, args.jobs, args.canary, args.growth, args.max_wave,
+                                       args.max_fail / 100, args.rollback, cache, args.force, args.prune)
+        counts = {}
+        for _, status, _, _ in results: counts[status] = counts.get(status, 0) + 1
+        say(f"Rollout: {counts.get('committed', 0)} committed, {counts.get('unchanged', 0)} uændret, "
+            f"{counts.get('skipped', 0)} sprunget over (cache), {counts.get('failed', 0)} fejl, {skipped} ikke forsøgt")
+        sys.exit(1 if counts.get("failed") or skipped else 0)
+
+    if not args.ssh or not args.user or not args.file:
+        print("ERROR: angiv --ssh, -u og -f (eller --rollout)", file=sys.stderr); sys.exit(2)
+    try:
+        files = snippet_files(args.file); candidate_text(files)
+    except (OSError, iosconf.MergeConflict) as e:
+        print(f"ERROR: {e}", file=sys.stderr); sys.exit(2)
+    if len(files) > 1: say(f"{len(files)} snippets flettet til én candidate.", "bold")
+    if args.password is None:
+        args.password = getpass.getpass("SSH password: ")
+
+    try:
+        rc = setconf_ssh(args.ssh, args.user, args.password, args.port, args.mode, files, args.yes,
+                         args.rollback, args.backup, args.after, cache=cache, force=args.force, prune=args.prune)
+    except Exception as e:
+        say(f"Kunne ikke forbinde til {args.ssh}: {e}", "red"); rc = 2
     sys.exit(rc)
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# bench.py - reproducerbare benchmarks for generatoren, port-grupper, subnet- og ipbin-hotpaths.
+# Hver benchmark kører i sin egen subprocess, så peak-hukommelse (ru_maxrss) måles isoleret.
+# Kører offline med kun standardbiblioteket (Linux/macOS: `resource`-modulet).
+import argparse, contextlib, ipaddress, json, math, os, random, resource, subprocess, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "intermediate"), os.path.join(ROOT, "subnetting")]
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# ==================== Workloads ====================
+def _profile(nvlans):
+    vl = {"mgmt": {"id": 10, "name": "MGMT", "net": "10.0.0.0", "prefix": 22, "gw_host": 1, "svi_host": 2, "purpose": "mgmt"}}
+    purposes = ["access-default", "printer", "voice", "guest"]
+    for i in range(nvlans - 1):
+        vl[f"v{i}"] = {"id": 100 + i, "name": f"VLAN{i}", "net": f"10.{1 + i // 256}.{i % 256}.0", "prefix": 24,
+                       "purpose": purposes[i] if i < len(purposes) else "general"}
+    return {"name": f"bench-{nvlans}", "vlans": vl}
+
+def _params(i, model="48P"):
+    return {"Hostname": f"SW-{i:05}", "Model": model, "Base iface prefix": "GigabitEthernet1/0/",
+            "Extra uplink prefix": "TenGigabitEthernet1/1/", "Extra uplink slots": "2", "Uplink count": "2",
+            "Printer count": str(i % 4), "Mgmt SVI host": str(2 + i % 1000), "Mgmt GW host": "1",
+            "Domain": "corp.local", "SSH key bits": "2048", "Syslog server": "10.0.0.10", "NTP server": "10.0.0.11"}
+
+def _render(n, nvlans):
+    import newconfdesign as ncd
+    prof = _profile(nvlans); feats = dict(ncd.BASE_FEATURES); feats["SNMPv3 skabelon"] = True
+    chosen = {k: True for k in prof["vlans"]}
+    for i in range(n):
+        ncd.gen_config(_params(i), feats, prof, chosen)
+    return n
+
+def bench_gen_config(scale):
+    """10k switches med en lille profil."""
+    return _render(max(1, int(10000 * scale)), 6)
+
+def bench_gen_config_500vlans(scale):
+    """1k switches med en profil på 500 VLANs."""
+    return _render(max(1, int(1000 * scale)), 500)
+
+def bench_port_groups(scale):
+    """compute_port_groups over alle kombinationer af uplinks/printere."""
+    import newconfdesign as ncd
+    n = max(1, int(200000 * scale))
+    for i in range(n):
+        ncd.compute_port_groups(48, "GigabitEthernet1/0/", 4, "TenGigabitEthernet1/1/", i % 9, i % 7)
+    return n
+
+def bench_subnets(scale):
+    """/8 splittet i /30 (4M subnets) gennem output_subnets."""
+    import subnetcalc
+    count = max(1, int((1 << 22) * scale))
+    base = ipaddress.ip_network(f"10.0.0.0/{30 - int(math.log2(count))}")
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        subnetcalc.output_subnets(base.subnets(new_prefix=30))
+    return 1 << (30 - base.prefixlen)
+
+def bench_subnets_engine(scale):
+    """Samme split, men direkte fra heltal gennem subnetmath (CLI-stien, uden ipaddress-objekter)."""
+    import subnetcalc
+    count = max(1, int((1 << 22) * scale))
+    base = ipaddress.ip_network(f"10.0.0.0/{30 - int(math.log2(count))}")
+    with open(os.devnull, "w") as null:
+        subnetcalc.write_blocks(subnetcalc.iter_blocks(base, 30), out=null)
+    return 1 << (30 - base.prefixlen)
+
+def bench_parse_dotted(scale):
+    """1M dotted adresser (blandet dec/hex/bin) gennem ipbin.parse_dotted."""
+    import ipbin
+    n = max(1, int(1000000 * scale)); rnd = random.Random(42)
+    fmts = ["{}", "0x{:x}", "{}"]
+    addrs = [".".join(fmts[(i + j) % 3].format(rnd.randrange(256)) for j in range(4)) for i in range(1000)]
+    for i in range(n):
+        ipbin.parse_dotted(addrs[i % 1000])
+    return n
+
+BENCHES = {name[6:]: fn for name, fn in sorted(globals().items()) if name.startswith("bench_")}
+
+# ==================== Runner ====================
+def run_one(name, scale):
+    fn = BENCHES[name]
+    t0 = time.perf_counter(); ops = fn(scale); sec = time.perf_counter() - t0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    return {"ops": ops, "sec": sec, "ops_per_sec": ops / sec if sec > 0 else 0.0, "peak_mb": peak_mb}
+
+def run_isolated(name, scale, repeat):
+    """Kør benchmarken i en ny proces `repeat` gange og behold den hurtigste."""
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-one", name, "--scale", str(scale)],
+                             capture_output=True, text=True, check=True).stdout
+        res = json.loads(out)
+        if best is None or res["ops_per_sec"] > best["ops_per_sec"]: best = res
+    return best
+
+def compare(results, baseline, threshold):
+    """Liste af regressioner: ops/s faldet eller peak-hukommelse steget mere end threshold (%)."""
+    bad = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b: continue
+        if r["ops_per_sec"] < b["ops_per_sec"] * (1 - threshold / 100):
+            bad.append(f"{name}: {r['ops_per_sec']:.0f} ops/s < baseline {b['ops_per_sec']:.0f} (-{threshold}%)")
+        if r["peak_mb"] > b["peak_mb"] * (1 + threshold / 100):
+            bad.append(f"{name}: peak {r['peak_mb']:.1f} MB > baseline {b['peak_mb']:.1f} MB (+{threshold}%)")
+    return bad
+
+def main():
+    ap = argparse.ArgumentParser(prog="bench", description="Benchmarks for gen_config, compute_port_groups, subnetcalc og ipbin.")
+    ap.add_argument("names", nargs="*", help=f"Kør kun disse ({', '.join(BENCHES)})")
+    ap.add_argument("--scale", type=float, default=1.0, help="Skalér workloads (fx 0.1 for en hurtig kørsel)")
+    ap.add_argument("-r","--repeat", type=int, default=3, help="Gentagelser pr. benchmark (bedste tæller)")
+    ap.add_argument("--baseline", default=BASELINE, help="Baseline-fil (JSON)")
+    ap.add_argument("--save", action="store_true", help="Gem resultaterne som ny baseline")
+    ap.add_argument("-t","--threshold", type=float, default=15.0, help="Tilladt regression i procent (default 15)")
+    ap.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args.scale))); return
+
+    names = args.names or list(BENCHES)
+    unknown = [n for n in names if n not in BENCHES]
+    if unknown: ap.error(f"ukendt benchmark: {', '.join(unknown)}")
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f: saved = json.load(f)
+    except (OSError, ValueError):
+        saved = {}
+    baseline = saved.get(str(args.scale), {})
+
+    results = {}
+    print(f"{'benchmark':<22} {'ops':>10} {'sek':>8} {'ops/s':>12} {'peak MB':>9} {'vs base':>8}")
+    for name in names:
+        r = results[name] = run_isolated(name, args.scale, args.repeat)
+        b = baseline.get(name)
+        delta = f"{(r['ops_per_sec'] / b['ops_per_sec'] - 1) * 100:+.1f}%" if b else "-"
+        print(f"{name:<22} {r['ops']:>10} {r['sec']:>8.2f} {r['ops_per_sec']:>12.0f} {r['peak_mb']:>9.1f} {delta:>8}")
+
+    if args.save:
+        saved[str(args.scale)] = {**baseline, **results}
+        with open(args.baseline, "w", encoding="utf-8") as f: json.dump(saved, f, indent=2, sort_keys=True)
+        print(f"Baseline gemt: {args.baseline} (scale {args.scale})")
+        return
+    bad = compare(results, baseline, args.threshold)
+    for line in bad: print(f"REGRESSION {line}", file=sys.stderr)
+    sys.exit(1 if bad else 0)
+
+if __name__ == "__main__":
+    main()
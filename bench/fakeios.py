@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+# fakeios.py - offline IOS-simulator til benchmark og test af getconf.py og Setconf.py uden netværk:
+# en falsk NAPALM "ios"-driver og pty-baserede serielle konsoller med konfigurerbar latency,
+# throughput og fejlrate. Kun standardbiblioteket (pty'er kræver Linux/macOS).
+import argparse, contextlib, csv, difflib, os, random, select, sys, tempfile, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "intermediate"), ROOT]
+import iosconf
+
+class FakeError(Exception):
+    """Injiceret fejl: forbindelse, timeout eller kommando."""
+
+class Behaviour:
+    """Hvordan en simuleret enhed opfører sig.
+
+    - latency/jitter: sek. pr. kommando (jitter er +/- uniform)
+    - bps: bytes/s for output, fx 960 for en 9600 baud-konsol (None = ubegrænset)
+    - error_rate: sandsynlighed for at en kommando fejler (konsol: tabt, forvansket eller hængende svar)
+    - connect_error_rate: sandsynlighed for at open() fejler
+    """
+    def __init__(self, latency=0.0, jitter=0.0, bps=None, error_rate=0.0, connect_error_rate=0.0, seed=None):
+        self.latency = latency; self.jitter = jitter; self.bps = bps
+        self.error_rate = error_rate; self.connect_error_rate = connect_error_rate
+        self._rnd = random.Random(seed); self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec):
+        """'latency=0.05,bps=20000,error_rate=0.01' -> Behaviour."""
+        kw = {}
+        for part in filter(None, (spec or "").split(",")):
+            k, _, v = part.partition("=")
+            kw[k.strip()] = int(v) if k.strip() == "seed" else float(v)
+        return cls(**kw)
+
+    def delay(self, nbytes=0):
+        with self._lock: j = self._rnd.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + j) + (nbytes / self.bps if self.bps else 0.0)
+
+    def fails(self, connect=False):
+        rate = self.connect_error_rate if connect else self.error_rate
+        if not rate: return False
+        with self._lock: return self._rnd.random() < rate
+
+    def choice(self, seq):
+        with self._lock: return self._rnd.choice(seq)
+
+# ==================== Konfigurationer ====================
+def sample_config(host, ports=48):
+    """Genereret IOS-config af realistisk størrelse til hosts uden egen fil."""
+    out = [f"hostname {host}", "!", "service timestamps log datetime msec", "no ip domain-lookup",
+           "ip domain-name corp.local", "!", "vlan 10", " name MGMT", "!", "vlan 20", " name USERS", "!"]
+    for i in range(1, ports + 1):
+        out += [f"interface GigabitEthernet1/0/{i}", f" description {host}-port{i}", " switchport mode access",
+                f" switchport access vlan {20 if i % 8 else 10}", " spanning-tree portfast", "!"]
+    out += ["interface Vlan10", " ip address 10.0.0.2 255.255.255.0", "!", "ip default-gateway 10.0.0.1", "!",
+            "ntp server 10.0.0.11", "logging host 10.0.0.10", "!", "line vty 0 15", " transport input ssh", "!", "end"]
+    return "\n".join(out) + "\n"
+
+def _blocks(text):
+    """[(topniveau-linje, [indrykkede linjer])] uden '!', 'end' og show-headers."""
+    out = []
+    for line in text.splitlines():
+        s = line.rstrip()
+        if not s.strip() or s.strip() in ("!", "end") or s.startswith(("Building configuration", "Current configuration")):
+            continue
+        if s[0].isspace() and out: out[-1][1].append(s)
+        else: out.append((s, []))
+    return out
+
+def _render(blocks):
+    out = []
+    for head, kids in blocks: out += [head, *kids, "!"]
+    return "\n".join(out + ["end"]) + "\n"
+
+def _negates(line, neg): return line == neg or line.startswith(neg + " ")
+
+def _overwrites(line, old):
+    """Overskriver `line` en eksisterende linje med én værdi (hostname, description, access vlan ...)?"""
+    m = iosconf.SINGLE_RE.match(line)
+    return m is not None and old != line and (old == m.group(0) or old.startswith(m.group(0) + " "))
+
+def merge_config(running, candidate):
+    """Grov simulering af IOS' merge: nye linjer tilføjes (under samme sektion), 'no X' fjerner X,
+    kommandoer med én værdi overskrives og 'default interface X' nulstiller porten."""
+    blocks = [(h, list(k)) for h, k in _blocks(running)]
+    for head, kids in _blocks(candidate):
+        if head.startswith("default interface "):
+            for h, k in blocks:
+                if h == head[8:]: k.clear()
+            continue
+        if head.startswith("no "):
+            blocks = [b for b in blocks if not _negates(b[0], head[3:])]; continue
+        blocks = [b for b in blocks if b[1] or not _overwrites(head, b[0])]
+        cur = next((k for h, k in blocks if h == head), None)
+        if cur is None:
+            cur = []; blocks.append((head, cur))
+        for kid in kids:
+            s = kid.strip()
+            if s.startswith("no "):
+                cur[:] = [c for c in cur if not _negates(c.strip(), s[3:])]
+            elif kid not in cur:
+                cur[:] = [c for c in cur if not _overwrites(s, c.strip())] + [kid]
+    return _render(blocks)
+
+class FakeFleet:
+    """De simulerede enheders configs, delt mellem driver-instanser og konsoller (tråd-sikker).
+    Hosts uden egen config får sample_config(host)."""
+    def __init__(self, configs=None, behaviour=None, ports=48):
+        self.behaviour = behaviour or Behaviour()
+        self.ports = ports
+        self.lock = threading.Lock()
+        self.devices = {h: {"running": t, "startup": t, "rollback": t} for h, t in (configs or {}).items()}
+        self.stats = {"opened": 0, "get_config": 0, "commits": 0, "rollbacks": 0, "errors": 0}
+
+    @classmethod
+    def from_dir(cls, path, **kw):
+        """Én fil pr. host: <host>.txt (eller anden endelse)."""
+        configs = {}
+        for name in sorted(os.listdir(path)):
+            with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                configs[os.path.splitext(name)[0]] = f.read()
+        return cls(configs, **kw)
+
+    def device(self, host):
+        with self.lock:
+            dev = self.devices.get(host)
+            if dev is None:
+                text = sample_config(host, self.ports)
+                dev = self.devices[host] = {"running": text, "startup": text, "rollback": text}
+            return dev
+
+    def count(self, key):
+        with self.lock: self.stats[key] += 1
+
+# ==================== NAPALM-driver ====================
+class FakeIOSDriver:
+    """Den del af NAPALM's ios-driver som getconf/Setconf bruger, mod en FakeFleet.
+    Bind en flåde med driver(fleet); uden fleet bruges en fælles flåde med genererede configs."""
+    fleet = None
+
+    def __init__(self, hostname, username, password, timeout=60, optional_args=None):
+        self.hostname = hostname; self.username = username; self.password = password
+        self.timeout = timeout; self.optional_args = optional_args or {}
+        self._open = False; self._candidate = None
+        if self.fleet is None: type(self).fleet = FakeFleet()
+
+    def _wait(self, nbytes=0, connect=False, what="kommando"):
+        beh = self.fleet.behaviour
+        d = beh.delay(nbytes)
+        limit = self.optional_args.get("conn_timeout", self.timeout) if connect else self.timeout
+        if d > limit:
+            time.sleep(limit); self.fleet.count("errors")
+            raise FakeError(f"{self.hostname}: timeout efter {limit}s ({what})")
+        time.sleep(d)
+        if beh.fails(connect):
+            self.fleet.count("errors")
+            raise FakeError(f"{self.hostname}: injiceret fejl ({what})")
+
+    def _need_open(self):
+        if not self._open: raise FakeError(f"{self.hostname}: ikke forbundet")
+
+    def open(self):
+        self._wait(connect=True, what="connect")
+        self.fleet.count("opened"); self._open = True
+
+    def close(self): self._open = False; self._candidate = None
+
+    def is_alive(self): return {"is_alive": self._open}
+
+    def get_facts(self):
+        self._need_open(); self._wait(what="show version")
+        return {"hostname": self.hostname, "vendor": "Cisco", "model": "FAKE-48P", "os_version": "fakeios",
+                "serial_number": f"FAKE{abs(hash(self.hostname)) % 10**8:08}", "uptime": 0,
+                "fqdn": self.hostname, "interface_list": []}
+
+    def get_config(self, retrieve="all", full=False, sanitized=False):
+        self._need_open()
+        dev = self.fleet.device(self.hostname)
+        out = {"running": "", "startup": "", "candidate": ""}
+        for kind in ("running", "startup", "candidate") if retrieve == "all" else (retrieve,):
+            out[kind] = self._candidate[1] if kind == "candidate" and self._candidate else dev.get(kind, "")
+        self._wait(sum(len(v) for v in out.values()), what=f"get_config({retrieve})")
+        self.fleet.count("get_config")
+        return out
+
+    def _load(self, mode, filename, config):
+        self._need_open()
+        if config is None:
+            with open(filename, "r", encoding="utf-8") as f: config = f.read()
+        self._wait(len(config), what=f"load {mode}")
+        self._candidate = (mode, config)
+
+    def load_merge_candidate(self, filename=None, config=None): self._load("merge", filename, config)
+    def load_replace_candidate(self, filename=None, config=None): self._load("replace", filename, config)
+
+    def _result(self):
+        mode, text = self._candidate
+        running = self.fleet.device(self.hostname)["running"]
+        return merge_config(running, text) if mode == "merge" else _render(_blocks(text))
+
+    def compare_config(self):
+        self._need_open()
+        if not self._candidate: return ""
+        self._wait(what="compare")
+        a = _render(_blocks(self.fleet.device(self.hostname)["running"])).splitlines()
+        b = self._result().splitlines()
+        return "\n".join(l for l in difflib.unified_diff(a, b, "running", "candidate", lineterm="", n=0)
+                         if not l.startswith("@@") and l[1:] != "!")
+
+    def commit_config(self, message="", revert_in=None):
+        self._need_open()
+        if not self._candidate: raise FakeError(f"{self.hostname}: ingen candidate at committe")
+        new = self._result()
+        self._wait(what="commit")
+        dev = self.fleet.device(self.hostname)
+        with self.fleet.lock:
+            dev["rollback"] = dev["running"]; dev["running"] = dev["startup"] = new
+        self._candidate = None; self.fleet.count("commits")
+
+    def discard_config(self): self._candidate = None
+
+    def rollback(self):
+        self._need_open(); self._wait(what="rollback")
+        dev = self.fleet.device(self.hostname)
+        with self.fleet.lock: dev["running"] = dev["startup"] = dev["rollback"]
+        self.fleet.count("rollbacks")
+
+def driver(fleet=None):
+    """Driver-klasse bundet til `fleet`; bruges som driver_factory: SessionPool(driver_factory=lambda: driver(f))."""
+    return type("FakeIOSDriver", (FakeIOSDriver,), {"fleet": fleet or FakeFleet()})
+
+_ENV_FLEET = None
+
+def from_env():
+    """Fabrik til DEVSESSION_DRIVER=fakeios:from_env. FAKEIOS_CONFIGS er en mappe med <host>.txt,
+    FAKEIOS er adfærden som 'latency=0.05,bps=20000,error_rate=0.01'."""
+    global _ENV_FLEET
+    if _ENV_FLEET is None:
+        beh = Behaviour.parse(os.environ.get("FAKEIOS"))
+        path = os.environ.get("FAKEIOS_CONFIGS")
+        _ENV_FLEET = FakeFleet.from_dir(path, behaviour=beh) if path else FakeFleet(behaviour=beh)
+    return driver(_ENV_FLEET)
+
+# ==================== Seriel konsol (pty) ====================
+class SerialSim:
+    """IOS-konsol på en pty: `path` (slave-enden) åbnes med pyserial som en rigtig COM-port.
+    Simulerer login, enable, 'terminal length 0' og 'show startup/running-config'."""
+    CHUNK = 64
+
+    def __init__(self, fleet, host, username="admin", password="admin", enable="enable"):
+        import pty, tty
+        self.fleet = fleet; self.host = host
+        self.username = username; self.password = password; self.enable = enable
+        self.master, self._slave = pty.openpty()
+        tty.setraw(self._slave)            # ingen ekko/linjeredigering i kernen; simulatoren ekkoer selv
+        self.path = os.ttyname(self._slave)
+        self.state = "idle"; self.stats = {"lines": 0, "tx_bytes": 0, "errors": 0}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name=f"fakeios-{host}", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set(); self._thread.join(1)
+        for fd in (self.master, self._slave):
+            try: os.close(fd)
+            except OSError: pass
+
+    def _write(self, data, throttle=True):
+        beh = self.fleet.behaviour
+        for i in range(0, len(data), self.CHUNK):
+            chunk = data[i:i + self.CHUNK]
+            os.write(self.master, chunk); self.stats["tx_bytes"] += len(chunk)
+            if throttle and beh.bps: time.sleep(len(chunk) / beh.bps)
+
+    def _reply(self, data):
+        beh = self.fleet.behaviour
+        time.sleep(beh.delay())
+        if beh.fails():
+            self.stats["errors"] += 1
+            fault = beh.choice(("drop", "garble", "stall"))
+            if fault == "drop": data = data[:len(data) // 2]
+            elif fault == "garble":
+                data = bytearray(data)
+                for _ in range(max(1, len(data) // 200)): data[beh.choice(range(len(data)))] = ord("?")
+                data = bytes(data)
+            else: time.sleep(5); return
+        self._write(data)
+
+    def _prompt(self): return f"\r\n{self.host}{'#' if self.state == 'priv' else '>'}".encode()
+
+    def _show(self, kind):
+        text = self.fleet.device(self.host)[kind].replace("\r\n", "\n").replace("\n", "\r\n")
+        head = ("Building configuration...\r\n\r\nCurrent configuration : " if kind == "running"
+                else "Using ") + f"{len(text)} bytes\r\n"
+        return ("\r\n" + head + text).encode()
+
+    def _handle(self, line):
+        """Svar på én indtastet linje ud fra tilstanden (idle/user/pass/exec/enable/priv)."""
+        self.stats["lines"] += 1
+        if self.state == "idle":
+            self.state = "user"; return b"\r\n\r\nUser Access Verification\r\n\r\nUsername: "
+        if self.state == "user":
+            self._user = line; self.state = "pass"; return b"\r\nPassword: "
+        if self.state == "pass":
+            if (self._user, line) == (self.username, self.password):
+                self.state = "exec"; return self._prompt()
+            self.state = "user"; return b"\r\n% Login invalid\r\n\r\nUsername: "
+        if self.state == "enable":
+            self.state = "priv" if line == self.enable else "exec"
+            return (b"" if self.state == "priv" else b"\r\n% Access denied\r\n") + self._prompt()
+        cmd = " ".join(line.split()).lower()
+        if not cmd or cmd == "terminal length 0": return self._prompt()
+        if cmd in ("en", "enable"):
+            if self.state == "priv": return self._prompt()
+            self.state = "enable"; return b"\r\nPassword: "
+        if cmd in ("exit", "logout"):
+            self.state = "idle"; return b"\r\n\r\n"
+        words = cmd.split()
+        if self.state == "priv" and len(words) == 2 and words[0] == "show" and len(words[1]) >= 3:
+            for kind in ("running", "startup"):
+                if f"{kind}-config".startswith(words[1]): return self._show(kind) + self._prompt()
+        return b"\r\n% Invalid input detected at '^' marker.\r\n" + self._prompt()
+
+    def _serve(self):
+        buf = b""; last_cr = False
+        while not self._stop.is_set():
+            try:
+                ready, _, _ = select.select([self.master], [], [], 0.1)
+                if not ready: continue
+                data = os.read(self.master, 1024)
+            except OSError:
+                return
+            for b in data:
+                ch = bytes((b,))
+                if ch == b"\n" and last_cr: last_cr = False; continue
+                last_cr = ch == b"\r"
+                if ch in (b"\r", b"\n"):
+                    line = buf.decode(errors="replace"); buf = b""
+                    self._reply(self._handle(line))
+                else:
+                    buf += ch
+                    if self.state not in ("pass", "enable"): self._write(ch, throttle=False)   # ekko
+
+# ==================== Benchmarks ====================
+def _behaviour(args):
+    return Behaviour(args.latency, args.jitter, args.bps, args.error_rate, args.connect_error_rate, args.seed)
+
+def bench_fleet(args):
+    """getconf.run_fleet (og evt. Setconf.run_rollout) mod n falske enheder for hvert antal jobs."""
+    import devsession, getconf
+    fleet = FakeFleet.from_dir(args.configs, behaviour=_behaviour(args)) if args.configs else FakeFleet(behaviour=_behaviour(args))
+    devices = [{"host": f"sw{i:04}"} for i in range(args.n)]
+    defaults = {"user": "admin", "password": "admin", "port": 22}
+    print(f"{'jobs':>5} {'op':<8} {'sek':>8} {'enh/s':>8} {'ok':>5} {'fejl':>5} {'sessioner':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for jobs in args.jobs:
+            devsession.use_driver(lambda: driver(fleet))
+            before = fleet.stats["opened"]
+            t0 = time.perf_counter()
+            with open(os.devnull, "w") as null, contextlib.redirect_stdout(null), contextlib.redirect_stderr(null):
+                res = getconf.run_fleet(devices, tmp, defaults, True, jobs, args.connect_timeout, args.read_timeout,
+                                        args.retries, args.backoff)
+            wall = time.perf_counter() - t0; ok = sum(1 for r in res if r[1])
+            print(f"{jobs:>5} {'getconf':<8} {wall:>8.2f} {len(res) / wall:>8.1f} {ok:>5} {len(res) - ok:>5} "
+                  f"{fleet.stats['opened'] - before:>9}")
+            if args.push:
+                import Setconf
+                before = fleet.stats["opened"]
+                rows = [dict(d, file=args.push) for d in devices]
+                t0 = time.perf_counter()
+                with open(os.devnull, "w") as null, contextlib.redirect_stdout(null), contextlib.redirect_stderr(null):
+                    res, _ = Setconf.run_rollout(rows, dict(defaults, mode="merge"), jobs, canary=1, max_fail=1.0)
+                wall = time.perf_counter() - t0; ok = sum(1 for r in res if r[1] != "failed")
+                print(f"{jobs:>5} {'setconf':<8} {wall:>8.2f} {len(res) / wall:>8.1f} {ok:>5} {len(res) - ok:>5} "
+                      f"{fleet.stats['opened'] - before:>9}")
+    print("flåde: " + ", ".join(f"{k}={v}" for k, v in fleet.stats.items()))
+
+def serve_serial(args):
+    """Start n konsoller og skriv en --com-list CSV; høst dem evt. med getconf.run_consoles."""
+    fleet = FakeFleet.from_dir(args.configs, behaviour=_behaviour(args)) if args.configs else FakeFleet(behaviour=_behaviour(args))
+    hosts = sorted(fleet.devices)[:args.n] if args.configs else [f"sw{i:04}" for i in range(args.n)]
+    sims = [SerialSim(fleet, h, args.user, args.password, args.enable) for h in hosts]
+    try:
+        rows = [{"com": s.path, "name": s.host} for s in sims]
+        if args.com_list:
+            with open(args.com_list, "w", newline="", encoding="utf-8") as f:
+                w = csv.DictWriter(f, fieldnames=["com", "name"]); w.writeheader(); w.writerows(rows)
+        for r in rows: print(f"{r['com']}\t{r['name']}")
+        if args.harvest:
+            import getconf
+            defaults = {"baud": 9600, "user": args.user, "password": args.password, "enable": args.enable}
+            with tempfile.TemporaryDirectory() as tmp:
+                t0 = time.perf_counter()
+                res = getconf.run_consoles(rows, args.harvest if args.harvest != "-" else tmp, defaults, True)
+                wall = time.perf_counter() - t0
+            ok = sum(1 for r in res if r[1])
+            print(f"{len(res)} konsoller på {wall:.2f}s: {ok} OK, {len(res) - ok} fejl, "
+                  f"{sum(s.stats['errors'] for s in sims)} injicerede fejl")
+            return
+        print("Konsollerne kører – Ctrl-C for at stoppe.", file=sys.stderr)
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for s in sims: s.close()
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    g = common.add_argument_group("adfærd")
+    g.add_argument("-n", type=int, default=50, help="Antal simulerede enheder (default 50)")
+    g.add_argument("--configs", metavar="MAPPE", help="Mappe med <host>.txt (default: genererede configs)")
+    g.add_argument("--latency", type=float, default=0.05, help="Sek. pr. kommando (default 0.05)")
+    g.add_argument("--jitter", type=float, default=0.0, help="+/- sek. tilfældig variation")
+    g.add_argument("--bps", type=float, help="Throughput i bytes/s (fx 960 = 9600 baud)")
+    g.add_argument("--error-rate", type=float, default=0.0, help="Andel af kommandoer der fejler (0-1)")
+    g.add_argument("--connect-error-rate", type=float, default=0.0, help="Andel af forbindelser der fejler (0-1)")
+    g.add_argument("--seed", type=int, help="Seed til fejl/jitter (reproducerbar kørsel)")
+
+    ap = argparse.ArgumentParser(prog="fakeios", description="Offline IOS-simulator (NAPALM-driver og pty-konsoller).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    f = sub.add_parser("fleet", parents=[common], help="Benchmark getconf/Setconf mod falske NAPALM-enheder")
+    f.add_argument("-j","--jobs", type=int, nargs="+", default=[1, 10, 50], help="Antal jobs der sammenlignes (default 1 10 50)")
+    f.add_argument("--push", metavar="FIL", help="Push også denne snippet (merge) med Setconf.run_rollout")
+    f.add_argument("--connect-timeout", type=int, default=10)
+    f.add_argument("--read-timeout", type=int, default=60)
+    f.add_argument("--retries", type=int, default=2)
+    f.add_argument("--backoff", type=float, default=0.1)
+    s = sub.add_parser("serial", parents=[common], help="Start pty-konsoller til getconf.py --com/--com-list")
+    s.add_argument("--com-list", metavar="FIL", help="Skriv CSV (com,name) til getconf.py --com-list")
+    s.add_argument("--harvest", metavar="MAPPE", help="Høst konsollerne én gang med getconf og afslut ('-' = midlertidig mappe)")
+    s.add_argument("-u","--user", default="admin"); s.add_argument("-p","--password", default="admin")
+    s.add_argument("-e","--enable", default="enable")
+    args = ap.parse_args()
+
+    if args.cmd == "fleet": bench_fleet(args)
+    else: serve_serial(args)
+
+if __name__ == "__main__":
+    main()
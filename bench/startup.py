@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# startup.py - mål opstartstid for CLI-værktøjerne (wall-tid + `python -X importtime`-opsummering).
+import argparse, json, os, re, subprocess, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMANDS = {
+    "setconf-help":   ["Setconf.py", "--help"],
+    "getconf-help":   ["intermediate/getconf.py", "--help"],
+    "getconf-noargs": ["intermediate/getconf.py", "-f", os.devnull],
+    "batchconf-help": ["intermediate/batchconf.py", "--help"],
+    "vlancheck-help": ["intermediate/vlancheck.py", "--help"],
+    "subnetcalc-help": ["subnetting/subnetcalc.py", "--help"],
+}
+IMPORT_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure(argv, repeat):
+    """Bedste wall-tid over `repeat` kørsler + importtime-tal fra en enkelt kørsel."""
+    cmd = [sys.executable, *argv]
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, capture_output=True)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    err = subprocess.run([sys.executable, "-X", "importtime", *argv], cwd=ROOT, capture_output=True, text=True).stderr
+    top = []; total = 0
+    for line in err.splitlines():
+        m = IMPORT_RE.match(line)
+        if m and len(m.group(3)) == 1:   # kun topniveau-imports (ét mellemrum før navnet)
+            cum = int(m.group(2)); total += cum; top.append((cum, m.group(4)))
+    top.sort(reverse=True)
+    return {"wall_ms": best * 1000, "import_ms": total / 1000, "top": [(n, c / 1000) for c, n in top[:5]]}
+
+def main():
+    ap = argparse.ArgumentParser(prog="startup", description="Opstartstid for CLI-værktøjerne (-X importtime).")
+    ap.add_argument("names", nargs="*", help=f"Kør kun disse ({', '.join(COMMANDS)})")
+    ap.add_argument("-r","--repeat", type=int, default=5)
+    ap.add_argument("--max-ms", type=float, help="Fejl (exit 1) hvis en kommando starter langsommere end dette")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    names = args.names or list(COMMANDS)
+    res = {n: measure(COMMANDS[n], args.repeat) for n in names}
+    if args.json:
+        print(json.dumps(res, indent=2))
+    else:
+        print(f"{'kommando':<18} {'wall ms':>8} {'import ms':>10}  tungeste imports")
+        for n, r in res.items():
+            heavy = ", ".join(f"{m} {ms:.0f}ms" for m, ms in r["top"][:3])
+            print(f"{n:<18} {r['wall_ms']:>8.1f} {r['import_ms']:>10.1f}  {heavy}")
+    slow = [n for n, r in res.items() if args.max_ms and r["wall_ms"] > args.max_ms]
+    for n in slow: print(f"FOR LANGSOM {n}: {res[n]['wall_ms']:.0f} ms > {args.max_ms:.0f} ms", file=sys.stderr)
+    sys.exit(1 if slow else 0)
+
+if __name__ == "__main__":
+    main()
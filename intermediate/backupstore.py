@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# backupstore.py - indholdsadresseret backup-repo til getconf.py.
+# Configs gemmes efter SHA-256 af indholdet; uændrede backups koster kun en pegepind,
+# ændrede gemmes som zlib-komprimerede linje-deltaer mod forrige version.
+# Tidsstemplerne fra "--- STARTUP (ts) ---"-headerne ligger i metadata, ikke i objekterne.
+import argparse, difflib, hashlib, json, os, re, sys, threading, zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote, unquote
+
+MAX_CHAIN = 30        # efter så mange deltaer i træk gemmes en fuld kopi (hurtig udpakning)
+TEXT_CACHE = 256      # udpakkede configs holdt i hukommelsen (LRU)
+KINDS = ("startup", "running")
+
+class BackupStoreError(Exception):
+    pass
+
+def now_iso(): return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+def parse_since(v):
+    """'7d', '12h', '30m' (relativt) eller ISO-dato/-tid -> aware datetime."""
+    m = re.fullmatch(r"(\d+)([dhm])", v.strip())
+    if m:
+        n = int(m.group(1)); unit = {"d": "days", "h": "hours", "m": "minutes"}[m.group(2)]
+        return datetime.now(timezone.utc) - timedelta(**{unit: n})
+    try: t = datetime.fromisoformat(v.strip())
+    except ValueError: raise BackupStoreError(f"ugyldigt tidspunkt '{v}' (brug fx 2024-05-01, 2024-05-01T02:00 eller 7d)")
+    return t if t.tzinfo else t.replace(tzinfo=timezone.utc)
+
+# ---------- delta-format ----------
+# Objektfil (zlib): "F\n<tekst>" eller "D<dybde> <base-sha>\n" efterfulgt af ops:
+#   "=a,b"  kopiér base-linjerne [a:b]
+#   "+n"    de næste n linjer indsættes ordret
+def make_delta(base_lines, lines):
+    # fælles start/slutning skæres fra først; SequenceMatcher (med autojunk, så "!" og
+    # gentagne interface-linjer ikke gør den kvadratisk) kører kun på midterstykket
+    n = min(len(base_lines), len(lines)); p = 0
+    while p < n and base_lines[p] == lines[p]: p += 1
+    q = 0
+    while q < n - p and base_lines[-1 - q] == lines[-1 - q]: q += 1
+    ops = [f"=0,{p}"] if p else []
+    sm = difflib.SequenceMatcher(None, base_lines[p:len(base_lines) - q], lines[p:len(lines) - q])
+    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+        if tag == "equal":
+            ops.append(f"={i1 + p},{i2 + p}")
+        elif j2 > j1:
+            ops.append(f"+{j2 - j1}"); ops.extend(lines[p + j1:p + j2])
+    if q: ops.append(f"={len(base_lines) - q},{len(base_lines)}")
+    return ops
+
+def apply_delta(base_lines, ops):
+    out = []; i = 0
+    while i < len(ops):
+        op = ops[i]; i += 1
+        if op[0] == "=":
+            a, b = map(int, op[1:].split(",")); out.extend(base_lines[a:b])
+        else:
+            n = int(op[1:]); out.extend(ops[i:i + n]); i += n
+    return out
+
+class BackupStore:
+    """Backup-repo i en mappe:
+
+        objects/ab/abcd...   zlib-komprimerede configs (fuld tekst eller delta mod en base)
+        hosts/<host>.jsonl   én linje pr. backup: {"v", "ts", "startup", "running", "changed"}
+        index.json           host -> {"versions", "last", "last_changed"} (skrives ved close)
+
+    Trådsikker, så flåde-mode kan tilføje fra flere tråde. Brug som context manager.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._hosts = {}          # host -> liste af versioner (lazy)
+        self._cache = OrderedDict()   # sha -> tekst (LRU)
+        self._dirty = False
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "hosts"), exist_ok=True)
+        self._index = self._load_index()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close(); return False
+
+    # ---------- objekter ----------
+    def _opath(self, sha): return os.path.join(self.root, "objects", sha[:2], sha)
+
+    def _read_obj(self, sha):
+        try:
+            with open(self._opath(sha), "rb") as f: raw = zlib.decompress(f.read()).decode("utf-8")
+        except (OSError, zlib.error) as e:
+            raise BackupStoreError(f"objekt {sha[:12]} mangler eller er ødelagt: {e}")
+        head, _, body = raw.partition("\n")
+        if head == "F": return 0, None, body
+        depth, base = head[1:].split(" ")
+        return int(depth), base, body
+
+    def text(self, sha):
+        """Udpak et objekt (følger delta-kæden)."""
+        if sha in self._cache:
+            self._cache.move_to_end(sha); return self._cache[sha]
+        chain = []; cur = sha
+        while True:
+            depth, base, body = self._read_obj(cur)
+            if base is None: text = body; break
+            chain.append(body); cur = base
+            if cur in self._cache: text = self._cache[cur]; break
+        for body in reversed(chain):
+            text = "\n".join(apply_delta(text.split("\n"), body.split("\n")))
+        self._remember(sha, text)
+        return text
+
+    def _remember(self, sha, text):
+        self._cache[sha] = text; self._cache.move_to_end(sha)
+        while len(self._cache) > TEXT_CACHE: self._cache.popitem(last=False)
+
+    def _put_obj(self, text, base_sha):
+        sha = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        path = self._opath(sha)
+        if os.path.exists(path): return sha
+        payload = "F\n" + text
+        if base_sha:
+            depth = self._read_obj(base_sha)[0] + 1
+            if depth <= MAX_CHAIN:
+                ops = make_delta(self.text(base_sha).split("\n"), text.split("\n"))
+                delta = f"D{depth} {base_sha}\n" + "\n".join(ops)
+                if len(delta) < len(payload): payload = delta
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f: f.write(zlib.compress(payload.encode("utf-8"), 9))
+        os.replace(tmp, path)
+        self._remember(sha, text)
+        return sha
+
+    # ---------- hosts ----------
+    def _hpath(self, host): return os.path.join(self.root, "hosts", quote(host, safe="") + ".jsonl")
+
+    def versions(self, host):
+        """Alle versioner for en host (ældste først)."""
+        if host not in self._hosts:
+            try:
+                with open(self._hpath(host), "r", encoding="utf-8") as f:
+                    self._hosts[host] = [json.loads(l) for l in f if l.strip()]
+            except FileNotFoundError:
+                self._hosts[host] = []
+            except ValueError as e:
+                raise BackupStoreError(f"ødelagt historik for {host}: {e}")
+        return self._hosts[host]
+
+    def head(self, host):
+        """Nyeste versionspost (læser kun slutningen af historikken) eller None."""
+        if host in self._hosts: return self._hosts[host][-1] if self._hosts[host] else None
+        try:
+            with open(self._hpath(host), "rb") as f:
+                f.seek(0, os.SEEK_END); size = f.tell()
+                f.seek(max(0, size - 4096)); lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        return json.loads(lines[-1]) if lines else None
+
+    def hosts(self): return sorted(self._index)
+
+    def add(self, host, cfgs, ts=None):
+        """Gem en backup (dict med 'startup' og evt. 'running'). Returnerer versionsposten."""
+        with self._lock:
+            prev = self.head(host) or {}
+            rec = {"v": prev.get("v", 0) + 1, "ts": ts or now_iso()}
+            for kind in KINDS:
+                text = cfgs.get(kind)
+                if text is None: continue
+                rec[kind] = self._put_obj(text, prev.get(kind))
+            rec["changed"] = not prev or any(rec.get(k) != prev.get(k) for k in KINDS if k in rec)
+            with open(self._hpath(host), "a", encoding="utf-8") as f: f.write(json.dumps(rec) + "\n")
+            if host in self._hosts: self._hosts[host].append(rec)
+            ent = self._index.setdefault(host, {"versions": 0, "last": None, "last_changed": None})
+            ent["versions"] = rec["v"]; ent["last"] = rec["ts"]
+            if rec["changed"]: ent["last_changed"] = rec["ts"]
+            self._dirty = True
+            return rec
+
+    def get(self, host, version=-1):
+        """Version N (1 = første, -1 = nyeste) -> (versionspost, {'startup': tekst, 'running': tekst})."""
+        vers = self.versions(host)
+        if not vers: raise BackupStoreError(f"ingen backups for {host}")
+        if version == 0: raise BackupStoreError("versioner tælles fra 1 (eller -1 for nyeste)")
+        try: rec = vers[version - 1 if version > 0 else version]
+        except IndexError: raise BackupStoreError(f"{host} har kun {len(vers)} versioner")
+        return rec, {k: self.text(rec[k]) for k in KINDS if rec.get(k)}
+
+    def changed_since(self, since):
+        """Hosts hvis config er ændret efter `since` (datetime) -> [(host, tidspunkt)]."""
+        out = []
+        for host, ent in self._index.items():
+            lc = ent.get("last_changed")
+            if lc and datetime.fromisoformat(lc) > since: out.append((host, lc))
+        return sorted(out)
+
+    # ---------- index ----------
+    def _load_index(self):
+        """Læs index.json; genopbyg fra hosts/ hvis den mangler, er ødelagt eller ældre end
+        en host-historik (fx efter en kørsel der blev afbrudt før close)."""
+        path = os.path.join(self.root, "index.json")
+        try:
+            mtime = os.path.getmtime(path)
+            if any(e.stat().st_mtime > mtime for e in os.scandir(os.path.join(self.root, "hosts"))):
+                return self._rebuild_index()
+            with open(path, "r", encoding="utf-8") as f: return json.load(f)
+        except (OSError, ValueError):
+            return self._rebuild_index()
+
+    def _rebuild_index(self):
+        idx = {}
+        for fname in os.listdir(os.path.join(self.root, "hosts")):
+            if not fname.endswith(".jsonl"): continue
+            host = unquote(fname[:-6]); vers = self.versions(host); self._hosts.pop(host)
+            if not vers: continue
+            changed = [r["ts"] for r in vers if r.get("changed")]
+            idx[host] = {"versions": len(vers), "last": vers[-1]["ts"], "last_changed": changed[-1] if changed else None}
+        self._dirty = True
+        return idx
+
+    def close(self):
+        with self._lock:
+            if not self._dirty: return
+            path = os.path.join(self.root, "index.json"); tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f: json.dump(self._index, f, indent=1, sort_keys=True)
+            os.replace(tmp, path)
+            self._dirty = False
+
+    def stats(self):
+        objs = 0; size = 0
+        for dirpath, _, files in os.walk(os.path.join(self.root, "objects")):
+            for fn in files: objs += 1; size += os.path.getsize(os.path.join(dirpath, fn))
+        return {"hosts": len(self._index), "versions": sum(e["versions"] for e in self._index.values()),
+                "objects": objs, "bytes": size}
+
+# ---------- import af gamle tekst-backups ----------
+HEADER_RE = re.compile(r"^--- (STARTUP|RUNNING) \((\d{8}-\d{6})\) ---$", re.M)
+
+def parse_backup_text(text):
+    """Split en getconf-fil i {'startup': ..., 'running': ...} og tidsstemplet fra første header."""
+    parts = HEADER_RE.split(text)
+    cfgs = {}; stamp = None
+    for i in range(1, len(parts) - 2, 3):
+        kind, t, body = parts[i].lower(), parts[i + 1], parts[i + 2]
+        cfgs[kind] = body.strip("\n"); stamp = stamp or t
+    if not cfgs: raise BackupStoreError("ingen '--- STARTUP (...) ---'-header fundet")
+    ts = datetime.strptime(stamp, "%Y%m%d-%H%M%S").astimezone(timezone.utc).isoformat(timespec="seconds")
+    return cfgs, ts
+
+def main():
+    ap = argparse.ArgumentParser(prog="backupstore", description="Forespørgsler mod et getconf backup-repo (--store).")
+    ap.add_argument("repo", help="Repo-mappe")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("show", help="Vis version N af en host"); p.add_argument("host")
+    p.add_argument("-v","--version", type=int, default=-1, help="Versionsnummer (1 = første, -1 = nyeste)")
+    p.add_argument("-k","--kind", choices=KINDS, default="startup")
+    p = sub.add_parser("log", help="Versionshistorik for en host"); p.add_argument("host")
+    p = sub.add_parser("changed", help="Hosts ændret siden T"); p.add_argument("--since", required=True, help="ISO-tid eller fx 7d/12h")
+    sub.add_parser("stats", help="Antal hosts/versioner/objekter og pladsforbrug")
+    p = sub.add_parser("import", help="Importér eksisterende getconf-tekstfiler"); p.add_argument("host")
+    p.add_argument("files", nargs="+", help="Filer i kronologisk rækkefølge")
+    args = ap.parse_args()
+
+    try:
+        with BackupStore(args.repo) as store:
+            if args.cmd == "show":
+                rec, cfgs = store.get(args.host, args.version)
+                if args.kind not in cfgs: raise BackupStoreError(f"version {rec['v']} har ingen {args.kind}-config")
+                print(f"--- {args.kind.upper()} v{rec['v']} ({rec['ts']}) ---", file=sys.stderr)
+                sys.stdout.write(cfgs[args.kind] + "\n")
+            elif args.cmd == "log":
+                for r in store.versions(args.host):
+                    print(f"v{r['v']:<5} {r['ts']}  {'ændret' if r.get('changed') else '-'}  {r.get('startup','')[:12]}")
+            elif args.cmd == "changed":
+                for host, t in store.changed_since(parse_since(args.since)): print(f"{host}  {t}")
+            elif args.cmd == "stats":
+                st = store.stats()
+                print(f"{st['hosts']} hosts, {st['versions']} versioner, {st['objects']} objekter, {st['bytes']/1024:.1f} KiB")
+            elif args.cmd == "import":
+                for fn in args.files:
+                    with open(fn, "r", encoding="utf-8") as f: cfgs, ts = parse_backup_text(f.read())
+                    rec = store.add(args.host, cfgs, ts)
+                    print(f"v{rec['v']} {ts} {'ændret' if rec['changed'] else 'uændret'}  <- {fn}")
+    except (OSError, BackupStoreError) as e:
+        print(f"ERROR: {e}", file=sys.stderr); sys.exit(2)
+
+if __name__ == "__main__":
+    main()
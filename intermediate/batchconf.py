@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# batchconf.py - headless batch-generering af baseline-configs ud fra et inventory-manifest.
+# Bruger samme gen_config som TUI'en i newconfdesign.py, men uden curses-flowet.
+import argparse, csv, hashlib, json, os, pathlib, sys, time
+
+import newconfdesign as ncd
+
+# Korte navne til BASE_FEATURES, så manifestet kan skrives i hånden
+FEATURE_ALIASES = {
+    "stp":     "STP hardening (bpduguard/default, portfast edge)",
+    "dhcp":    "DHCP snooping + IP source guard",
+    "portsec": "Port-security (sticky MAC på access-porte)",
+    "storm":   "Storm-control (broadcast/multicast/unicast)",
+    "lldp":    "LLDP enable",
+    "logging": "Logging + NTP + timezone",
+    "snmp":    "SNMPv3 skabelon",
+    "sshkey":  "Embed SSH public key",
+}
+DEFAULT_FEATURES = dict(ncd.BASE_FEATURES)
+BUILD_MANIFEST = ".batchconf-build.json"   # hostname -> input-hash (til --incremental)
+
+_PROFILES = {}   # sættes pr. worker-proces af _init_worker
+
+def split_list(v):
+    """'a;b c,d' eller ['a','b'] -> ['a','b',...] (tom/None -> [])."""
+    if v is None: return []
+    if isinstance(v, (list, tuple)): return [str(x).strip() for x in v if str(x).strip()]
+    return [x for x in str(v).replace(";", " ").replace(",", " ").split() if x]
+
+def parse_features(v):
+    """Tom = BASE_FEATURES-defaults. Ellers aliaser; 'default' starter fra defaults, '-x' slår x fra."""
+    toks = split_list(v)
+    if not toks: return dict(DEFAULT_FEATURES)
+    feats = dict(DEFAULT_FEATURES) if "default" in toks else {name: False for name in DEFAULT_FEATURES}
+    for t in toks:
+        if t == "default": continue
+        on = not t.startswith("-"); t = t.lstrip("+-")
+        name = FEATURE_ALIASES.get(t.lower(), t)
+        if name not in feats: raise ValueError(f"ukendt feature '{t}' (kendte: {', '.join(FEATURE_ALIASES)})")
+        feats[name] = on
+    return feats
+
+def load_manifest(path):
+    """Læs manifest (.json = liste af objekter, ellers CSV med header)."""
+    p = pathlib.Path(path)
+    if p.suffix.lower() == ".json":
+        rows = json.loads(p.read_text(encoding="utf-8"))
+        if not isinstance(rows, list): raise ValueError("JSON-manifest skal være en liste af switches")
+        return rows
+    with open(p, newline="", encoding="utf-8") as f:
+        return [{k.strip().lower(): (v or "").strip() for k, v in r.items() if k} for r in csv.DictReader(f)]
+
+def _get(row, key, default=None):
+    v = row.get(key)
+    return default if v is None or v == "" else v
+
+def build_job(row, profile):
+    """Oversæt en manifest-række til (params, features, chosen_vlans, access_vid) til gen_config."""
+    host = _get(row, "hostname")
+    if not host: raise ValueError("hostname mangler")
+    model = str(_get(row, "model", "24P")).upper()
+    d = ncd.PT_DEFAULTS.get(model, {"base_prefix":"GigabitEthernet1/0/","extra_prefix":"GigabitEthernet1/0/","extra_slots":4})
+    pv = profile["vlans"]; mg = pv["mgmt"]
+    features = parse_features(row.get("features"))
+
+    # VLAN-udvalg: keys eller VLAN-id'er; mgmt er altid med
+    want = split_list(row.get("vlans"))
+    chosen = {}
+    for k, v in pv.items():
+        chosen[k] = k == "mgmt" or not want or k in want or str(v["id"]) in want
+
+    has_printer = any(chosen[k] and v.get("purpose") == "printer" for k, v in pv.items())
+    has_voice = any(chosen[k] and v.get("purpose") == "voice" for k, v in pv.items())
+    params = {
+        "Hostname": host,
+        "Model": model,
+        "Base iface prefix": _get(row, "base_prefix", d["base_prefix"]),
+        "Extra uplink prefix": _get(row, "extra_prefix", d["extra_prefix"]),
+        "Extra uplink slots": str(_get(row, "extra_slots", d["extra_slots"])),
+        "Uplink count": str(_get(row, "uplinks", 2)),
+        "Printer count": str(_get(row, "printers", 1)) if has_printer else "0",
+        "Voice count": str(_get(row, "voice", 0)) if has_voice else "0",
+        "Stack members": str(_get(row, "members", 1)),
+        "Mgmt SVI host": str(_get(row, "mgmt_svi", mg.get("svi_host", 2))),
+        "Mgmt GW host": str(_get(row, "mgmt_gw", mg.get("gw_host", 1))),
+        "Domain": _get(row, "domain", "corp.local"),
+        "SSH key bits": str(_get(row, "ssh_key_bits", 2048)),
+        "Syslog server": "", "NTP server": "",
+    }
+    if features.get("Logging + NTP + timezone", False):
+        a, b, c, _ = map(int, mg["net"].split('.'))
+        params["Syslog server"] = _get(row, "syslog", f"{a}.{b}.{c}.10")
+        params["NTP server"] = _get(row, "ntp", f"{a}.{b}.{c}.11")
+    if features.get("Embed SSH public key", False):
+        params["SSH username"] = _get(row, "ssh_user", "admin")
+        params["SSH pub path"] = os.path.expanduser(_get(row, "ssh_pub", "~/.ssh/id_rsa.pub"))
+
+    for key, check in (("Extra uplink slots", ncd.int_range(0,32)), ("Uplink count", ncd.int_range(0,32)),
+                       ("Printer count", ncd.int_range(0,16)), ("Voice count", ncd.int_range(0,9*48)),
+                       ("Stack members", ncd.int_range(1,9)), ("SSH key bits", ncd.int_range(1024,4096))):
+        ok, msg = check(params[key])
+        if not ok: raise ValueError(f"{key}: {msg}")
+    if params["Stack members"] != "1":
+        ncd.member_prefix(params["Base iface prefix"], 2); ncd.member_prefix(params["Extra uplink prefix"], 2)
+    access_vid = _get(row, "access_vlan")
+    return params, features, chosen, (int(access_vid) if access_vid else None)
+
+def _init_worker(profiles):
+    global _PROFILES
+    _PROFILES = profiles
+
+def input_hash(params, features, profile, chosen, access_vid):
+    """Hash af alt der påvirker en switch' config (ikke tidsstemplet i headeren)."""
+    pv = profile["vlans"]
+    eff = {
+        "gen": ncd.GENERATOR_VERSION,
+        "params": params, "features": features, "access_vid": access_vid,
+        "profile": profile["name"],
+        "vlans": [[k, pv[k]] for k in pv if chosen.get(k, False)],
+    }
+    if features.get("Embed SSH public key", False) and params.get("SSH pub path"):
+        try: eff["pubkey"] = ncd.read_pubkey(params["SSH pub path"])
+        except OSError: eff["pubkey"] = None
+    raw = json.dumps(eff, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+def render_one(row, outdir, known=None):
+    """Worker: render én switch og skriv <hostname>-baseline.cfg.
+    Returnerer (host, hash, status, fejl) hvor status er 'built', 'skipped' eller 'failed'.
+    Er `known` (forrige hash) lig den nye og filen findes, springes skrivningen over."""
+    host = row.get("hostname") or "?"
+    try:
+        pname = _get(row, "profile")
+        profile = _PROFILES.get(pname)
+        if profile is None: raise ValueError(f"ukendt profil '{pname}'")
+        params, features, chosen, access_vid = build_job(row, profile)
+        path = os.path.join(outdir, f"{params['Hostname']}-baseline.cfg")
+        digest = input_hash(params, features, profile, chosen, access_vid)
+        if known == digest and os.path.exists(path):
+            return host, digest, "skipped", None
+        with open(path, "w", encoding="utf-8", buffering=1 << 16) as f:
+            ncd.write_config(f, params, features, profile, chosen, access_default_vid=access_vid)
+        return host, digest, "built", None
+    except Exception as e:
+        return host, None, "failed", str(e)
+
+def load_build_manifest(outdir):
+    try:
+        with open(os.path.join(outdir, BUILD_MANIFEST), "r", encoding="utf-8") as f: return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_build_manifest(outdir, hashes):
+    path = os.path.join(outdir, BUILD_MANIFEST); tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f: json.dump(hashes, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def needed_profiles(rows, store):
+    """Læs kun de profiler manifestet refererer til. Rækker uden profil bruger den
+    første i storen (gemt under nøglen None)."""
+    byname = {}
+    for name in {_get(r, "profile") for r in rows}:
+        prof = store.get(name if name is not None else next(iter(store.names()), ""))
+        if prof is not None: byname[name] = prof
+    return byname
+
+def run_batch(rows, byname, outdir, jobs=None, incremental=False):
+    """Render alle rækker med en process-pool. `byname` er profilnavn -> profil.
+    Returnerer dict med built/skipped/failed (liste af (host, fejl)) og wall-tid."""
+    os.makedirs(outdir, exist_ok=True)
+    prev = load_build_manifest(outdir) if incremental else {}
+    hashes = {}; stats = {"built": 0, "skipped": 0, "failed": []}
+    t0 = time.perf_counter()
+    if jobs == 1:
+        _init_worker(byname)
+        results = (render_one(r, outdir, prev.get(r.get("hostname"))) for r in rows)
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        ex = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(byname,))
+        futs = [ex.submit(render_one, r, outdir, prev.get(r.get("hostname"))) for r in rows]
+        results = (f.result() for f in as_completed(futs))
+    try:
+        for host, digest, status, err in results:
+            if status == "failed":
+                stats["failed"].append((host, err)); print(f"FEJL {host}: {err}", file=sys.stderr)
+            else:
+                stats[status] += 1; hashes[host] = digest
+    finally:
+        if jobs != 1: ex.shutdown()
+    stats["wall"] = time.perf_counter() - t0
+    if incremental: save_build_manifest(outdir, hashes)
+    return stats
+
+def main():
+    ap = argparse.ArgumentParser(prog="batchconf", description="Generér baseline-configs for mange switches ud fra et manifest (CSV/JSON).")
+    ap.add_argument("manifest", help="CSV/JSON med hostname, model, profile, features, uplinks, printers, mgmt_svi, mgmt_gw ...")
+    ap.add_argument("-o","--outdir", default="out", help="Output-mappe (default: out)")
+    ap.add_argument("-P","--profiles", default=None, help=f"Profil-mappe eller gammel .json-fil (default: {ncd.PROFILE_DIR}; {ncd.PROFILE_FILE} ved siden af migreres automatisk)")
+    ap.add_argument("-j","--jobs", type=int, default=None, help="Antal worker-processer (default: antal CPU'er, 1 = ingen pool)")
+    ap.add_argument("-i","--incremental", action="store_true", help=f"Genbyg kun switches hvis input er ændret (hashes i <outdir>/{BUILD_MANIFEST})")
+    args = ap.parse_args()
+
+    try:
+        rows = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: kan ikke læse manifest: {e}", file=sys.stderr); sys.exit(2)
+    try:
+        byname = needed_profiles(rows, ncd.ProfileStore(args.profiles))
+    except ncd.ProfileError as e:
+        print(f"ERROR: {e}", file=sys.stderr); sys.exit(2)
+
+    st = run_batch(rows, byname, args.outdir, args.jobs, args.incremental)
+    done = st["built"] + st["skipped"]; wall = st["wall"]
+    rate = done / wall if wall > 0 else 0.0
+    print(f"OK: {done} configs -> {args.outdir}  •  bygget: {st['built']}  •  uændret: {st['skipped']}"
+          f"  •  fejl: {len(st['failed'])}  •  {wall:.2f}s  •  {rate:.1f} switches/s")
+    sys.exit(1 if st["failed"] else 0)
+
+if __name__ == "__main__":
+    main()
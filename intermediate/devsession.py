@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# devsession.py - fælles pool af åbne NAPALM-forbindelser til getconf.py og Setconf.py.
+# Så kan backup -> load candidate -> commit -> re-fetch køre over én SSH-session pr. enhed
+# i stedet for at betale forhandling + auth hver gang.
+import atexit, os, threading, time
+from contextlib import contextmanager
+
+import phasetimer
+
+def _ios_driver():
+    spec = os.environ.get("DEVSESSION_DRIVER")   # "modul:fabrik", fx "fakeios:from_env" til offline test
+    if spec:
+        import importlib
+        mod, _, factory = spec.partition(":")
+        return getattr(importlib.import_module(mod), factory or "driver")()
+    from napalm import get_network_driver   # lazy: kun når der faktisk skal forbindes
+    return get_network_driver("ios")
+
+class SessionPool:
+    """Pool af åbne NAPALM-devices nøglet på (host, port, user, password).
+
+    - max_size: max antal åbne forbindelser i alt; er poolen fuld lukkes den ældste ledige,
+      ellers venter acquire til en bliver frigivet.
+    - idle_timeout: ledige sessioner ældre end dette (sek.) lukkes.
+    - health_after: en session der har ligget ledig længere end dette tjekkes med is_alive()
+      før genbrug og åbnes igen hvis den er død.
+    """
+    def __init__(self, max_size=16, idle_timeout=300, health_after=30, driver_factory=None):
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.health_after = health_after
+        self._driver_factory = driver_factory or _ios_driver
+        self._driver = None
+        self._idle = {}          # key -> [(dev, sidst brugt)]
+        self._open = 0
+        self._cond = threading.Condition()
+        self.stats = {"opened": 0, "reused": 0, "dead": 0}
+
+    @staticmethod
+    def _key(host, username, password, optional_args):
+        return (host, int((optional_args or {}).get("port", 22)), username, password)
+
+    @contextmanager
+    def session(self, host, username, password, optional_args=None, timeout=60):
+        """Lån en åben forbindelse. Ved en exception i with-blokken lukkes sessionen
+        i stedet for at komme tilbage i poolen."""
+        key = self._key(host, username, password, optional_args)
+        dev = self._acquire(key, host, username, password, optional_args, timeout)
+        ok = False
+        try:
+            yield dev
+            ok = True
+        finally:
+            self._release(key, dev, ok)
+
+    def _acquire(self, key, host, username, password, optional_args, timeout):
+        dev = None
+        with self._cond:
+            while True:
+                self._reap_locked(time.monotonic())
+                idle = self._idle.get(key)
+                if idle:
+                    dev, last = idle.pop()
+                    if not idle: del self._idle[key]
+                    break
+                if self._open < self.max_size:
+                    self._open += 1; last = None
+                    break
+                if not self._evict_oldest_locked():
+                    self._cond.wait()
+        if dev is not None and time.monotonic() - last > self.health_after:
+            with phasetimer.phase(host, "health_check"): alive = self._alive(dev)
+            if not alive:
+                self.stats["dead"] += 1; _close(dev); dev = None
+        if dev is not None:
+            self.stats["reused"] += 1
+            return dev
+        try:
+            if self._driver is None: self._driver = self._driver_factory()
+            dev = self._driver(hostname=host, username=username, password=password,
+                               timeout=timeout, optional_args=dict(optional_args or {}))
+            # open() er TCP + SSH-auth + enable i ét kald og måles som én fase; målingen må
+            # ikke selv åbne forbindelser (driveren kan være telnet, en proxy eller en simulator)
+            with phasetimer.phase(host, "connect"): dev.open()
+        except Exception:
+            with self._cond:
+                self._open -= 1; self._cond.notify()
+            raise
+        self.stats["opened"] += 1
+        return dev
+
+    def _release(self, key, dev, ok):
+        with self._cond:
+            if ok:
+                self._idle.setdefault(key, []).append((dev, time.monotonic()))
+            else:
+                _close(dev); self._open -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _alive(dev):
+        try: return bool(dev.is_alive().get("is_alive"))
+        except Exception: return False
+
+    def _reap_locked(self, now):
+        for key in list(self._idle):
+            keep = []
+            for dev, last in self._idle[key]:
+                if now - last > self.idle_timeout:
+                    _close(dev); self._open -= 1
+                else:
+                    keep.append((dev, last))
+            if keep: self._idle[key] = keep
+            else: del self._idle[key]
+
+    def _evict_oldest_locked(self):
+        if not self._idle: return False
+        key = min(self._idle, key=lambda k: self._idle[k][0][1])
+        dev, _ = self._idle[key].pop(0)
+        if not self._idle[key]: del self._idle[key]
+        _close(dev); self._open -= 1
+        return True
+
+    def close_all(self):
+        with self._cond:
+            for entries in self._idle.values():
+                for dev, _ in entries: _close(dev)
+                self._open -= len(entries)
+            self._idle.clear()
+            self._cond.notify_all()
+
+def _close(dev):
+    try: dev.close()
+    except Exception: pass
+
+_POOL = None
+
+def default_pool():
+    """Proces-global pool; lukkes automatisk ved exit."""
+    global _POOL
+    if _POOL is None:
+        _POOL = SessionPool()
+        atexit.register(_POOL.close_all)
+    return _POOL
+
+def use_driver(factory):
+    """Skift driver for den fælles pool (fx fakeios.driver til benchmarks); åbne sessioner lukkes."""
+    pool = default_pool()
+    pool.close_all()
+    with pool._cond:
+        pool._driver_factory = factory; pool._driver = None
@@ -1,25 +1,44 @@
 #!/usr/bin/env python3
-import argparse, getpass, pathlib, time, sys, re
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from napalm import get_network_driver
-import serial
+# Tunge afhængigheder importeres først på den sti der bruger dem:
+# napalm kun ved --ssh, pyserial kun ved --com og rich kun når stderr er en terminal.
+import argparse, atexit, csv, getpass, json, os, pathlib, time, sys, re
 
-PROMPT_RE = re.compile(r'[#>] ?$')
+import devsession, phasetimer
+from backupstore import BackupStore, BackupStoreError
+from runcache import CACHE_DIR, RunningCache
 
 def ts(): return time.strftime("%Y%m%d-%H%M%S")
 def write_file(path, text):
     pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
     pathlib.Path(path).write_text(text, encoding="utf-8")
 
-def getconf_ssh(host, username, password, optional_args, include_running, progress):
-    with progress:
-        t = progress.add_task(f"[bold]SSH {host} → get_config", total=None)
-        driver = get_network_driver("ios")
-        dev = driver(hostname=host, username=username, password=password, optional_args=optional_args)
-        dev.open()
-        cfgs = dev.get_config(retrieve="all" if include_running else "startup")  # running/startup/candidate
-        dev.close()
-        progress.update(t, completed=1)
+class _NoProgress:
+    """Stand-in for rich.progress.Progress når output ikke går til en terminal."""
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def add_task(self, description, total=None):
+        print(re.sub(r"\[/?[a-z ]+\]", "", description), file=sys.stderr); return 0
+    def update(self, task, **kw): pass
+
+def make_progress():
+    if not sys.stderr.isatty(): return _NoProgress()
+    try: from rich.progress import Progress, SpinnerColumn, TextColumn
+    except ImportError: return _NoProgress()
+    return Progress(SpinnerColumn(), TextColumn("{task.description}"))
+
+def fetch_ssh(host, username, password, optional_args, include_running, timeout=60, pool=None, cache=None):
+    """Hent configs via NAPALM over en session fra `pool` (default: den fælles pool i devsession).
+    `timeout` er read-timeout; connect-timeout gives som optional_args["conn_timeout"].
+    Med en RunningCache (runcache.py) gemmes den hentede running-config til Setconf's no-op-check."""
+    pool = pool or devsession.default_pool()
+    with pool.session(host, username, password, optional_args, timeout=timeout) as dev:
+        with phasetimer.phase(host, "get_config") as ph:
+            cfgs = dev.get_config(retrieve="all" if include_running else "startup")  # running/startup/candidate
+            ph["bytes"] = sum(len(v or "") for v in cfgs.values())
+    if cache is not None and include_running: cache.put(host, cfgs.get("running", "") or "")
+    return cfgs
+
+def format_backup(cfgs, include_running):
     out = []
     out.append(f"--- STARTUP ({ts()}) ---")
     out.append(cfgs.get("startup", "") or "")
@@ -28,48 +47,248 @@ def getconf_ssh(host, username, password, optional_args, include_running, progre
         out.append(cfgs.get("running", "") or "")
     return "\n".join(out) + "\n"
 
-def getconf_serial(com, baud, username, password, enable_secret, include_running, pace, progress):
-    def send_read(ser, cmd):
-        ser.write((cmd + "\r\n").encode()); time.sleep(pace)
-        buf = bytearray()
-        end = time.time() + 15
-        while time.time() < end:
-            chunk = ser.read(65535)
-            if chunk:
-                buf += chunk
-                try:
-                    if PROMPT_RE.search(buf.decode(errors="ignore")[-300:]): break
-                except: pass
-                end = time.time() + 2
-            else:
-                time.sleep(0.05)
-        return buf.decode(errors="replace")
-
+def getconf_ssh(host, username, password, optional_args, include_running, progress, cache=None):
     with progress:
-        t = progress.add_task(f"[bold]COM {com} → show config", total=None)
-        ser = serial.Serial(com, baudrate=baud, timeout=0.7)
-        time.sleep(pace); ser.reset_input_buffer()
-        ser.write(b"\r\n"); time.sleep(pace)
-        buf = ser.read(4096)
-        if b"username" in buf.lower() and username:
-            ser.write((username + "\r\n").encode()); time.sleep(pace); buf += ser.read(8192)
-        if b"password" in buf.lower() and password:
-            ser.write((password + "\r\n").encode()); time.sleep(pace); buf += ser.read(8192)
-        ser.write(b"\r\n"); time.sleep(pace); buf += ser.read(4096)
+        t = progress.add_task(f"[bold]SSH {host} → get_config", total=None)
+        cfgs = fetch_ssh(host, username, password, optional_args, include_running, cache=cache)
+        progress.update(t, completed=1)
+    return cfgs
+
+# ==================== Fleet mode ====================
+def load_inventory(path):
+    """Inventory: .json (liste af objekter/hostnavne), .csv (kolonner host, user, password, port, file)
+    eller en tekstfil med ét hostnavn pr. linje (# = kommentar)."""
+    p = pathlib.Path(path)
+    if p.suffix.lower() == ".json":
+        rows = json.loads(p.read_text(encoding="utf-8"))
+        return [r if isinstance(r, dict) else {"host": str(r)} for r in rows]
+    if p.suffix.lower() == ".csv":
+        with open(p, newline="", encoding="utf-8") as f:
+            return [{k.strip().lower(): (v or "").strip() for k, v in r.items() if k} for r in csv.DictReader(f)]
+    lines = [l.split("#", 1)[0].strip() for l in p.read_text(encoding="utf-8").splitlines()]
+    return [{"host": l} for l in lines if l]
+
+def backup_device(dev, defaults, include_running, connect_timeout, read_timeout, retries, backoff, cache=None):
+    """Hent én enhed med retry + eksponentiel backoff. Returnerer (configs, forsøg, sekunder)."""
+    host = dev["host"]
+    optional_args = {"port": int(dev.get("port") or defaults["port"]), "conn_timeout": connect_timeout}
+    t0 = time.perf_counter(); attempt = 0
+    while True:
+        try:
+            cfgs = fetch_ssh(host, dev.get("user") or defaults["user"], dev.get("password") or defaults["password"],
+                             optional_args, include_running, timeout=read_timeout, cache=cache)
+            return cfgs, attempt + 1, time.perf_counter() - t0
+        except Exception:
+            if attempt >= retries: raise
+            time.sleep(backoff * (2 ** attempt)); attempt += 1
+
+def save_backup(host, cfgs, include_running, path=None, store=None):
+    """Gem i backup-repoet hvis `store` er givet, ellers som tekstfil med headers."""
+    if store is not None:
+        rec = store.add(host, cfgs if include_running else {"startup": cfgs.get("startup", "") or ""})
+        return f"{store.root} v{rec['v']}" + ("" if rec["changed"] else " (uændret)")
+    write_file(path, format_backup(cfgs, include_running))
+    return path
+
+def run_fleet(devices, outdir, defaults, include_running, jobs=10, connect_timeout=10, read_timeout=60,
+              retries=2, backoff=2.0, store=None, cache=None):
+    """Hent hele flåden med højst `jobs` samtidige forbindelser. Hver backup skrives (eller lægges
+    i `store`) så snart den er hentet, og running-configs lægges i `cache` hvis den er givet.
+    Returnerer liste af (host, ok, sekunder, forsøg/fejltekst)."""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    devsession.default_pool().max_size = max(devsession.default_pool().max_size, jobs)
+    results = []; n = len(devices)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+        futs = {ex.submit(backup_device, d, defaults, include_running, connect_timeout, read_timeout, retries, backoff, cache): d
+                for d in devices}
+        for i, fut in enumerate(as_completed(futs), 1):
+            d = futs[fut]; host = d["host"]
+            try:
+                cfgs, tries, sec = fut.result()
+                save_backup(host, cfgs, include_running, os.path.join(outdir, d.get("file") or f"{host}.txt"), store)
+                results.append((host, True, sec, tries))
+                print(f"[{i}/{n}] OK   {host}  {sec:.1f}s" + (f"  ({tries} forsøg)" if tries > 1 else ""))
+            except Exception as e:
+                results.append((host, False, None, str(e) or type(e).__name__))
+                print(f"[{i}/{n}] FEJL {host}: {e}", file=sys.stderr)
+    return results
+
+def print_fleet_summary(results, wall):
+    ok = sorted((r for r in results if r[1]), key=lambda r: r[2])
+    bad = [r for r in results if not r[1]]
+    print(f"\nFlåde: {len(ok)} OK, {len(bad)} fejl, {wall:.1f}s i alt")
+    if ok:
+        lat = [r[2] for r in ok]
+        print(f"Latency: min {lat[0]:.1f}s  median {lat[len(lat)//2]:.1f}s  max {lat[-1]:.1f}s")
+        print("Langsomste: " + ", ".join(f"{h} {s:.1f}s" for h, _, s, _ in ok[-5:][::-1]))
+    for host, _, _, err in bad:
+        print(f"  FEJL {host}: {err}")
+
+# ==================== Seriel konsol ====================
+# Prompt = "Hostname#", "Hostname>" eller "Hostname(config)#" sidst i outputtet;
+# LOGIN_RE matcher desuden "Username:"/"Password:".
+PROMPT_RE = re.compile(rb'(?:^|[\r\n])[\w.\-]+(?:\([\w.\-]+\))?[#>] ?$')
+LOGIN_RE = re.compile(rb'(?:[Uu]sername|[Pp]assword|[Ll]ogin): ?$|(?:^|[\r\n])[\w.\-]+(?:\([\w.\-]+\))?[#>] ?$')
+
+class SerialConsole:
+    """Event-drevet læsning fra en seriel konsol.
+
+    Der scannes kun de nye bytes (plus en rullende hale på TAIL bytes) for prompten, og
+    read_until returnerer så snart den ses. Ventetider efter en kommando tilpasses den målte
+    ekko-latency (EWMA) i stedet for en fast pace; `pace` > 0 giver en fast minimumspause.
+    """
+    TAIL = 256
+
+    def __init__(self, ser, pace=None, idle=2.0):
+        self.ser = ser
+        self.pace = pace
+        self.idle = idle
+        self.rtt = 0.05           # estimeret ekko-latency (sek.)
+        self.rx_bytes = 0
+        self.tx_bytes = 0
+        self._sent = None
+
+    @property
+    def quiet(self):
+        """Stilhed der betyder 'enheden er færdig med at svare' når ingen prompt matcher."""
+        return max(self.pace or 0.0, min(1.0, max(0.1, 4 * self.rtt)))
+
+    def send(self, line):
+        data = (line + "\r\n").encode()
+        self.ser.write(data); self.tx_bytes += len(data)
+        self._sent = time.perf_counter()
+        if self.pace: time.sleep(self.pace)
+
+    def read_until(self, pattern=PROMPT_RE, timeout=15, idle=None):
+        """Læs indtil `pattern` matcher slutningen af outputtet, der ikke er kommet noget i
+        `idle` sek. (efter første byte) eller `timeout` sek. uden første byte."""
+        idle = self.idle if idle is None else idle
+        buf = bytearray(); tail = b""
+        now = time.perf_counter(); deadline = now + timeout
+        while now < deadline:
+            chunk = self.ser.read(self.ser.in_waiting or 1)   # blokerer højst ser.timeout
+            now = time.perf_counter()
+            if not chunk: continue
+            if not buf and self._sent is not None:
+                self.rtt = 0.7 * self.rtt + 0.3 * (now - self._sent); self._sent = None
+            buf += chunk; self.rx_bytes += len(chunk)
+            tail = (tail + chunk)[-self.TAIL:]
+            if pattern.search(tail): break
+            deadline = now + idle
+        return bytes(buf)
+
+    def exchange(self, line, pattern=LOGIN_RE, timeout=None):
+        """Send en linje og læs svaret (login/enable-trin): stop ved prompt eller kort stilhed."""
+        self.send(line)
+        return self.read_until(pattern, timeout=timeout or max(2.0, 10 * self.quiet), idle=self.quiet)
+
+def read_console(com, baud, username, password, enable_secret, include_running, pace, status=None):
+    """Log ind på en seriel konsol og hent configs. `status(tekst)` kaldes ved hvert trin."""
+    import serial
+    status = status or (lambda msg: None)
+    with phasetimer.phase(com, "open_port", baud=baud):
+        ser = serial.Serial(com, baudrate=baud, timeout=0.05)
+    try:
+        con = SerialConsole(ser, pace)
+        ser.reset_input_buffer()
+        status("login")
+        with phasetimer.phase(com, "login") as ph:
+            buf = con.exchange("")
+            if b"username" in buf.lower() and username:
+                buf += con.exchange(username)
+            if b"password" in buf.lower() and password:
+                buf += con.exchange(password)
+            buf += con.exchange("")
+            ph["bytes"] = con.rx_bytes
         if b">" in buf and b"#" not in buf and enable_secret:
-            ser.write(b"enable\r\n"); time.sleep(pace); buf += ser.read(4096)
-            if b"password" in buf.lower():
-                ser.write((enable_secret + "\r\n").encode()); time.sleep(pace); buf += ser.read(4096)
-        ser.write(b"terminal length 0\r\n"); time.sleep(pace); ser.read(4096)
-
-        startup = send_read(ser, "show startup-config")
-        out = [f"--- STARTUP ({ts()}) ---", startup]
-        if include_running:
-            running = send_read(ser, "show running-config")
-            out += [f"\n--- RUNNING ({ts()}) ---", running]
+            with phasetimer.phase(com, "enable"):
+                buf += con.exchange("enable")
+                if b"password" in buf.lower():
+                    buf += con.exchange(enable_secret)
+        con.exchange("terminal length 0")
+
+        cfgs = {}
+        for kind in ("startup", "running") if include_running else ("startup",):
+            status(f"show {kind}-config ({con.rx_bytes} B)")
+            with phasetimer.phase(com, f"show_{kind}") as ph:
+                before = con.rx_bytes
+                con.send(f"show {kind}-config")
+                cfgs[kind] = con.read_until().decode(errors="replace")
+                ph["bytes"] = con.rx_bytes - before
+        status(f"færdig ({con.rx_bytes} B)")
+    finally:
         ser.close()
+    return cfgs
+
+def getconf_serial(com, baud, username, password, enable_secret, include_running, pace, progress):
+    with progress:
+        t = progress.add_task(f"[bold]COM {com} → show config", total=None)
+        cfgs = read_console(com, baud, username, password, enable_secret, include_running, pace)
         progress.update(t, completed=1)
-    return "\n".join(out) + "\n"
+    return cfgs
+
+# ==================== Flere konsoller parallelt ====================
+HOSTNAME_RE = re.compile(r"^hostname (\S+)", re.M)
+
+DEFAULT_HOSTNAMES = {"Switch", "Router"}      # fabriksnulstillede/slettede enheder hedder alle det samme
+
+def console_name(row, cfgs=None, used=None):
+    """Navn til fil/repo: 'name'-kolonnen, ellers hostname fra configgen, ellers portens navn.
+    Et navn der allerede er brugt i kørslen (`used`) får portens navn på, så to konsoller aldrig
+    skriver til samme fil eller repo-host."""
+    port = os.path.basename(row["com"])
+    m = HOSTNAME_RE.search((cfgs or {}).get("startup", "") or "")
+    name = row.get("name") or (m.group(1) if m and m.group(1) not in DEFAULT_HOSTNAMES else port)
+    if used is not None:
+        base, i = name, 1
+        while name in used:
+            name = f"{base}-{port}" if i == 1 else f"{base}-{port}-{i}"; i += 1
+        used.add(name)
+    return name
+
+def run_consoles(ports, outdir, defaults, include_running, pace=None, store=None):
+    """Høst alle konsolporte samtidig med én tråd pr. port, så den samlede tid er den
+    langsomste enheds tid. Returnerer samme resultatliste som run_fleet."""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    progress = make_progress(); results = []; n = len(ports); used = set()
+
+    def harvest(row, task):
+        def status(msg): progress.update(task, description=f"{row['com']}: {msg}")
+        t0 = time.perf_counter()
+        cfgs = read_console(row["com"], int(row.get("baud") or defaults["baud"]),
+                            row.get("user") or defaults["user"], row.get("password") or defaults["password"],
+                            row.get("enable") or defaults["enable"], include_running, pace, status)
+        return cfgs, time.perf_counter() - t0
+
+    with progress, ThreadPoolExecutor(max_workers=max(1, n)) as ex:
+        futs = {}
+        for row in ports:
+            task = progress.add_task(f"{row['com']}: venter", total=None)
+            futs[ex.submit(harvest, row, task)] = (row, task)
+        for i, fut in enumerate(as_completed(futs), 1):
+            row, task = futs[fut]
+            try:
+                cfgs, sec = fut.result()
+                name = console_name(row, cfgs, used)
+                where = save_backup(name, cfgs, include_running, os.path.join(outdir, row.get("file") or f"{name}.txt"), store)
+                results.append((f"{row['com']} ({name})", True, sec, 1))
+                progress.update(task, description=f"{row['com']}: OK -> {where} {sec:.1f}s", completed=1)
+                if isinstance(progress, _NoProgress): print(f"[{i}/{n}] OK   {row['com']} -> {where}  {sec:.1f}s")
+            except Exception as e:
+                results.append((row["com"], False, None, str(e) or type(e).__name__))
+                progress.update(task, description=f"{row['com']}: FEJL {e}", completed=1)
+                if isinstance(progress, _NoProgress): print(f"[{i}/{n}] FEJL {row['com']}: {e}", file=sys.stderr)
+    return results
+
+def finish_timings(show_summary):
+    if show_summary: phasetimer.summary()
+    phasetimer.close()
+
+def open_store(path):
+    if not path: return None
+    try: return BackupStore(path)
+    except (OSError, BackupStoreError) as e:
+        print(f"ERROR: kan ikke åbne backup-repo: {e}", file=sys.stderr); sys.exit(2)
 
 def main():
     ap = argparse.ArgumentParser(prog="Getconf", description="Hent startup (og evt. running) via SSH (NAPALM) eller COM.")
@@ -79,29 +298,88 @@ def main():
     ap.add_argument("--com", help="COM-port (fx COM3)")
     ap.add_argument("-b","--baud", type=int, default=9600)
     ap.add_argument("-u","--user")
-    ap.add_argument("-p","--pass")
+    ap.add_argument("-p","--pass", dest="password")
     ap.add_argument("-e","--enable", help="Enable secret ved COM (SSH håndteres af NAPALM auto-privilege)")
-    ap.add_argument("-f","--file", required=True)
-    ap.add_argument("--pace", type=float, default=0.15, help="Delay pr. step på COM")
+    ap.add_argument("-f","--file", help="Outputfil (enkelt enhed)")
+    ap.add_argument("--com-list", metavar="FIL", help="CSV/JSON/tekst med konsolporte (com, baud, user, password, enable, name, file) der høstes parallelt")
+    ap.add_argument("--store", metavar="REPO", help="Gem i et dedupliceret backup-repo i stedet for tekstfiler (se backupstore.py)")
+    ap.add_argument("--timings", metavar="FIL", help="Skriv tid pr. fase pr. enhed som JSON-linjer ('-' = stderr)")
+    ap.add_argument("--timing-summary", action="store_true", help="Vis histogram over faser og de langsomste enheder til sidst")
+    ap.add_argument("--pace", type=float, default=None, help="Fast minimumspause pr. step på COM (default: adaptiv ud fra målt ekko-latency)")
+    ap.add_argument("--cache-dir", default=CACHE_DIR, help=f"Opdatér Setconf's no-op-cache med running-configs hentet over SSH med -c (default: {CACHE_DIR})")
+    ap.add_argument("--no-cache", action="store_true", help="Opdatér ikke Setconf's no-op-cache")
+    fl = ap.add_argument_group("flåde-mode (SSH)")
+    fl.add_argument("-i","--inventory", help="CSV/JSON/tekst med hosts (host, user, password, port, file)")
+    fl.add_argument("-o","--outdir", default="backups", help="Output-mappe til flåde-/konsol-mode (default: backups)")
+    fl.add_argument("-j","--jobs", type=int, default=10, help="Max samtidige forbindelser (default 10)")
+    fl.add_argument("--connect-timeout", type=float, default=10, help="Connect-timeout pr. enhed i sek. (default 10)")
+    fl.add_argument("--read-timeout", type=float, default=60, help="Read-timeout pr. enhed i sek. (default 60)")
+    fl.add_argument("--retries", type=int, default=2, help="Antal genforsøg pr. enhed (default 2)")
+    fl.add_argument("--backoff", type=float, default=2.0, help="Første backoff i sek.; fordobles pr. forsøg (default 2)")
     args = ap.parse_args()
+    if args.timings or args.timing_summary:
+        phasetimer.enable(args.timings)
+        atexit.register(finish_timings, args.timing_summary)
+    cache = RunningCache(args.cache_dir) if args.c and not args.no_cache else None
+
+    if args.inventory:
+        try: devices = load_inventory(args.inventory)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: kan ikke læse inventory: {e}", file=sys.stderr); sys.exit(2)
+        if not all(d.get("host") for d in devices):
+            print("ERROR: alle inventory-rækker skal have 'host'", file=sys.stderr); sys.exit(2)
+        if not args.user and not all(d.get("user") for d in devices): args.user = input("SSH username: ").strip()
+        if args.password is None and not all(d.get("password") for d in devices):
+            args.password = getpass.getpass("SSH password: ")
+        defaults = {"user": args.user, "password": args.password, "port": args.port}
+        t0 = time.perf_counter()
+        store = open_store(args.store)
+        try:
+            results = run_fleet(devices, args.outdir, defaults, args.c, args.jobs, args.connect_timeout,
+                                args.read_timeout, args.retries, args.backoff, store, cache)
+        finally:
+            if store is not None: store.close()
+        print_fleet_summary(results, time.perf_counter() - t0)
+        sys.exit(0 if all(r[1] for r in results) else 1)
+
+    if args.com_list:
+        try: ports = load_inventory(args.com_list)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: kan ikke læse portliste: {e}", file=sys.stderr); sys.exit(2)
+        for row in ports: row["com"] = row.get("com") or row.get("host")
+        if not all(row["com"] for row in ports):
+            print("ERROR: alle rækker i portlisten skal have 'com'", file=sys.stderr); sys.exit(2)
+        defaults = {"baud": args.baud, "user": args.user, "password": args.password, "enable": args.enable}
+        t0 = time.perf_counter()
+        store = open_store(args.store)
+        try:
+            results = run_consoles(ports, args.outdir, defaults, args.c, args.pace, store)
+        finally:
+            if store is not None: store.close()
+        print_fleet_summary(results, time.perf_counter() - t0)
+        sys.exit(0 if all(r[1] for r in results) else 1)
 
     if not args.ssh and not args.com:
-        print("ERROR: angiv --ssh eller --com", file=sys.stderr); sys.exit(2)
+        print("ERROR: angiv --ssh, --com, --inventory eller --com-list", file=sys.stderr); sys.exit(2)
+    if not args.file and not args.store:
+        print("ERROR: angiv -f/--file eller --store", file=sys.stderr); sys.exit(2)
+    store = open_store(args.store)
 
     if args.ssh:
         if not args.user: args.user = input("SSH username: ").strip()
-        if args.pass is None: args.pass = getpass.getpass("SSH password: ")
+        if args.password is None: args.password = getpass.getpass("SSH password: ")
         optional_args = {"port": args.port}
-        progress = Progress(SpinnerColumn(), TextColumn("{task.description}"))
-        text = getconf_ssh(args.ssh, args.user, args.pass, optional_args, args.c, progress)
+        progress = make_progress()
+        cfgs = getconf_ssh(args.ssh, args.user, args.password, optional_args, args.c, progress, cache)
     else:
-        pw = args.pass if args.pass is not None else (getpass.getpass("Console password (blank hvis ingen): ") or None)
+        pw = args.password if args.password is not None else (getpass.getpass("Console password (blank hvis ingen): ") or None)
         en = args.enable if args.enable is not None else (getpass.getpass("Enable secret (blank hvis ingen): ") or None)
-        progress = Progress(SpinnerColumn(), TextColumn("{task.description}"))
-        text = getconf_serial(args.com, args.baud, args.user, pw, en, args.c, args.pace, progress)
+        progress = make_progress()
+        cfgs = getconf_serial(args.com, args.baud, args.user, pw, en, args.c, args.pace, progress)
 
-    write_file(args.file, text)
-    print(f"OK: gemt -> {args.file}")
+    where = save_backup(args.ssh or args.com, cfgs, args.c, args.file, store)
+    if store is not None: store.close()
+    print(f"OK: gemt -> {where}")
 
 if __name__ == "__main__":
     import time
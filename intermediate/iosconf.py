@@ -0,0 +1,613 @@
+#!/usr/bin/env python3
+# iosconf.py - parser til Cisco IOS-configs (backups fra getconf.py og baselines fra newconfdesign.py).
+# Configgen bliver til et træ af blokke efter indrykning, og et index pr. host (sektionstype -> nøgle
+# -> linjer) caches i en lokal fil, så forespørgsler over tusindvis af backups kun genparser filer
+# hvis hash har ændret sig. Samme index bruges af den lokale, hierarkiske diff (diff_configs).
+import argparse, difflib, hashlib, json, os, re, sys
+from collections import Counter
+from functools import lru_cache
+
+from backupstore import BackupStore, BackupStoreError, parse_backup_text
+
+INDEX_FILE = ".confindex.json"
+INDEX_VERSION = 3          # bump når summarize() ændrer format
+
+# Linjer der ikke er config (show-output, prompt, exec-kommandoer fra baselines)
+NOISE_RE = re.compile(r"^(Building configuration|Current configuration|Last configuration change|"
+                      r"NVRAM config last updated|end$|exit$|do |show |[\w.\-]+(\([\w.\-]+\))?[#>])")
+BANNER_RE = re.compile(r"^banner \S+ (\^C|\S)")
+
+class Block:
+    """Én config-linje og dens underlinjer (indrykket mere end linjen selv)."""
+    __slots__ = ("line", "children")
+    def __init__(self, line, children=None):
+        self.line = line; self.children = children if children is not None else []
+    def __repr__(self): return f"Block({self.line!r}, {len(self.children)} børn)"
+
+def parse(text):
+    """Parse en IOS-config til et træ. Returnerer rod-blokken (line=None)."""
+    root = Block(None); stack = [(-1, root)]
+    lines = iter(text.splitlines())
+    for raw in lines:
+        s = raw.rstrip()
+        body = s.lstrip(); indent = len(s) - len(body)
+        if not body or body.startswith("!") or body.startswith("---") or NOISE_RE.match(body):
+            continue
+        while stack[-1][0] >= indent: stack.pop()
+        blk = Block(body); stack[-1][1].children.append(blk)
+        m = BANNER_RE.match(body) if indent == 0 else None
+        if m:
+            # banner-teksten er ikke indrykket; læs rå linjer til afslutnings-tegnet
+            delim = m.group(1); rest = body[m.end():]
+            if delim not in rest:
+                for raw in lines:
+                    if delim in raw:
+                        head = raw.split(delim, 1)[0].rstrip()
+                        if head: blk.children.append(Block(head))
+                        break
+                    blk.children.append(Block(raw.rstrip()))
+            continue
+        stack.append((indent, blk))
+    return root
+
+# ---------- interface-navne ----------
+IFACE_TYPES = ("GigabitEthernet", "FastEthernet", "TenGigabitEthernet", "TwoGigabitEthernet", "TwentyFiveGigE",
+               "FortyGigabitEthernet", "HundredGigE", "Port-channel", "Vlan", "Loopback", "Tunnel",
+               "Ethernet", "AppGigabitEthernet")
+_IFACE_RE = re.compile(r"^([A-Za-z][A-Za-z\-]*)\s*(\d\S*)$")
+
+def normalize_iface(name):
+    """'Gi1/0/24', 'gi 1/0/24' -> 'GigabitEthernet1/0/24' (ukendte navne returneres uændret)."""
+    m = _IFACE_RE.match(name.strip())
+    if not m: return name.strip()
+    typ, num = m.groups(); low = typ.lower()
+    for full in IFACE_TYPES:
+        if full.lower().startswith(low): return full + num
+    return typ + num
+
+def expand_range(spec):
+    """'GigabitEthernet1/0/1 - 3, Gi2/0/5' -> ['GigabitEthernet1/0/1', ..., 'GigabitEthernet2/0/5']."""
+    out = []; prefix = ""
+    for item in spec.split(","):
+        m = re.match(r"^\s*(.*?)(\d+)\s*(?:-\s*(\d+))?\s*$", item)
+        if not m: continue
+        pre, a, b = m.groups()
+        if not re.search(r"[A-Za-z]", pre): pre = re.sub(r"[\d/]*$", "", prefix) + pre
+        prefix = pre
+        for n in range(int(a), int(b or a) + 1): out.append(normalize_iface(f"{pre}{n}"))
+    return out
+
+# ---------- sektioner ----------
+def section_key(line):
+    """Sektionstype og nøgle for en top-level linje med underlinjer."""
+    word, _, rest = line.partition(" ")
+    if word == "interface":
+        if rest.startswith("range "): return "interface-range", rest[6:].strip()
+        return "interface", normalize_iface(rest)
+    if BANNER_RE.match(line): return "banner", rest.split()[0]    # afgrænsningstegnet er ikke en del af nøglen
+    return word, rest.strip()
+
+def banner_key(line): return "banner " + line.split()[1]
+
+def banner_body(blk):
+    """Bannerteksten som linjer uden afgrænsningstegn, så 'banner login ^' fra en baseline og
+    'banner login ^C' fra running-config med samme tekst er ens."""
+    m = BANNER_RE.match(blk.line); first = blk.line[m.end():].split(m.group(1), 1)[0].rstrip()
+    return ([first] if first else []) + [c.line for c in blk.children]
+
+def flat_lines(blk, prefix=""):
+    """Alle underlinjer i en blok; dybere niveauer som 'forælder > barn'."""
+    out = []
+    for c in blk.children:
+        out.append(prefix + c.line)
+        if c.children: out.extend(flat_lines(c, prefix + c.line + " > "))
+    return out
+
+def sections(root):
+    """{type: {nøgle: [linjer]}} med interface-ranges foldet ud til enkelte interfaces."""
+    secs = {}
+    for blk in root.children:
+        banner = BANNER_RE.match(blk.line)
+        if not (blk.children or banner): continue
+        typ, key = section_key(blk.line)
+        lines = banner_body(blk) if banner else flat_lines(blk)
+        if typ == "interface-range":
+            for name in expand_range(key):
+                secs.setdefault("interface", {}).setdefault(name, []).extend(lines)
+        else:
+            secs.setdefault(typ, {}).setdefault(key, []).extend(lines)
+    return secs
+
+def summarize(text):
+    """Det der gemmes i indexet for én config."""
+    root = parse(text)
+    top = [b.line for b in root.children]
+    host = next((l.split(None, 1)[1] for l in top if l.startswith("hostname ") and " " in l), None)
+    return {"hostname": host, "top": top, "globals": [b.line for b in root.children if not (b.children or BANNER_RE.match(b.line))],
+            "sections": sections(root)}
+
+# ---------- sammenfletning af snippets ----------
+# Rækkefølge i en flettet candidate: globale linjer, VLANs og andre definitioner før de interfaces
+# der bruger dem, routing/line efter, banners til sidst
+SECTION_RANK = {"vlan": 1, "interface": 3, "router": 4, "line": 4, "banner": 5}
+
+class MergeConflict(ValueError):
+    """To snippets er uenige om samme linje (X og 'no X', eller to værdier for en kommando med én
+    værdi som 'switchport access vlan' eller 'description', i samme sektion)."""
+
+def _top_blocks(blocks):
+    """Interface-navne normaliseret (Gi1/0/5 = GigabitEthernet1/0/5) og ranges foldet ud."""
+    for blk in blocks:
+        typ, key = section_key(blk.line) if blk.line.startswith("interface ") else (None, None)
+        if typ == "interface": yield Block("interface " + key, blk.children)
+        elif typ == "interface-range": yield from (Block("interface " + n, blk.children) for n in expand_range(key))
+        else: yield blk
+
+def _merge_children(into, blocks, where, src=None, origin=None):
+    # origin: (sektion, kommando med én værdi) -> (linje, snippet) på tværs af snippets
+    by_line = {b.line: b for b in into.children}
+    if into.line is None: blocks = _top_blocks(blocks)
+    for blk in blocks:
+        if BANNER_RE.match(blk.line) and into.line is None:
+            # banner-tekst er rå og ordnet: den sidste snippet vinder (samme type, uanset afgrænsningstegn)
+            cur = next((c for c in into.children if BANNER_RE.match(c.line) and banner_key(c.line) == banner_key(blk.line)), None)
+            if cur is None: into.children.append(Block(blk.line, list(blk.children)))
+            else: cur.line = blk.line; cur.children = list(blk.children)
+            continue
+        neg = blk.line[3:] if blk.line.startswith("no ") else "no " + blk.line
+        if neg in by_line:
+            raise MergeConflict(f"{where or 'globalt'}: både '{neg}' og '{blk.line}'")
+        setting = _setting(blk.line) if origin is not None and not blk.line.endswith(" secondary") else None
+        if setting:
+            prev = origin.setdefault((id(into), setting), (blk.line, src))
+            if prev[0] != blk.line and prev[1] != src:
+                raise MergeConflict(f"{where or 'globalt'}: '{prev[0]}' ({prev[1]}) og '{blk.line}' ({src})")
+            origin[(id(into), setting)] = (blk.line, src)
+        cur = by_line.get(blk.line)
+        if cur is None:
+            cur = by_line[blk.line] = Block(blk.line); into.children.append(cur)
+        _merge_children(cur, blk.children, blk.line if into.line is None else where, src, origin)
+
+def merge_snippets(texts, names=None):
+    """Flet flere config-snippets til ét træ: sektioner med samme top-linje slås sammen,
+    dubletter fjernes, og sektionerne sorteres så definitioner kommer før brug. Sætter to snippets
+    samme kommando med én værdi (SINGLE_RE) til forskellige værdier, er det en MergeConflict med
+    begge snippets' navne (`names`, ellers 'snippet N') – resultatet må ikke afhænge af filrækkefølgen."""
+    root = Block(None); origin = {}
+    names = names or [f"snippet {i}" for i in range(1, len(texts) + 1)]
+    for text, name in zip(texts, names): _merge_children(root, parse(text).children, None, name, origin)
+    root.children = _ordered(root.children)
+    return root
+
+def _ordered(blocks):
+    def rank(ib):
+        i, b = ib
+        if not b.children and not BANNER_RE.match(b.line): return (0, i)
+        typ, key = section_key(b.line)
+        r = SECTION_RANK.get(typ, 2)
+        return (r, _natural(key), i) if typ in ("interface", "vlan") else (r, i)
+    return [b for _, b in sorted(enumerate(blocks), key=rank)]
+
+def render(root):
+    """Træ -> IOS-tekst med ét mellemrum pr. niveau og '!' mellem sektioner."""
+    out = []
+    def emit(blk, depth):
+        out.append(" " * depth + blk.line)
+        m = BANNER_RE.match(blk.line) if depth == 0 else None
+        if m:
+            out.extend(c.line for c in blk.children)
+            if m.group(1) not in blk.line[m.end():]: out.append(m.group(1))
+            return
+        for c in blk.children: emit(c, depth + 1)
+    for blk in root.children:
+        emit(blk, 0)
+        if blk.children: out.append("!")
+    return "\n".join(out) + "\n"
+
+# ---------- spørgsmål ----------
+def parse_vlan_list(v):
+    """'10,20-22' -> {10, 20, 21, 22}; 'all' -> None (= alle)."""
+    if v.strip() in ("all", ""): return None
+    out = set()
+    for part in v.split(","):
+        a, _, b = part.strip().partition("-")
+        if a.isdigit(): out.update(range(int(a), int(b or a) + 1))
+    return out
+
+def port_in_vlan(lines, vid):
+    """Er porten (interface-linjerne) medlem af VLAN `vid`? Trunk: allowed-listen, ellers access/voice."""
+    mode = "access"; access = 1; voice = None; allowed = None; have_allowed = False
+    for l in lines:
+        if l.startswith("switchport mode "): mode = l.split()[-1]
+        elif l.startswith("switchport access vlan ") and l.split()[-1].isdigit(): access = int(l.split()[-1])
+        elif l.startswith("switchport voice vlan ") and l.split()[-1].isdigit(): voice = int(l.split()[-1])
+        elif l.startswith("switchport trunk allowed vlan "):
+            arg = l[len("switchport trunk allowed vlan "):]
+            if arg.startswith("add "):
+                allowed = (allowed or set()) | (parse_vlan_list(arg[4:]) or set())
+            elif arg.startswith("remove "):
+                allowed = (allowed if allowed is not None else set(range(1, 4095))) - (parse_vlan_list(arg[7:]) or set())
+            elif arg.strip() == "none":
+                allowed = set()
+            else:
+                allowed = parse_vlan_list(arg)
+            have_allowed = True
+    if mode == "trunk": return not have_allowed or allowed is None or vid in allowed
+    return vid == access or vid == voice
+
+def has_line(lines, cmd):
+    return any(l == cmd or l.startswith(cmd + " ") for l in lines)
+
+class ConfIndex:
+    """Cache af summarize() pr. kilde (fil eller host i et backup-repo) i en JSON-fil.
+    En kilde genparses kun hvis dens hash har ændret sig (filer tjekkes først på mtime+størrelse)."""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.entries = {}; self.seen = set(); self.stats = {"parsed": 0, "cached": 0}
+        self._dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f: data = json.load(f)
+            if data.get("version") == INDEX_VERSION: self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            pass
+
+    def _use(self, src, digest, text_fn, sig=None, host=None):
+        ent = self.entries.get(src)
+        if ent is None or ent["hash"] != digest:
+            summ = summarize(text_fn())
+            ent = {"hash": digest, "host": host or summ["hostname"] or src, "summary": summ}
+            self.entries[src] = ent; self.stats["parsed"] += 1; self._dirty = True
+        else:
+            self.stats["cached"] += 1
+        if sig is not None and ent.get("sig") != sig: ent["sig"] = sig; self._dirty = True
+        self.seen.add(src)
+        return src
+
+    def add_file(self, path, kind="running"):
+        """Indexér en fil; returnerer kilde-nøglen."""
+        path = os.path.abspath(path); st = os.stat(path); sig = [st.st_mtime_ns, st.st_size]
+        src = f"{path}#{kind}"
+        ent = self.entries.get(src)
+        if ent is not None and ent.get("sig") == sig:
+            self.seen.add(src); self.stats["cached"] += 1; return src
+        with open(path, "rb") as f: raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        stem = os.path.splitext(os.path.basename(path))[0]
+        host = stem[:-9] if stem.endswith("-baseline") else None
+        return self._use(src, digest, lambda: config_text(raw.decode("utf-8", errors="replace"), kind), sig, host)
+
+    def add_repo(self, repo, kind="running", version=None, hosts=None):
+        """Nyeste (eller `version`) af hver host i et backupstore-repo (hash = objektets SHA)."""
+        store = BackupStore(repo); srcs = []
+        for host in hosts or store.hosts():
+            rec = store.head(host) if version is None else store.get(host, version)[0]
+            sha = (rec or {}).get(kind) or (rec or {}).get("startup")
+            if sha: srcs.append(self._use(f"repo:{os.path.abspath(repo)}:{host}#{sha}", sha, lambda: store.text(sha), host=host))
+        return srcs
+
+    def add_paths(self, paths, kind="running"):
+        srcs = []
+        for p in paths:
+            if os.path.isdir(p):
+                for dirpath, _, files in os.walk(p):
+                    for fn in sorted(files):
+                        if fn.endswith((".txt", ".cfg", ".conf")) and not fn.startswith("."):
+                            srcs.append(self.add_file(os.path.join(dirpath, fn), kind))
+            else:
+                srcs.append(self.add_file(p, kind))
+        return srcs
+
+    def summary(self, src): return self.entries[src]["host"], self.entries[src]["summary"]
+
+    def save(self):
+        """Gem de kilder der er set i denne kørsel plus filer der stadig findes
+        (repo-versioner der ikke længere bruges droppes)."""
+        keep = {k: v for k, v in self.entries.items()
+                if k in self.seen or (not k.startswith("repo:") and os.path.exists(k.rpartition("#")[0]))}
+        if not self._dirty and len(keep) == len(self.entries): return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump({"version": INDEX_VERSION, "entries": keep}, f)
+        os.replace(tmp, self.path)
+
+    def hosts(self):
+        for src in sorted(self.seen, key=lambda s: self.entries[s]["host"]):
+            ent = self.entries[src]; yield ent["host"], ent["summary"]
+
+    # forespørgsler -> liste af hostnavne
+    def port_in_vlan(self, iface, vid):
+        iface = normalize_iface(iface)
+        return [h for h, s in self.hosts() if iface in s["sections"].get("interface", {})
+                and port_in_vlan(s["sections"]["interface"][iface], vid)]
+
+    def has(self, cmd):
+        return [h for h, s in self.hosts() if has_line(s["top"], cmd)]
+
+    def missing(self, cmd):
+        return [h for h, s in self.hosts() if not has_line(s["top"], cmd)]
+
+    def with_section(self, typ, key=None):
+        if typ == "interface" and key: key = normalize_iface(key)
+        return [h for h, s in self.hosts() if typ in s["sections"] and (key is None or key in s["sections"][typ])]
+
+# ---------- semantisk diff ----------
+# Sektioner hvor rækkefølgen betyder noget; alle andre sammenlignes som mængder af linjer.
+ORDERED_SECTIONS = {"ip", "ipv6", "route-map", "banner", "policy-map", "class-map", "mac"}
+# Linjer IOS ikke viser i running-config (defaults) eller som kun er exec-kommandoer i baselines
+IGNORE_RE = re.compile(r"^(no shutdown|no shut|switchport access vlan 1|crypto key generate .*)$")
+CANON = [(re.compile(r"\b(secret|password) [0-9] \S+"), r"\1 <skjult>"),      # krypteret form varierer
+         (re.compile(r"^(no )?shut$"), r"\1shutdown")]
+
+@lru_cache(maxsize=1 << 16)
+def canon(line):
+    """Normalisér en linje til sammenligning; None = ignorér."""
+    if IGNORE_RE.match(line): return None
+    for rx, rep in CANON: line = rx.sub(rep, line)
+    return line
+
+def _canon_all(lines): return [c for c in map(canon, lines) if c is not None]
+
+def _compare(a, b, ordered):
+    """(tilføjet, fjernet) mellem to linjelister."""
+    if ordered:
+        add, rem = [], []
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+            if tag != "equal": rem += a[i1:i2]; add += b[j1:j2]
+        return add, rem
+    ca, cb = Counter(a), Counter(b)
+    return list((cb - ca).elements()), list((ca - cb).elements())
+
+def _acl_groups(lines):
+    """Globale linjer delt i nummererede ACL'er (rækkefølge betyder noget) og resten."""
+    acls = {}; rest = []
+    for l in lines:
+        if l.startswith("access-list "): acls.setdefault(l.split()[1], []).append(l)
+        else: rest.append(l)
+    return acls, rest
+
+def diff_configs(a, b):
+    """Hierarkisk diff mellem to summaries (fra summarize/ConfIndex): sektion for sektion og
+    rækkefølge-uafhængigt hvor IOS tillader det. '+' = findes kun i b, '-' = kun i a.
+    Returnerer liste af {"section", "status", "add", "remove"} (section=None for globale linjer)."""
+    out = []
+    acl_a, glob_a = _acl_groups(_canon_all(a["globals"]))
+    acl_b, glob_b = _acl_groups(_canon_all(b["globals"]))
+    add, rem = _compare(glob_a, glob_b, False)
+    for num in sorted(set(acl_a) | set(acl_b)):
+        x, y = _compare(acl_a.get(num, []), acl_b.get(num, []), True); add += x; rem += y
+    if add or rem: out.append({"section": None, "status": "changed", "add": add, "remove": rem})
+    sa, sb = a["sections"], b["sections"]
+    for typ in sorted(set(sa) | set(sb)):
+        da, db = sa.get(typ, {}), sb.get(typ, {})
+        for key in sorted(set(da) | set(db), key=_natural):
+            name = f"{typ} {key}".strip()
+            ra, rb = da.get(key), db.get(key)
+            if ra == rb: continue
+            la, lb = _canon_all(ra or []), _canon_all(rb or [])
+            if key not in da:
+                out.append({"section": name, "status": "added", "add": lb, "remove": []})
+            elif key not in db:
+                out.append({"section": name, "status": "removed", "add": [], "remove": la})
+            else:
+                add, rem = _compare(la, lb, typ in ORDERED_SECTIONS)
+                if add or rem: out.append({"section": name, "status": "changed", "add": add, "remove": rem})
+    return out
+
+def _natural(key): return [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", key)]
+
+# ---------- minimal delta (patch til merge) ----------
+# Kommandoer med én værdi: den nye værdi overskriver den gamle, så der skal ikke 'no' først
+SINGLE_RE = re.compile(r"^(hostname|ip domain[- ]name|ip default-gateway|description|name|ip address|"
+                       r"switchport (?:access vlan|voice vlan|mode|trunk native vlan)|spanning-tree mode|"
+                       r"snmp-server (?:location|contact|community \S+)|clock timezone|enable (?:secret|password)|"
+                       r"username \S+|logging buffered|ip ssh version|speed|duplex)\b")
+# Linjer med secrets sammenlignes ordret (canon maskerer dem); en type 0-secret pushes derfor altid
+SECRET_RE = re.compile(r"\b(secret|password|key)\b")
+VIRTUAL_IFACES = ("Vlan", "Loopback", "Tunnel", "Port-channel")   # kan slettes; fysiske porte nulstilles
+# Ordnede lister hvor en ændring kun kan laves ved at slette og genskabe hele sektionen. Andre
+# sektioner (ip vrf, policy-map, class-map …) ændres linje for linje: 'no ip vrf' fjerner VRF'en fra
+# alle interfaces, og 'no policy-map' afvises mens den er sat på med service-policy.
+RECREATE_RE = re.compile(r"^(ip access-list|ipv6 access-list|mac access-list|route-map) ")
+# Linjer IOS selv skriver i running-config og som ikke kan (eller ikke bør) konfigureres væk
+BOILERPLATE_RE = re.compile(r"^(version |boot-start-marker|boot-end-marker|boot system |system mtu |"
+                            r"spanning-tree extend system-id|vlan internal allocation policy|switch \d+ provision |"
+                            r"license |diagnostic bootup |redundancy$|memory free |crypto pki |certificate )")
+
+def _dkey(line): return line if SECRET_RE.search(line) else canon(line)
+
+def _setting(line):
+    m = SINGLE_RE.match(line)
+    return m.group(0) if m else None
+
+def _no_form(line): return "no " + (_setting(line) or line)
+
+def _family(line):
+    """Kommando-familien for en global linje ('ntp server', 'logging host'): de to første ord af den
+    positive form. Uden --prune fjernes kun globale linjer fra familier den ønskede config nævner."""
+    return " ".join((line[3:] if line.startswith("no ") else line).split()[:2])
+
+def _same(a, b):
+    return [_dkey(l) for l in flat_lines(a)] == [_dkey(l) for l in flat_lines(b)]
+
+def _remove(blk, top):
+    if top and BANNER_RE.match(blk.line): return Block("no " + banner_key(blk.line))
+    typ, key = section_key(blk.line) if top else (None, None)
+    if typ == "interface":
+        # fysiske porte kan ikke slettes; en port uden underlinjer er allerede i default
+        if key.startswith(VIRTUAL_IFACES) and key != "Vlan1": return Block("no interface " + key)
+        return Block("default interface " + key) if blk.children else None
+    if not (top and blk.children): return Block(_no_form(blk.line))
+    if typ == "line": return None                      # line con/vty findes altid
+    return Block("no " + blk.line)
+
+def _acl_split(blocks):
+    acls = {}; rest = []
+    for b in blocks:
+        if b.line.startswith("access-list ") and not b.children: acls.setdefault(b.line.split()[1], []).append(b)
+        else: rest.append(b)
+    return acls, rest
+
+def _delta(have, want, top=False, prune=False):
+    """Blokke der gør søskendelisten `have` til `want`: fjernelser først (som 'no'/'default'),
+    derefter nye/ændrede blokke; ændrede sektioner rekursivt med kun de ændrede underlinjer.
+    'no'-linjer fjernes aldrig (det ville slå defaults til). På top-niveau fjernes uden `prune` kun
+    globale linjer fra familier `want` nævner; sektioner der ikke findes i `want` røres ikke."""
+    out = []
+    if top:
+        have = [b for b in have if not BOILERPLATE_RE.match(b.line)]
+        want = [b for b in want if not BOILERPLATE_RE.match(b.line)]
+        # nummererede ACL'er er ordnede: ved ændring slettes og genskabes hele listen
+        acl_h, have = _acl_split(have); acl_w, want = _acl_split(want)
+        for num in sorted(set(acl_h) | set(acl_w) if prune else set(acl_w), key=_natural):
+            h, w = acl_h.get(num, []), acl_w.get(num, [])
+            if [_dkey(b.line) for b in h] != [_dkey(b.line) for b in w]:
+                if h: out.append(Block(f"no access-list {num}"))
+                out += w
+    key = (lambda l: banner_key(l) if BANNER_RE.match(l) else _dkey(l)) if top else _dkey
+    hk = {}; wk = {}
+    for b in have: hk.setdefault(key(b.line), b)
+    for b in want: wk.setdefault(key(b.line), b)
+    hk.pop(None, None); wk.pop(None, None)
+    replaced = {_setting(b.line) for k, b in wk.items() if k not in hk} - {None}
+    families = {_family(b.line) for b in want if not b.children} if top and not prune else None
+    for k, b in hk.items():
+        if k in wk or b.line.startswith("no ") or _setting(b.line) in replaced or _dkey(_no_form(b.line)) in wk: continue
+        if families is not None and (b.children or _family(b.line) not in families): continue
+        rm = _remove(b, top)
+        if rm is not None: out.append(rm)
+    for k, b in wk.items():
+        cur = hk.get(k)
+        if cur is None: out.append(b); continue
+        if top and BANNER_RE.match(b.line):
+            if banner_body(cur) != banner_body(b): out.append(b)
+            continue
+        if not (cur.children or b.children) or _same(cur, b): continue
+        if top and RECREATE_RE.match(b.line):
+            out += [Block("no " + b.line), b]
+        else:
+            sub = _delta(cur.children, b.children)
+            if sub: out.append(Block(b.line, sub))
+    return out
+
+def delta_patch(running, intended, prune=False):
+    """Minimal, ordnet patch (tekst) der via merge gør `running` til `intended`; '' = ingen ændring.
+    Fjernede linjer bliver til 'no'-former og kun ændrede sektioner kommer med. `intended` må være
+    et udsnit: sektioner den ikke nævner røres ikke, og globale linjer fjernes kun i de familier den
+    nævner. Med `prune` er `intended` hele configen, og alt andet fjernes (interfaces nulstilles
+    med 'default interface'); boilerplate som version og boot-markers røres aldrig."""
+    have, want = Block(None), Block(None)
+    _merge_children(have, parse(running).children, None)
+    _merge_children(want, parse(intended).children, None)
+    patch = Block(None, _ordered(_delta(have.children, want.children, top=True, prune=prune)))
+    return render(patch) if patch.children else ""
+
+def format_diff(changes):
+    out = []
+    for c in changes:
+        mark = {"added": "+ ", "removed": "- ", "changed": "  "}[c["status"]]
+        out.append(mark + (c["section"] or "(globalt)"))
+        out += [f"  - {l}" for l in c["remove"]] + [f"  + {l}" for l in c["add"]]
+    return "\n".join(out)
+
+def config_text(text, kind="running"):
+    """Vælg running- eller startup-delen af en getconf-fil (fil uden headers returneres uændret)."""
+    if "--- STARTUP (" not in text and "--- RUNNING (" not in text: return text
+    cfgs, _ = parse_backup_text(text)
+    return cfgs.get(kind) or cfgs.get("startup") or ""
+
+def query_main(args, idx):
+    idx.add_paths(args.sources, args.kind)
+    for r in args.repo: idx.add_repo(r, args.kind)
+    if args.vlan:
+        if not args.vlan[1].isdigit():
+            print("ERROR: VLAN skal være et tal", file=sys.stderr); sys.exit(2)
+        hits = idx.port_in_vlan(args.vlan[0], int(args.vlan[1]))
+    elif args.has: hits = idx.has(args.has)
+    elif args.missing: hits = idx.missing(args.missing)
+    else: hits = idx.with_section(args.section[0], " ".join(args.section[1:]) or None)
+    if args.json: print(json.dumps(hits, ensure_ascii=False))
+    else:
+        for h in hits: print(h)
+    print(f"{len(hits)} af {len(idx.seen)} hosts  •  parset: {idx.stats['parsed']}  •  fra cache: {idx.stats['cached']}",
+          file=sys.stderr)
+    return 0
+
+def _repo_src(idx, repo, spec, kind):
+    host, _, ver = spec.partition("@")
+    return idx.add_repo(repo, kind, int(ver) if ver else None, [host])[0]
+
+def diff_main(args, idx):
+    """Returnerer exit-kode: 0 = ens, 1 = forskelle."""
+    if args.baselines:
+        # flåde: <host>-baseline.cfg mod backup for samme host (filer eller repo)
+        base = {idx.summary(s)[0]: s for s in idx.add_paths([args.baselines], args.kind)}
+        if args.repo: cur = {idx.summary(s)[0]: s for s in idx.add_repo(args.repo, args.kind)}
+        else: cur = {idx.summary(s)[0]: s for s in idx.add_paths(args.a or [], args.kind)}
+        result = {}
+        for host in sorted(base, key=_natural):
+            if host not in cur: result[host] = None; continue
+            result[host] = diff_configs(idx.summary(base[host])[1], idx.summary(cur[host])[1])
+        if args.json: print(json.dumps(result, ensure_ascii=False, indent=1))
+        else:
+            for host, ch in result.items():
+                if ch is None: print(f"{host}: ingen backup")
+                elif not ch: print(f"{host}: som baseline")
+                else:
+                    print(f"{host}: {len(ch)} sektioner afviger (+{sum(len(c['add']) for c in ch)} -{sum(len(c['remove']) for c in ch)})")
+                    if args.verbose: print(format_diff(ch))
+        return 1 if any(ch != [] for ch in result.values()) else 0
+
+    if args.repo:
+        if len(args.a) == 1:
+            host, _, ver = args.a[0].partition("@"); n = int(ver) if ver else -1
+            specs = [f"{host}@{n - 1 if n != -1 else -2}", f"{host}@{n}"]
+        else: specs = args.a
+        sa, sb = (_repo_src(idx, args.repo, sp, args.kind) for sp in specs)
+    elif len(args.a) == 1:
+        sa, sb = idx.add_file(args.a[0], "startup"), idx.add_file(args.a[0], "running")
+    else:
+        sa, sb = idx.add_file(args.a[0], args.kind), idx.add_file(args.a[1], args.kind)
+    changes = diff_configs(idx.summary(sa)[1], idx.summary(sb)[1])
+    if args.json: print(json.dumps(changes, ensure_ascii=False, indent=1))
+    elif changes: print(format_diff(changes))
+    return 1 if changes else 0
+
+def main():
+    ap = argparse.ArgumentParser(prog="iosconf", description="Forespørgsler og lokal diff over IOS-configs (getconf-backups, baselines, backup-repo).")
+    ap.add_argument("--cache", default=INDEX_FILE, help=f"Index-cache (default: {INDEX_FILE})")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    q = sub.add_parser("query", help="Find hosts ud fra indhold")
+    q.add_argument("sources", nargs="*", help="Filer eller mapper (.txt/.cfg/.conf)")
+    q.add_argument("-r","--repo", action="append", default=[], help="backupstore-repo (nyeste version pr. host)")
+    qq = q.add_mutually_exclusive_group(required=True)
+    qq.add_argument("--vlan", nargs=2, metavar=("IFACE","VLAN"), help="Hosts hvor IFACE er medlem af VLAN (access, voice eller trunk)")
+    qq.add_argument("--has", metavar="CMD", help="Hosts med den globale kommando")
+    qq.add_argument("--missing", metavar="CMD", help="Hosts uden den globale kommando")
+    qq.add_argument("--section", nargs="+", metavar=("TYPE","KEY"), help="Hosts med sektionen (fx interface Gi1/0/24, vlan 30, line vty 0 4)")
+
+    d = sub.add_parser("diff", help="Hierarkisk diff: A B, én getconf-fil (startup mod running), repo-versioner eller baselines mod backups")
+    d.add_argument("a", nargs="*", help="To filer, én getconf-fil, eller med --repo: HOST[@N] [HOST@M]")
+    d.add_argument("-r","--repo", help="backupstore-repo")
+    d.add_argument("-B","--baselines", metavar="MAPPE", help="Diff alle <host>-baseline.cfg mod backups (filer/mapper i A eller --repo)")
+    d.add_argument("-v","--verbose", action="store_true", help="Vis linjerne for hver host i baseline-mode")
+    for p in (q, d):
+        p.add_argument("-k","--kind", choices=["running","startup"], default="running", help="Hvilken config i getconf-filer/repo (default: running)")
+        p.add_argument("--json", action="store_true", help="Output som JSON")
+    args = ap.parse_args()
+
+    if args.cmd == "query" and not args.sources and not args.repo:
+        print("ERROR: angiv filer/mapper eller --repo", file=sys.stderr); sys.exit(2)
+    if args.cmd == "diff" and not args.baselines and not (1 <= len(args.a) <= 2):
+        print("ERROR: diff kræver A [B], --repo HOST[@N] eller --baselines", file=sys.stderr); sys.exit(2)
+
+    idx = ConfIndex(args.cache)
+    try:
+        rc = query_main(args, idx) if args.cmd == "query" else diff_main(args, idx)
+    except (OSError, BackupStoreError) as e:
+        print(f"ERROR: {e}", file=sys.stderr); sys.exit(2)
+    idx.save()
+    sys.exit(rc)
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,17 @@
 # TUI config generator med frie (custom) VLANs – kun MGMT er tvunget.
 # Windows: pip install windows-curses
 
-import curses, json, os
+import curses, itertools, json, os, re, time
+from bisect import bisect_left
+from collections import OrderedDict
 from datetime import datetime, timezone
+from functools import lru_cache
+from urllib.parse import quote, unquote
 
 KEY_ENTER = [10, 13]
-PROFILE_FILE = "profiles.json"
+PROFILE_FILE = "profiles.json"   # gammelt format (én fil med alle profiler) – migreres til PROFILE_DIR
+PROFILE_DIR = "profiles.d"
+GENERATOR_VERSION = "3"   # bump når gen_config's output ændres (ugyldiggør batchconf --incremental)
 
 # ==================== TUI widgets ====================
 def center_text(win, y, text, attr=0):
@@ -17,34 +23,104 @@ def draw_box(win, title=None):
     win.box(); 
     if title: win.addstr(0, 2, f" {title} ")
 
-def menu(win, title, options, footer="↑↓ vælg  •  Enter ok  •  q tilbage", start_index=0):
-    curses.curs_set(0); idx = start_index
+KEY_BACKSPACE = (curses.KEY_BACKSPACE, 127, 8)
+
+class ListView:
+    """Liste med viewport: tegner kun de synlige rækker, og kun dem der har ændret sig siden
+    sidste tegning (ingen win.clear() pr. tast). '/' starter type-to-filter; filteret indsnævres
+    inkrementelt på det forrige resultat, og backspace går tilbage til det forrige resultat."""
+
+    def __init__(self, win, title, labels, footer, start_index=0, render=None):
+        self.win=win; self.title=title; self.labels=labels; self.footer=footer
+        self.render=render or (lambda i: labels[i])
+        self._low=[str(l).lower() for l in labels]
+        self.view=list(range(len(labels)))       # indeks i labels der matcher filteret
+        self.pos=min(max(0,start_index), max(0,len(self.view)-1)); self.top=0
+        self.filter=""; self.typing=False; self._stack=[]
+        self._shown={}; self._size=None
+
+    def current(self):
+        return self.view[self.pos] if self.view else None
+
+    def _put(self, y, text, attr, w):
+        if self._shown.get(y)==(text,attr): return
+        self.win.addstr(y,2," "*(w-4)); self.win.addstr(y,2,text,attr)
+        self._shown[y]=(text,attr)
+
+    def draw(self):
+        h,w=self.win.getmaxyx()
+        if (h,w)!=self._size:   # første gang eller resize: tegn alt
+            self.win.erase(); draw_box(self.win,self.title); self._shown={}; self._size=(h,w)
+        rows=max(1,h-4)
+        if self.pos<self.top: self.top=self.pos
+        elif self.pos>=self.top+rows: self.top=self.pos-rows+1
+        for r in range(rows):
+            j=self.top+r
+            if j<len(self.view):
+                sel=(j==self.pos); text=("➤ " if sel else "  ")+self.render(self.view[j])
+                self._put(2+r, text[:w-4], curses.A_REVERSE if sel else curses.A_NORMAL, w)
+            else:
+                self._put(2+r, "", curses.A_NORMAL, w)
+        status=self.footer
+        if self.filter or self.typing:
+            status=f"/{self.filter}{'_' if self.typing else ''}  ({len(self.view)}/{len(self.labels)})  •  ESC=ryd filter"
+        self._put(h-2, status[:w-4], curses.A_DIM, w)
+        self.win.refresh()
+
+    def _set_filter(self, f):
+        if f.startswith(self.filter) and len(f)==len(self.filter)+1:
+            self._stack.append((self.filter, self.view))
+            self.view=[i for i in self.view if f in self._low[i]]
+        elif self._stack and len(f)==len(self.filter)-1:
+            _, self.view=self._stack.pop()
+        else:
+            self._stack=[]; self.view=[i for i,l in enumerate(self._low) if f in l]
+        self.filter=f; self.pos=0; self.top=0
+
+    def handle(self, c):
+        """Navigation og filter. True hvis tasten er brugt."""
+        n=len(self.view); h,_=self.win.getmaxyx(); page=max(1,h-4)
+        if c in (curses.KEY_UP,) or (c==ord('k') and not self.typing):
+            if n: self.pos=(self.pos-1)%n
+        elif c in (curses.KEY_DOWN,) or (c==ord('j') and not self.typing):
+            if n: self.pos=(self.pos+1)%n
+        elif c==curses.KEY_PPAGE: self.pos=max(0,self.pos-page)
+        elif c==curses.KEY_NPAGE: self.pos=min(max(0,n-1),self.pos+page)
+        elif c==curses.KEY_HOME: self.pos=0
+        elif c==curses.KEY_END: self.pos=max(0,n-1)
+        elif c==curses.KEY_RESIZE: self._size=None
+        elif self.typing:
+            if c==27: self.typing=False; self._set_filter("")
+            elif c in KEY_BACKSPACE:
+                if self.filter: self._set_filter(self.filter[:-1])
+            elif 32<=c<127: self._set_filter(self.filter+chr(c).lower())
+            else: return False
+        elif c==ord('/'): self.typing=True
+        elif c==27 and self.filter: self._set_filter("")
+        else: return False
+        return True
+
+def menu(win, title, options, footer="↑↓ vælg  •  Enter ok  •  / søg  •  q tilbage", start_index=0):
+    curses.curs_set(0)
+    lv=ListView(win, title, options, footer, start_index)
     while True:
-        win.clear(); draw_box(win, title); h, w = win.getmaxyx()
-        for i, opt in enumerate(options):
-            y = 2 + i; sel = (i == idx); pre = "➤ " if sel else "  "
-            win.addstr(y, 2, f"{pre}{opt}"[:w-4], curses.A_REVERSE if sel else curses.A_NORMAL)
-        win.addstr(h-2, 2, footer[:w-4], curses.A_DIM); win.refresh()
-        c = win.getch()
-        if c in (curses.KEY_UP, ord('k')): idx = (idx - 1) % len(options)
-        elif c in (curses.KEY_DOWN, ord('j')): idx = (idx + 1) % len(options)
-        elif c in KEY_ENTER: return idx
+        lv.draw(); c=win.getch()
+        if lv.handle(c): continue
+        if c in KEY_ENTER:
+            if lv.current() is not None: return lv.current()
         elif c in (ord('q'), 27): return None
 
-def checkbox_menu(win, title, items, footer="Space=flueben  •  a=alle/ingen  •  Enter=ok  •  F10=skip  •  q=tilbage"):
-    curses.curs_set(0); idx=0
+def checkbox_menu(win, title, items, footer="Space=flueben  •  a=alle/ingen  •  / søg  •  Enter=ok  •  F10=skip  •  q=tilbage"):
+    curses.curs_set(0)
     labels=[l for l,_ in items]; states=[d for _,d in items]
+    lv=ListView(win, title, labels, footer, render=lambda i: f"{'[x]' if states[i] else '[ ]'} {labels[i]}")
     while True:
-        win.clear(); draw_box(win,title); h,w=win.getmaxyx()
-        for i,lbl in enumerate(labels):
-            y=2+i; sel=(i==idx); box="[x]" if states[i] else "[ ]"; pre="➤ " if sel else "  "
-            win.addstr(y,2,f"{pre}{box} {lbl}"[:w-4], curses.A_REVERSE if sel else curses.A_NORMAL)
-        win.addstr(h-2,2,footer[:w-4],curses.A_DIM); win.refresh()
-        c=win.getch()
-        if c in (curses.KEY_UP, ord('k')): idx=(idx-1)%len(labels)
-        elif c in (curses.KEY_DOWN, ord('j')): idx=(idx+1)%len(labels)
-        elif c==ord(' '): states[idx]=not states[idx]
-        elif c==ord('a'): states=[not any(states)]*len(states)
+        lv.draw(); c=win.getch()
+        if lv.handle(c): continue    # først: under '/'-filter er space/a/q tekst til filteret
+        elif c==ord(' ') and lv.current() is not None: states[lv.current()]=not states[lv.current()]
+        elif c==ord('a'):
+            on=not any(states[i] for i in lv.view)   # alle/ingen blandt de viste
+            for i in lv.view: states[i]=on
         elif c==curses.KEY_F10: return "__SKIP_ROLE__"
         elif c in KEY_ENTER: return {labels[i]: states[i] for i in range(len(labels))}
         elif c in (ord('q'),27): return None
@@ -80,7 +156,7 @@ def _toast(win, msg, ms=1200):
     center_text(sub,2,msg); win.refresh(); curses.napms(ms)
 
 def show_preview(stdscr, text, title="Forhåndsvisning"):
-    lines=text.splitlines(); top=0; curses.curs_set(0)
+    lines=text.splitlines() if isinstance(text, str) else text; top=0; curses.curs_set(0)
     while True:
         stdscr.clear(); draw_box(stdscr,title+"  •  PgUp/PgDn/↑↓  •  q=tilbage"); h,w=stdscr.getmaxyx()
         avail=h-4
@@ -125,7 +201,7 @@ def iface_prefix_ok(v):
 def ip_to_int(ip):
     a,b,c,d=map(int,ip.split('.')); return (a<<24)|(b<<16)|(c<<8)|d
 def int_to_ip(n):
-    return ".".join(str((n>>i)&0xff) for i in (24,16,8,0))
+    return f"{(n>>24)&0xff}.{(n>>16)&0xff}.{(n>>8)&0xff}.{n&0xff}"
 def mask_from_prefix(p):
     v=(0xffffffff << (32-p)) & 0xffffffff if p>0 else 0
     return int_to_ip(v)
@@ -139,21 +215,177 @@ DEFAULT_PROFILE = {
     }
 }
 
-def load_profiles():
-    if not os.path.exists(PROFILE_FILE):
-        with open(PROFILE_FILE,"w",encoding="utf-8") as f: json.dump([DEFAULT_PROFILE], f, indent=2)
-        return [DEFAULT_PROFILE]
-    with open(PROFILE_FILE,"r",encoding="utf-8") as f:
-        try: return json.load(f)
-        except: return [DEFAULT_PROFILE]
-
-def save_profiles(profs):
-    with open(PROFILE_FILE,"w",encoding="utf-8") as f: json.dump(profs, f, indent=2)
+class ProfileError(Exception):
+    pass
+
+class ProfileStore:
+    """Profiler gemt som én JSON-fil pr. profil i en mappe (PROFILE_DIR).
+    Navne indekseres ud fra filnavnene; selve profilerne læses først når de bruges,
+    og hver ændring skrives atomisk (tmp-fil + os.replace) for kun den ene profil."""
+
+    def __init__(self, root=None, legacy=None):
+        # kun default-mappen oprettes/migreres automatisk; en angivet sti skal findes.
+        # En gammel profiles.json kan angives direkte og migreres til <navn>.d ved siden af.
+        if root is not None and os.path.isfile(root):
+            if not root.endswith(".json"): raise ProfileError(f"Ikke en profil-mappe eller .json-fil: {root}")
+            legacy, root = root, os.path.splitext(root)[0] + ".d"
+        elif root is not None and not os.path.isdir(root):
+            raise ProfileError(f"Profil-mappe findes ikke: {root}")
+        self.root=root or PROFILE_DIR
+        self._files=None; self._cache={}
+        if not os.path.isdir(self.root):
+            self._migrate(legacy if legacy is not None else os.path.join(os.path.dirname(self.root) or ".", PROFILE_FILE))
+
+    def _migrate(self, legacy):
+        # første gang: flyt profiler fra den gamle profiles.json (eller opret DEFAULT_PROFILE)
+        profs=[DEFAULT_PROFILE]
+        if legacy and os.path.exists(legacy):
+            try:
+                with open(legacy,"r",encoding="utf-8") as f: profs=json.load(f)
+            except (OSError, ValueError) as e:
+                raise ProfileError(f"Kan ikke læse {legacy}: {e}")
+        os.makedirs(self.root, exist_ok=True)
+        for prof in profs: self.put(prof)
+
+    @staticmethod
+    def _fname(name): return quote(name, safe="") + ".json"
+
+    def _index(self):
+        if self._files is None:
+            self._files={unquote(f[:-5]): f for f in os.listdir(self.root) if f.endswith(".json")}
+        return self._files
+
+    def names(self): return sorted(self._index())
+    def __contains__(self, name): return name in self._index()
+    def __len__(self): return len(self._index())
+
+    def get(self, name):
+        """Profil efter navn (læses lazy og caches). Ukendt navn -> None, ødelagt fil -> ProfileError."""
+        if name in self._cache: return self._cache[name]
+        fname=self._index().get(name)
+        if fname is None: return None
+        path=os.path.join(self.root, fname)
+        try:
+            with open(path,"r",encoding="utf-8") as f: prof=json.load(f)
+        except (OSError, ValueError) as e:
+            raise ProfileError(f"Kan ikke læse profil '{name}' ({path}): {e}")
+        self._cache[name]=prof
+        return prof
+
+    def put(self, profile):
+        name=profile["name"]; fname=self._fname(name)
+        path=os.path.join(self.root, fname); tmp=path+".tmp"
+        with open(tmp,"w",encoding="utf-8") as f:
+            json.dump(profile, f, indent=2); f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self._index()[name]=fname; self._cache[name]=profile
+
+    def delete(self, name):
+        fname=self._index().pop(name, None); self._cache.pop(name, None)
+        if fname:
+            try: os.remove(os.path.join(self.root, fname))
+            except FileNotFoundError: pass
 
 def slugify(name):
     s="".join(c.lower() if c.isalnum() else "-" for c in name).strip("-")
     return s or "vlan"
 
+# ==================== VLAN validation ====================
+def vlan_span(vlan):
+    """(første, sidste) adresse som int for et VLAN's net/prefix (net normaliseres til grænsen)."""
+    p=int(vlan["prefix"]); size=1<<(32-p)
+    start=ip_to_int(vlan["net"]) & ~(size-1) & 0xffffffff
+    return start, start+size-1
+
+def vlan_label(ref):
+    prof,key,v=ref
+    return f"{prof}/{v['name']} (VLAN {v['id']}, {v['net']}/{v['prefix']})"
+
+class VlanIndex:
+    """Intervalindeks over VLAN-subnets på tværs af profiler.
+    CIDR-net er enten indlejrede eller disjunkte, så et overlap med et kandidat-net er
+    enten et af dets (højst 32) supernet eller et net der starter inden for kandidaten."""
+    def __init__(self):
+        self.by_block={}   # (start, prefix) -> [ref]
+        self.by_id={}      # vlan-id -> [ref]
+        self._sorted=None  # [(start, slut, ref)] sorteret efter start
+        self._starts=None
+
+    def add(self, profile_name, key, vlan):
+        ref=(profile_name, key, vlan)
+        start,_=vlan_span(vlan)
+        self.by_block.setdefault((start, int(vlan["prefix"])), []).append(ref)
+        self.by_id.setdefault(int(vlan["id"]), []).append(ref)
+        self._sorted=None
+
+    def add_profile(self, profile):
+        for k,v in profile["vlans"].items(): self.add(profile["name"], k, v)
+
+    def _ensure_sorted(self):
+        if self._sorted is None:
+            items=[]
+            for (start,p),refs in self.by_block.items():
+                end=start+(1<<(32-p))-1
+                items += [(start,end,r) for r in refs]
+            items.sort(key=lambda t:(t[0],-t[1]))
+            self._sorted=items; self._starts=[t[0] for t in items]
+        return self._sorted
+
+    def overlapping(self, vlan, skip=None):
+        """Refs hvis subnet overlapper `vlan`. `skip(ref)` kan udelukke fx VLANs fra samme profil."""
+        start,end=vlan_span(vlan); p=int(vlan["prefix"]); hits=[]
+        for q in range(p, -1, -1):
+            sup=start & ((0xffffffff << (32-q)) & 0xffffffff if q else 0)
+            hits += self.by_block.get((sup,q), [])
+        items=self._ensure_sorted()
+        i=bisect_left(self._starts, start)
+        while i<len(items) and items[i][0]<=end:
+            if items[i][1]<=end and (items[i][0],items[i][1])!=(start,end): hits.append(items[i][2])
+            i+=1
+        return [r for r in hits if not (skip and skip(r))]
+
+    def overlap_pairs(self, same_profile_only=False):
+        """Alle par af overlappende subnets (sweep over de sorterede intervaller)."""
+        pairs=[]; stack=[]
+        for start,end,ref in self._ensure_sorted():
+            while stack and stack[-1][1]<start: stack.pop()
+            for _s,_e,other in stack:
+                if not same_profile_only or other[0]==ref[0]: pairs.append((other,ref))
+            stack.append((start,end,ref))
+        return pairs
+
+    def duplicate_ids(self, cross_profile=False):
+        """VLAN-ID'er brugt mere end én gang i samme profil (eller på tværs, hvis cross_profile)."""
+        dups=[]
+        for vid,refs in sorted(self.by_id.items()):
+            if len(refs)<2: continue
+            if cross_profile:
+                dups.append((vid, refs)); continue
+            per={}
+            for r in refs: per.setdefault(r[0], []).append(r)
+            dups += [(vid, rs) for rs in per.values() if len(rs)>1]
+        return dups
+
+def build_vlan_index(store, exclude=None):
+    idx=VlanIndex()
+    for name in store.names():
+        if name==exclude: continue
+        idx.add_profile(store.get(name))
+    return idx
+
+def check_vlan(vlan, siblings, index=None, key=None):
+    """Problemer for et nyt/ændret VLAN: ID- og subnet-kollisioner mod de andre VLANs i
+    profilen (`siblings`: key -> vlan) og subnet-overlap mod andre profiler i `index`."""
+    start,end=vlan_span(vlan); problems=[]
+    for k,v in siblings.items():
+        if k==key: continue
+        if int(v["id"])==int(vlan["id"]): problems.append(f"VLAN {vlan['id']} bruges allerede af {v['name']}")
+        s,e=vlan_span(v)
+        if s<=end and start<=e: problems.append(f"{vlan['net']}/{vlan['prefix']} overlapper {v['name']} ({v['net']}/{v['prefix']})")
+    if index is not None:
+        problems += [f"overlapper {vlan_label(r)}" for r in index.overlapping(vlan)]
+    return problems
+
 # ==================== VLAN editor (custom list) ====================
 PURPOSES = ["general","access-default","printer","voice","guest"]
 
@@ -257,16 +489,31 @@ def edit_custom_vlan(stdscr, key, vlan, existing_keys):
 def list_custom_vlans(vlans):
     return [(k,v) for k,v in vlans.items() if k!="mgmt"]
 
-def make_profile(stdscr):
+def confirm_vlan(stdscr, vlan, siblings, index=None, key=None):
+    """Inline-tjek af et VLAN mod resten af profilen og andre profiler. True = gem."""
+    problems=check_vlan(vlan, siblings, index, key)
+    if not problems: return True
+    _toast(stdscr, problems[0], ms=1800)
+    return menu(stdscr, f"{len(problems)} VLAN-konflikt(er)", ["Gem alligevel","Annullér"], start_index=1)==0
+
+def make_profile(stdscr, store=None):
     # profilnavn
     res=text_input(stdscr,"Ny VLAN-profil (navn)",[("Profilnavn","office-custom",not_empty)])
     if res is None: return None
     name=res["Profilnavn"]
 
+    # subnets fra de andre profiler (til overlap-tjek); profilen selv overskrives evt.
+    try: index=build_vlan_index(store, exclude=name) if store is not None else None
+    except ProfileError as e:
+        _toast(stdscr, str(e), ms=2500); index=None
+
     # MGMT
     mgd=DEFAULT_PROFILE["vlans"]["mgmt"]
-    mg=edit_mgmt(stdscr, mgd)
-    if mg is None: return None
+    while True:
+        mg=edit_mgmt(stdscr, mgd)
+        if mg is None: return None
+        if confirm_vlan(stdscr, mg, {}, index): break
+        mgd=mg
 
     # Custom VLAN list editor
     custom = {}
@@ -288,7 +535,7 @@ def make_profile(stdscr):
             # Direkte EDIT på valgt VLAN
             k, v = entries[choice]
             new_key, new_val = edit_custom_vlan(stdscr, k, v, set(custom.keys()))
-            if new_key and new_val:
+            if new_key and new_val and confirm_vlan(stdscr, new_val, {"mgmt": mg, **custom}, index, key=k):
                 if new_key != k:
                     custom.pop(k, None)
                 custom[new_key] = new_val
@@ -297,7 +544,7 @@ def make_profile(stdscr):
         # + Tilføj
         if choice == len(labels):
             nv = add_custom_vlan(stdscr)
-            if nv:
+            if nv and confirm_vlan(stdscr, nv, {"mgmt": mg, **custom}, index):
                 key = slugify(f"{nv['name']}-{nv['id']}")
                 if key in custom:
                     i = 2
@@ -316,7 +563,7 @@ def make_profile(stdscr):
             if eidx is None: continue
             k, v = entries[eidx]
             new_key, new_val = edit_custom_vlan(stdscr, k, v, set(custom.keys()))
-            if new_key and new_val:
+            if new_key and new_val and confirm_vlan(stdscr, new_val, {"mgmt": mg, **custom}, index, key=k):
                 if new_key != k:
                     custom.pop(k, None)
                 custom[new_key] = new_val
@@ -342,29 +589,33 @@ def make_profile(stdscr):
     return {"name": name, "vlans": vlans}
 
 # ==================== Profiles UI ====================
-def pick_profile(stdscr, profiles):
-    names=[p["name"] for p in profiles]
+def pick_profile(stdscr, store):
+    names=store.names()
     idx=menu(stdscr,"Vælg VLAN-profil",names+["Tilbage"])
     if idx is None or idx==len(names): return None
-    return profiles[idx]
+    try: return store.get(names[idx])
+    except ProfileError as e:
+        _toast(stdscr, str(e), ms=2500); return None
 
-def profiles_flow(stdscr, profiles):
+def profiles_flow(stdscr, store):
     actions=["Vælg aktiv profil","Opret ny profil","Slet profil","Tilbage"]
     while True:
         a=menu(stdscr,"VLAN-profiler",actions)
-        if a is None or a==3: return profiles
+        if a is None or a==3: return
         if a==0:
-            p=pick_profile(stdscr, profiles)
+            p=pick_profile(stdscr, store)
             if p: _toast(stdscr,f"Aktiv: {p['name']}")
         elif a==1:
-            p=make_profile(stdscr)
-            if p: profiles.append(p); save_profiles(profiles); _toast(stdscr,f"Tilføjet: {p['name']}")
-        elif a==2:
-            if not profiles: _toast(stdscr,"Ingen profiler"); continue
-            p=pick_profile(stdscr, profiles)
+            p=make_profile(stdscr, store)
             if p:
-                profiles=[x for x in profiles if x["name"]!=p["name"]]
-                save_profiles(profiles); _toast(stdscr,"Slettet")
+                existed=p["name"] in store
+                store.put(p); _toast(stdscr,f"{'Overskrevet' if existed else 'Tilføjet'}: {p['name']}")
+        elif a==2:
+            if not len(store): _toast(stdscr,"Ingen profiler"); continue
+            names=store.names()
+            idx=menu(stdscr,"Slet hvilken profil?",names+["Tilbage"])
+            if idx is not None and idx<len(names):
+                store.delete(names[idx]); _toast(stdscr,"Slettet")
 
 # ==================== Port helpers ====================
 def iface_name(prefix, n): return f"{prefix}{n}"
@@ -372,51 +623,62 @@ def make_range(prefix, start, end):
     return f"{prefix}{start}" if start==end else f"{prefix}{start} - {end}"
 def join_ranges(ranges): return ", ".join(ranges)
 
+IOS_RANGE_LIMIT = 5   # IOS tager højst 5 ranges pr. "interface range"-kommando
+_MEMBER_RE = re.compile(r"^([A-Za-z-]+)1/")
+
+def member_prefix(prefix, member):
+    """Interface-prefix for stack-medlem `member`, fx GigabitEthernet1/0/ -> GigabitEthernet3/0/."""
+    if member==1: return prefix
+    if not _MEMBER_RE.match(prefix):
+        raise ValueError(f"{prefix} har intet stack-medlemsnummer (fx GigabitEthernet1/0/)")
+    return _MEMBER_RE.sub(lambda m: f"{m.group(1)}{member}/", prefix, count=1)
+
+def _span_ranges(prefix, per_member, start_no, a, b):
+    """Globalt interval [a, b) af porte (medlem for medlem) -> range-strenge, én pr. medlem."""
+    out=[]
+    while a<b:
+        m=a//per_member; end=min(b, (m+1)*per_member)
+        out.append(make_range(member_prefix(prefix, m+1), start_no + a - m*per_member, start_no + end-1 - m*per_member))
+        a=end
+    return out
+
 def compute_port_groups(base_ports, base_prefix, extra_slots, extra_prefix, uplinks, printers,
-                        base_start=1, extra_start=1):
+                        base_start=1, extra_start=1, members=1, roles=()):
+    """Fordel portene på en switch/stack i roller. Returnerer dict rolle -> liste af range-strenge.
+
+    Base-portene på alle medlemmer ses som ét interval (Gi1/0/1 .. GiN/0/48). Printere tager
+    altid de sidste porte, uplinks ud over ekstra-slots tages lige under dem, derefter evt.
+    ekstra roller (`roles` = [(rolle, antal), ...], fx voice), og access får resten fra toppen.
+    Uplinks på ekstra-slots fordeles round-robin over medlemmerne (redundans på tværs af stacken)."""
     uplinks  = max(0, int(uplinks))
     printers = max(0, int(printers))
     extra_slots = max(0, int(extra_slots))
-
-    # 1) Printer-porte = ALTID de sidste N i base
-    prn = min(printers, base_ports)
-    pr_first = base_start + base_ports - prn if prn > 0 else None
-
-    # 2) Uplinks: brug ekstra slots først
-    use_extra = min(uplinks, extra_slots)
-    remain = uplinks - use_extra
-
-    uplink_ranges = []
-    if use_extra > 0:
-        uplink_ranges.append(make_range(extra_prefix, extra_start, extra_start + use_extra - 1))
-
-    # Hvis uplinks > extra_slots, tag resten fra TOPPEN af base (lige over printer-området)
-    use_base = 0
-    ul_base_start = ul_base_end = None
-    if remain > 0:
-        ul_base_end = (pr_first - 1) if pr_first else (base_start + base_ports - 1)
-        use_base = max(0, min(remain, ul_base_end - base_start + 1))
-        ul_base_start = ul_base_end - use_base + 1
-        if use_base > 0:
-            uplink_ranges.append(make_range(base_prefix, ul_base_start, ul_base_end))
-
-    # 3) Access = resten af base (1 .. før uplink_base_start eller før printer)
-    ac_end = (pr_first - 1) if pr_first else (base_start + base_ports - 1)
-    if use_base > 0:
-        ac_end = min(ac_end, ul_base_start - 1)
-
-    access_ranges = []
-    if ac_end is not None and ac_end >= base_start:
-        access_ranges.append(make_range(base_prefix, base_start, ac_end))
-
-    # 4) Printer-liste (enkeltvis)
-    printer_list = []
-    if prn > 0:
-        end = base_start + base_ports - 1
-        for p in range(pr_first, end + 1):
-            printer_list.append(iface_name(base_prefix, p))
-
-    return access_ranges, uplink_ranges, printer_list
+    members = max(1, int(members))
+    groups = {"access": [], "uplink": [], "printer": []}
+
+    # 1) Uplinks på ekstra-slots: første slot på hvert medlem, så andet, ...
+    use_extra = min(uplinks, extra_slots * members)
+    for m in range(1, members + 1):
+        n = use_extra // members + (1 if m <= use_extra % members else 0)
+        if n > 0:
+            groups["uplink"].append(make_range(member_prefix(extra_prefix, m), extra_start, extra_start + n - 1))
+
+    # 2) Halen af base-intervallet: printere, resterende uplinks, ekstra roller
+    cursor = base_ports * members
+    for role, count in [("printer", printers), ("uplink", uplinks - use_extra)] + list(roles):
+        n = min(max(0, int(count)), cursor)
+        groups.setdefault(role, [])
+        if n > 0:
+            groups[role] += _span_ranges(base_prefix, base_ports, base_start, cursor - n, cursor)
+            cursor -= n
+
+    # 3) Access = resten af base
+    groups["access"] = _span_ranges(base_prefix, base_ports, base_start, 0, cursor)
+    return groups
+
+def range_commands(ranges, limit=IOS_RANGE_LIMIT):
+    """Del ranges op i "interface range"-argumenter med højst `limit` ranges i hver."""
+    return [join_ranges(ranges[i:i+limit]) for i in range(0, len(ranges), limit)]
 
 
 # ==================== Features ====================
@@ -464,131 +726,114 @@ def select_vlans_for_switch(stdscr, profile):
         items.append((lbl, default))
     sel=checkbox_menu(stdscr,"Vælg VLANs til denne switch", items)
     if sel is None: return None
-    out={}
-    i=0
-    for k in keys:
-        out[k] = True if k=="mgmt" else list(sel.values())[i]
-        i+=1
-    return out
-
-# ==================== Config generator ====================
-def gen_config(params, features, profile, chosen_vlans, access_default_vid=None):
-    h=params["Hostname"]; model=params["Model"]
-    base_ports={"16P":16,"24P":24,"48P":48}.get(model,24)
-
-    base_prefix=params["Base iface prefix"]
-    extra_prefix=params["Extra uplink prefix"]
-    extra_slots=int(params["Extra uplink slots"])
-    upl_count=int(params["Uplink count"])
-    prn_count=int(params.get("Printer count","0"))
-
+    vals=list(sel.values())
+    return {k: True if k=="mgmt" else vals[i] for i,k in enumerate(keys)}
+
+# ==================== Render cache ====================
+_MISSING=object()
+
+class LRUCache:
+    """Lille LRU-cache med fast max-størrelse (ældste smides ud først)."""
+    def __init__(self, maxsize=256):
+        self.maxsize=maxsize; self.data=OrderedDict(); self.hits=0; self.misses=0
+    def get(self, key, build):
+        v=self.data.get(key, _MISSING)
+        if v is not _MISSING:
+            self.data.move_to_end(key); self.hits+=1; return v
+        self.misses+=1; v=build(); self.data[key]=v
+        if len(self.data)>self.maxsize: self.data.popitem(last=False)
+        return v
+    def clear(self):
+        self.data.clear(); self.hits=0; self.misses=0
+
+_serial=itertools.count()
+FRAGMENT_CACHE=LRUCache(256)   # (profil, valgte VLANs, features, access-VLAN) -> faste blokke
+PORT_CACHE=LRUCache(1024)      # (fragmenter, model, prefixes, antal) -> interface-sektioner
+
+@lru_cache(maxsize=64)
+def _read_pubkey_cached(path, mtime):
+    with open(path, "r", encoding="utf-8") as f: return f.read().strip()
+
+def read_pubkey(path):
+    """Læs 'SSH pub path' én gang pr. fil (genlæses hvis filen ændres)."""
+    return _read_pubkey_cached(path, os.stat(path).st_mtime_ns)
+
+_stamp_cache=[None, ""]
+def _stamp():
+    m=int(time.time()//60)
+    if _stamp_cache[0]!=m:
+        _stamp_cache[0]=m; _stamp_cache[1]=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%MZ")
+    return _stamp_cache[1]
+
+def _fragment_key(profile, chosen_vlans, features, access_default_vid):
+    pv=profile["vlans"]; mg=pv["mgmt"]
+    vl=tuple((k, v["id"], v["name"], v.get("purpose"), bool(chosen_vlans.get(k,False))) for k,v in pv.items())
+    return (profile["name"], mg["net"], mg["prefix"], vl, tuple(features.items()), access_default_vid)
+
+def _build_fragments(profile, chosen_vlans, features, access_default_vid):
+    """Byg de dele af configen der kun afhænger af profil, valgte VLANs og features."""
     pv=profile["vlans"]
-    mg=pv["mgmt"]
-    mg_pref=int(mg["prefix"])
-    mg_net_int=ip_to_int(mg["net"])
-    mg_mask=mask_from_prefix(mg_pref)
-
-    maxhosts=2**(32-mg_pref)
-    svi_host=max(1, min(maxhosts-1, int(params["Mgmt SVI host"])))
-    gw_host =max(1, min(maxhosts-1, int(params["Mgmt GW host"])))
-    mgmt_ip=int_to_ip(mg_net_int + svi_host)
-    gw_ip  =int_to_ip(mg_net_int + gw_host)
-
-    # port-grupper
-    access_ranges, uplink_ranges, printer_list = compute_port_groups(
-        base_ports, base_prefix, extra_slots, extra_prefix, upl_count, prn_count
-    )
-
-    # allowed på trunk = valgte VLANs
-    allowed_ids=[v["id"] for k,v in pv.items() if chosen_vlans.get(k,False)]
-    allowed_ids=sorted(set(allowed_ids))
+    chosen=[v for k,v in pv.items() if chosen_vlans.get(k,False)]
+    allowed_ids=sorted(set(v["id"] for v in chosen))
 
     # find purpose VLANs blandt de valgte
     def find_purpose(purpose):
-        for k,v in pv.items():
-            if chosen_vlans.get(k,False) and v.get("purpose") == purpose:
-                return v
+        for v in chosen:
+            if v.get("purpose") == purpose: return v
         return None
-    v_access = None
     if access_default_vid:
         v_access = {"id": int(access_default_vid)}
     else:
         v_access = find_purpose("access-default")
+    dhcp=features.get("DHCP snooping + IP source guard", False)
 
-    v_printer = find_purpose("printer")
-    v_voice   = find_purpose("voice")
-    v_guest   = find_purpose("guest")
-
-    now=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%MZ")
     out=[]; emit=out.append
-    emit("! ======================================================")
-    emit(f"! Base skabelon genereret {now}")
-    emit(f"! Model: {model} • Base: {base_ports} @ {base_prefix} • Extra uplinks: {extra_slots} @ {extra_prefix}")
-    emit(f"! Uplinks valgt: {upl_count} • Printerporte: {prn_count}")
-    emit(f"! Profil: {profile['name']} • VLANs medtaget: " + ",".join([pv[k]['name'] for k,b in chosen_vlans.items() if b]))
-    emit("! ======================================================")
-    emit(f"hostname {h}")
-    emit("no ip domain-lookup")
-    emit(f"ip domain-name {params['Domain']}")
-    emit("service timestamps debug datetime msec")
-    emit("service timestamps log datetime msec")
-    emit("service password-encryption")
-    emit("vtp mode transparent")
-    emit("!")
+    def chunk():
+        s="\n".join(out); out.clear(); return s
+    mg=pv["mgmt"]; mg_pref=int(mg["prefix"])
+    fr={"serial": next(_serial),
+        "names": ",".join([pv[k]['name'] for k,b in chosen_vlans.items() if b]),
+        "mg_id": mg["id"], "mg_net": ip_to_int(mg["net"]), "mg_mask": mask_from_prefix(mg_pref), "maxhosts": 2**(32-mg_pref),
+        "printer": find_purpose("printer"), "voice": find_purpose("voice"), "guest": find_purpose("guest")}
 
     # VLAN-deklarationer
-    for k,v in pv.items():
-        if not chosen_vlans.get(k,False): continue
+    for v in chosen:
         emit(f"vlan {v['id']}"); emit(f" name {v['name']}"); emit("!")
+    fr["vlans"]=chunk()
 
-    # MGMT SVI + GW
-    emit(f"interface Vlan{mg['id']}")
-    emit(" description *** Management SVI ***")
-    emit(f" ip address {mgmt_ip} {mg_mask}")
-    emit(" no shut"); emit("!")
-    emit(f"ip default-gateway {gw_ip}"); emit("!")
-
-    # SSH & lines
-    emit("ip ssh version 2")
-    emit(f"crypto key generate rsa modulus {params['SSH key bits']}")
+    # SSH & lines (efter crypto key-linjen)
     emit("ip scp server enable")
     emit("username admin privilege 15 secret 0 CHANGEME-StrongSecret")
     emit("enable secret 0 CHANGEME-Enable")
     emit("line con 0"); emit(" logging synchronous"); emit(" exec-timeout 10 0")
     emit("line vty 0 4"); emit(" transport input ssh"); emit(" exec-timeout 15 0"); emit(" login local"); emit("!")
     emit("banner login ^"); emit("  Uautoriseret adgang forbudt. Overvågning kan forekomme."); emit("^"); emit("!")
+    fr["ssh"]=chunk()
 
-    # Optional services
-    if features.get("Logging + NTP + timezone", False):
-        emit("clock timezone CET 1 0")
-        emit("clock summer-time CEST recurring last Sun Mar 2:00 last Sun Oct 3:00")
-        if params.get("Syslog server"): emit(f"logging host {params['Syslog server']}")
-        emit("logging buffered 16384"); emit("logging trap informational")
-        if params.get("NTP server"): emit(f"ntp server {params['NTP server']}")
-        emit("!")
+    # LLDP, STP og DHCP snooping
     if features.get("LLDP enable", False): emit("lldp run"); emit("!")
     if features.get("STP hardening (bpduguard/default, portfast edge)", False):
         emit("spanning-tree mode pvst")
         emit("spanning-tree portfast default")
         emit("spanning-tree bpduguard default")
         emit("!")
-
-    # DHCP snooping
-    if features.get("DHCP snooping + IP source guard", False):
-        vlan_list=[str(v["id"]) for k,v in pv.items() if chosen_vlans.get(k,False)]
+    if dhcp:
+        vlan_list=[str(v["id"]) for v in chosen]
         emit("ip dhcp snooping")
         emit("ip dhcp snooping verify mac-address")
         emit("ip dhcp snooping information option")
         if vlan_list: emit("ip dhcp snooping vlan " + ",".join(vlan_list))
         emit("!")
+    fr["services"]=chunk()
 
-    # ACCESS-porte
-    if access_ranges:
-        emit(f"interface range {join_ranges(access_ranges)}")
-        emit(" description *** ACCESS-PORTS ***")
+    # ACCESS- og VOICE-krop (voice = access + voice vlan, plads til telefon + PC)
+    def access_body(desc, voice_vid=None):
+        emit(f" description *** {desc} ***")
         emit(" switchport mode access")
         if v_access:
             emit(f" switchport access vlan {v_access['id']}")
+        if voice_vid:
+            emit(f" switchport voice vlan {voice_vid}")
         emit(" spanning-tree portfast")
         emit(" spanning-tree bpduguard enable")
         if features.get("Storm-control (broadcast/multicast/unicast)", True):
@@ -598,42 +843,69 @@ def gen_config(params, features, profile, chosen_vlans, access_default_vid=None)
             emit(" storm-control action shutdown")
         if features.get("Port-security (sticky MAC på access-porte)", True):
             emit(" switchport port-security")
-            emit(" switchport port-security maximum 2")
+            emit(f" switchport port-security maximum {3 if voice_vid else 2}")
             emit(" switchport port-security mac-address sticky")
             emit(" switchport port-security violation restrict")
-        if features.get("DHCP snooping + IP source guard", False):
+        if dhcp:
             emit(" ip verify source")
         emit(" no shut"); emit(" exit"); emit("!")
-
-    # UPLINKS – trunk
-    if uplink_ranges:
-        emit(f"interface range {join_ranges(uplink_ranges)}")
-        emit(" description *** UPLINK(S) ***")
-        emit(" switchport mode trunk")
-        if allowed_ids:
-            emit(" switchport trunk allowed vlan " + ",".join(map(str,allowed_ids)))
-        if features.get("DHCP snooping + IP source guard", False):
-            emit(" ip dhcp snooping trust")
-        emit(" spanning-tree link-type point-to-point")
+        return chunk()
+    fr["access"]=access_body("ACCESS-PORTS")
+    fr["voice_body"]=access_body("VOICE-PORTS", fr["voice"]["id"]) if fr["voice"] else ""
+
+    # UPLINK-krop (trunk)
+    emit(" description *** UPLINK(S) ***")
+    emit(" switchport mode trunk")
+    if allowed_ids:
+        emit(" switchport trunk allowed vlan " + ",".join(map(str,allowed_ids)))
+    if dhcp:
+        emit(" ip dhcp snooping trust")
+    emit(" spanning-tree link-type point-to-point")
+    emit(" no shut"); emit(" exit"); emit("!")
+    fr["uplink"]=chunk()
+
+    # PRINTER-krop
+    if fr["printer"]:
+        emit(" description *** PRINTER-PORT ***")
+        emit(" switchport mode access")
+        emit(f" switchport access vlan {fr['printer']['id']}")
+        emit(" spanning-tree portfast")
+        emit(" spanning-tree bpduguard enable")
+        emit(" switchport port-security")
+        emit(" switchport port-security maximum 1")
+        emit(" switchport port-security mac-address sticky")
+        emit(" switchport port-security violation restrict")
         emit(" no shut"); emit(" exit"); emit("!")
+    fr["printer_body"]=chunk()
 
-    # PRINTER-porte
-    if v_printer:
-        for p in printer_list:
-            emit(f"interface {p}")
-            emit(" description *** PRINTER-PORT ***")
-            emit(" switchport mode access")
-            emit(f" switchport access vlan {v_printer['id']}")
-            emit(" spanning-tree portfast")
-            emit(" spanning-tree bpduguard enable")
-            emit(" switchport port-security")
-            emit(" switchport port-security maximum 1")
-            emit(" switchport port-security mac-address sticky")
-            emit(" switchport port-security violation restrict")
-            emit(" no shut"); emit(" exit"); emit("!")
+    # SNMPv3
+    if features.get("SNMPv3 skabelon", False):
+        emit("snmp-server group NETOPS v3 priv")
+        emit("snmp-server user netops NETOPS v3 auth sha CHANGEME-Auth priv aes 128 CHANGEME-Priv")
+        emit("snmp-server contact NetOps"); emit("snmp-server location CHANGE-ME"); emit("!")
+    fr["snmp"]=chunk()
+    return fr
+
+def get_fragments(profile, chosen_vlans, features, access_default_vid=None):
+    key=_fragment_key(profile, chosen_vlans, features, access_default_vid)
+    return FRAGMENT_CACHE.get(key, lambda: _build_fragments(profile, chosen_vlans, features, access_default_vid))
+
+def _render_ports(fr, base_ports, base_prefix, extra_slots, extra_prefix, upl_count, prn_count,
+                  members=1, voice_count=0):
+    roles=[("voice", voice_count)] if fr["voice"] and voice_count else []
+    # printerporte reserveres altid (holdes ude af access), men konfigureres kun med printer-VLAN
+    groups=compute_port_groups(base_ports, base_prefix, extra_slots, extra_prefix, upl_count,
+                               prn_count, members=members, roles=roles)
+    out=[]; emit=out.append
+    for role, body in (("access", fr["access"]), ("voice", fr["voice_body"]), ("uplink", fr["uplink"]),
+                       ("printer", fr["printer_body"] if fr["printer"] else None)):
+        if body is None: continue
+        for cmd in range_commands(groups.get(role, [])):
+            emit(f"interface range {cmd}"); emit(body)
 
     # Hints for voice/guest
-    if v_voice:
+    v_voice, v_guest = fr["voice"], fr["guest"]
+    if v_voice and not roles:
         emit(f"! Voice VLAN {v_voice['id']}: pr. port fx:")
         emit(f"!  interface {base_prefix}x")
         emit(f"!   switchport voice vlan {v_voice['id']}")
@@ -641,27 +913,103 @@ def gen_config(params, features, profile, chosen_vlans, access_default_vid=None)
     if v_guest:
         emit(f"! Guest VLAN {v_guest['id']}: brug efter behov på porte/SSID.")
         emit("!")
+    return "\n".join(out)
 
-    # SNMPv3
-    if features.get("SNMPv3 skabelon", False):
-        emit("snmp-server group NETOPS v3 priv")
-        emit("snmp-server user netops NETOPS v3 auth sha CHANGEME-Auth priv aes 128 CHANGEME-Priv")
-        emit("snmp-server contact NetOps"); emit("snmp-server location CHANGE-ME"); emit("!")
+# ==================== Config generator ====================
+def iter_config(params, features, profile, chosen_vlans, access_default_vid=None):
+    """Generér configen som en strøm af chunks (én eller flere hele linjer, uden afsluttende
+    newline). "\n".join(chunks) giver præcis det samme som gen_config()."""
+    h=params["Hostname"]; model=params["Model"]
+    base_ports={"16P":16,"24P":24,"48P":48}.get(model,24)
+
+    base_prefix=params["Base iface prefix"]
+    extra_prefix=params["Extra uplink prefix"]
+    extra_slots=int(params["Extra uplink slots"])
+    upl_count=int(params["Uplink count"])
+    prn_count=int(params.get("Printer count","0"))
+    members=int(params.get("Stack members","1"))
+    voice_count=int(params.get("Voice count","0"))
+
+    # faste blokke fra cachen; kun hostname, mgmt-IP'er og port-ranges er pr. switch
+    fr=get_fragments(profile, chosen_vlans, features, access_default_vid)
+    ports=PORT_CACHE.get((fr["serial"], base_ports, base_prefix, extra_slots, extra_prefix, upl_count, prn_count, members, voice_count),
+                         lambda: _render_ports(fr, base_ports, base_prefix, extra_slots, extra_prefix, upl_count, prn_count,
+                                               members, voice_count))
+
+    maxhosts=fr["maxhosts"]; mg_net_int=fr["mg_net"]
+    svi_host=max(1, min(maxhosts-1, int(params["Mgmt SVI host"])))
+    gw_host =max(1, min(maxhosts-1, int(params["Mgmt GW host"])))
+    mgmt_ip=int_to_ip(mg_net_int + svi_host)
+    gw_ip  =int_to_ip(mg_net_int + gw_host)
+
+    yield "\n".join((
+        "! ======================================================",
+        f"! Base skabelon genereret {_stamp()}",
+        f"! Model: {model} • Base: {base_ports} @ {base_prefix} • Extra uplinks: {extra_slots} @ {extra_prefix}"
+        + (f" • Stack: {members} medlemmer" if members>1 else ""),
+        f"! Uplinks valgt: {upl_count} • Printerporte: {prn_count}" + (f" • Voiceporte: {voice_count}" if voice_count else ""),
+        f"! Profil: {profile['name']} • VLANs medtaget: " + fr["names"],
+        "! ======================================================",
+        f"hostname {h}",
+        "no ip domain-lookup",
+        f"ip domain-name {params['Domain']}",
+        "service timestamps debug datetime msec\nservice timestamps log datetime msec\n"
+        "service password-encryption\nvtp mode transparent\n!",
+    ))
+    if fr["vlans"]: yield fr["vlans"]
+
+    # MGMT SVI + GW, SSH & lines
+    yield "\n".join((
+        f"interface Vlan{fr['mg_id']}",
+        " description *** Management SVI ***",
+        f" ip address {mgmt_ip} {fr['mg_mask']}",
+        " no shut\n!",
+        f"ip default-gateway {gw_ip}\n!",
+        "ip ssh version 2",
+        f"crypto key generate rsa modulus {params['SSH key bits']}",
+        fr["ssh"],
+    ))
+
+    # Optional services
+    out=[]; emit=out.append
+    if features.get("Logging + NTP + timezone", False):
+        emit("clock timezone CET 1 0")
+        emit("clock summer-time CEST recurring last Sun Mar 2:00 last Sun Oct 3:00")
+        if params.get("Syslog server"): emit(f"logging host {params['Syslog server']}")
+        emit("logging buffered 16384"); emit("logging trap informational")
+        if params.get("NTP server"): emit(f"ntp server {params['NTP server']}")
+        emit("!")
+        yield "\n".join(out); out.clear()
+    if fr["services"]: yield fr["services"]
+
+    # ACCESS/UPLINK/PRINTER-porte + voice/guest hints
+    if ports: yield ports
+    if fr["snmp"]: yield fr["snmp"]
 
     # SSH pubkey
     if features.get("Embed SSH public key", False) and params.get("SSH pub path"):
         try:
-            with open(params["SSH pub path"], "r", encoding="utf-8") as f:
-                pubkey=f.read().strip()
+            pubkey=read_pubkey(params["SSH pub path"])
             emit("ip ssh pubkey-chain")
             emit(f" username {params.get('SSH username','admin')}")
             emit("  key-string"); emit(f"   {pubkey}")
             emit("  exit"); emit(" exit"); emit("!")
         except Exception as e:
             emit(f"! ADVARSEL: Kunne ikke læse pubkey: {e}"); emit("!")
+        yield "\n".join(out)
 
-    emit("do write memory"); emit("!")
-    return "\n".join(out)
+    yield "do write memory\n!"
+
+def gen_config(params, features, profile, chosen_vlans, access_default_vid=None):
+    return "\n".join(iter_config(params, features, profile, chosen_vlans, access_default_vid))
+
+def write_config(fp, params, features, profile, chosen_vlans, access_default_vid=None):
+    """Skriv configen direkte til en fil/pipe uden at samle hele teksten i hukommelsen.
+    Returnerer antal skrevne tegn."""
+    n=0; sep=""
+    for chunk in iter_config(params, features, profile, chosen_vlans, access_default_vid):
+        n+=fp.write(sep+chunk); sep="\n"
+    return n
 
 # ==================== Text flows ====================
 PT_DEFAULTS = {
@@ -690,6 +1038,8 @@ def text_form(stdscr, features, profile, model, bp, ep, extra_slots_default):
         ("Uplink count","2", int_range(0,32)),
         ("Extra uplink slots", str(extra_slots_default), int_range(0,32)),
     ]
+    if _MEMBER_RE.match(bp) and _MEMBER_RE.match(ep):
+        fields += [("Stack members", "1", int_range(1,9))]
     if features.get("Logging + NTP + timezone", False):
         a,b,c,_=map(int, mg["net"].split('.'))
         fields += [
@@ -722,13 +1072,13 @@ def choose_access_default_if_needed(stdscr, profile, chosen):
     if idx is None: return None
     return candidates[idx][1]["id"]
 
-def new_file_flow(stdscr, profiles):
+def new_file_flow(stdscr, store):
     models=["16P","24P","48P"]
     midx=menu(stdscr,"Vælg switch-model",models)
     if midx is None: return
     model=models[midx]
 
-    prof=pick_profile(stdscr, profiles)
+    prof=pick_profile(stdscr, store)
     if prof is None: return
 
     chosen=select_vlans_for_switch(stdscr, prof)
@@ -757,6 +1107,12 @@ def new_file_flow(stdscr, profiles):
     else:
         vals["Printer count"]="0"
 
+    # voice-porte kun hvis et valgt VLAN har purpose=voice (0 = kun hint i configen)
+    if any(chosen.get(k,False) and v.get("purpose")=="voice" for k,v in prof["vlans"].items()):
+        vc=text_input(stdscr,"Voice-porte (over printer/uplink i base)",[("Voice count","0", int_range(0,9*48))])
+        if vc is None: return
+        vals["Voice count"]=vc["Voice count"]
+
     # access-default hvis nødvendigt
     access_vid = choose_access_default_if_needed(stdscr, prof, chosen)
 
@@ -764,23 +1120,25 @@ def new_file_flow(stdscr, profiles):
         vals["Syslog server"]=""
         vals["NTP server"]=""
 
-    cfg=gen_config(vals, features, prof, chosen, access_default_vid=access_vid)
+    lines=[l for chunk in iter_config(vals, features, prof, chosen, access_default_vid=access_vid) for l in chunk.split("\n")]
     fname=f"{vals['Hostname']}-baseline.cfg"
-    with open(fname,"w",encoding="utf-8") as f: f.write(cfg)
+    with open(fname,"w",encoding="utf-8") as f: f.write("\n".join(lines))
     _toast(stdscr,f"Skrevet: {fname}")
-    show_preview(stdscr, cfg, title=f"{fname} (forhåndsvisning)")
+    show_preview(stdscr, lines, title=f"{fname} (forhåndsvisning)")
 
 # ==================== Main menu ====================
-def main_menu(stdscr):
+def main_menu(stdscr, store):
     curses.curs_set(0); stdscr.keypad(True)
-    profiles=load_profiles()
     options=["Ny fil (generér boilerplate)","Åbn fil (ikke implementeret)","VLAN-profiler","Afslut"]
     while True:
         idx=menu(stdscr,"Cisco Config Skabelon",options)
         if idx is None or idx==3: break
-        if idx==0: new_file_flow(stdscr, profiles)
+        if idx==0: new_file_flow(stdscr, store)
         elif idx==1: _toast(stdscr,"Åbn fil er ikke implementeret endnu")
-        elif idx==2: profiles=profiles_flow(stdscr, profiles)
+        elif idx==2: profiles_flow(stdscr, store)
 
-def main(): curses.wrapper(main_menu)
+def main():
+    try: store=ProfileStore()
+    except ProfileError as e: raise SystemExit(f"ERROR: {e}")
+    curses.wrapper(main_menu, store)
 if __name__ == "__main__": main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# phasetimer.py - måling af vægur-tid pr. fase pr. enhed for getconf.py og Setconf.py.
+# Slået fra som standard (phase() koster så kun et funktionskald); enable() tænder for målingen
+# og kan streame hver måling som en JSON-linje, summary() giver et histogram pr. fase.
+import json, sys, threading, time
+from contextlib import contextmanager
+
+BUCKETS = (0.1, 0.3, 1, 3, 10)      # sekunder; sidste spand er >= 10 s
+
+_lock = threading.Lock()
+_records = None
+_sink = None
+
+def enable(jsonl=None):
+    """Start målingen. `jsonl` er en filsti ('-' = stderr) hvor hver fase skrives som én JSON-linje."""
+    global _records, _sink
+    _records = []
+    if jsonl == "-": _sink = sys.stderr
+    elif jsonl: _sink = open(jsonl, "a", encoding="utf-8")
+
+def enabled(): return _records is not None
+
+@contextmanager
+def phase(device, name, **extra):
+    """Mål en fase. Den yieldede dict kan udfyldes med ekstra felter, fx bytes."""
+    if _records is None:
+        yield {}; return
+    info = dict(extra); ok = True; t0 = time.perf_counter()
+    try:
+        yield info
+    except BaseException:
+        ok = False; raise
+    finally:
+        rec = {"ts": round(time.time(), 3), "device": device, "phase": name,
+               "sec": round(time.perf_counter() - t0, 4), "ok": ok, **info}
+        with _lock:
+            _records.append(rec)
+            if _sink is not None:
+                _sink.write(json.dumps(rec, ensure_ascii=False) + "\n"); _sink.flush()
+
+def records(): return list(_records or [])
+
+def _pct(sorted_vals, p): return sorted_vals[min(len(sorted_vals) - 1, int(p * len(sorted_vals)))]
+
+def summary(out=None):
+    """Skriv et histogram pr. fase og de langsomste enheder."""
+    out = out or sys.stderr
+    recs = records()
+    if not recs: return
+    phases = {}
+    for r in recs: phases.setdefault(r["phase"], []).append(r["sec"])
+    total = sum(r["sec"] for r in recs) or 1.0
+    labels = [f"<{b}s" for b in BUCKETS] + [f">={BUCKETS[-1]}s"]
+    print(f"\n{'fase':<22}{'antal':>6}{'p50':>8}{'p95':>8}{'max':>8}  " + " ".join(f"{l:>6}" for l in labels) + "  andel", file=out)
+    for name, vals in sorted(phases.items(), key=lambda kv: -sum(kv[1])):
+        vals.sort()
+        hist = [0] * (len(BUCKETS) + 1)
+        for v in vals: hist[next((i for i, b in enumerate(BUCKETS) if v < b), len(BUCKETS))] += 1
+        share = sum(vals) / total
+        print(f"{name:<22}{len(vals):>6}{_pct(vals, .5):>8.2f}{_pct(vals, .95):>8.2f}{vals[-1]:>8.2f}  "
+              + " ".join(f"{h:>6}" for h in hist) + f"  {'#' * round(share * 20):<20} {share:4.0%}", file=out)
+    per_dev = {}
+    for r in recs:
+        d = per_dev.setdefault(r["device"], {"sec": 0.0, "bytes": 0, "worst": r})
+        d["sec"] += r["sec"]; d["bytes"] += r.get("bytes", 0)
+        if r["sec"] > d["worst"]["sec"]: d["worst"] = r
+    slow = sorted(per_dev.items(), key=lambda kv: -kv[1]["sec"])[:5]
+    print("Langsomste enheder: " + ", ".join(
+        f"{dev} {d['sec']:.1f}s (mest {d['worst']['phase']} {d['worst']['sec']:.1f}s"
+        + (f", {d['bytes']} B" if d["bytes"] else "") + ")" for dev, d in slow), file=out)
+
+def close():
+    global _sink
+    if _sink is not None and _sink is not sys.stderr: _sink.close()
+    _sink = None
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# runcache.py - lokal cache af hver enheds senest kendte running-config (efter commit/re-fetch),
+# så Setconf.py kan forudsige et no-op push uden at forbinde til enheden.
+import hashlib, json, os, re, time
+from collections import Counter
+from urllib.parse import quote
+
+import iosconf
+
+CACHE_DIR = ".setconf-cache"
+# secrets sammenlignes ordret: iosconf maskerer dem i diffs, men en ny type 0-secret mod en
+# hashet på enheden kan ikke verificeres lokalt og må aldrig forudsiges som no-op
+SECRET_RE = re.compile(r"\b(secret|password|key)\b")
+
+def fingerprint(text): return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class RunningCache:
+    """Én JSON-fil pr. host: {"fingerprint", "ts", "running"}. En post er frisk hvis den er yngre
+    end `ttl` sekunder og fingerprintet stadig passer til teksten."""
+
+    def __init__(self, root=CACHE_DIR, ttl=24 * 3600):
+        self.root = root; self.ttl = ttl
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, host): return os.path.join(self.root, quote(host, safe="") + ".json")
+
+    def get(self, host):
+        try:
+            with open(self._path(host), "r", encoding="utf-8") as f: return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def fresh(self, ent):
+        return (ent is not None and time.time() - ent.get("ts", 0) < self.ttl
+                and fingerprint(ent.get("running", "")) == ent.get("fingerprint"))
+
+    def put(self, host, running):
+        path = self._path(host); tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint(running), "ts": time.time(), "running": running}, f)
+        os.replace(tmp, path)
+
+    def invalidate(self, host):
+        try: os.remove(self._path(host))
+        except FileNotFoundError: pass
+
+def _satisfied(line, have):
+    """Er kandidat-linjen allerede opfyldt af linjerne `have` (Counter af kanoniske linjer)?"""
+    if line in have: return True
+    if line.startswith("no "):
+        neg = line[3:]
+        return not any(h == neg or h.startswith(neg + " ") for h in have)
+    return False
+
+def _lines(lines):
+    return [l if SECRET_RE.search(l) else c for l in lines for c in (iosconf.canon(l),) if c is not None]
+
+def predict_noop(candidate, running, mode="merge", prune=False):
+    """True hvis et push af `candidate` (tekst) mod `running` (tekst) ikke ville ændre noget.
+    replace: ingen semantisk diff. merge: alle kandidatens linjer findes allerede i samme sektion.
+    delta: patchen (iosconf.delta_patch, evt. med `prune`) er tom."""
+    if mode == "delta": return not iosconf.delta_patch(running, candidate, prune)
+    cand, run = iosconf.summarize(candidate), iosconf.summarize(running)
+    if mode == "replace":
+        secrets = lambda s: sorted([l for l in s["top"] if SECRET_RE.search(l)] +
+                                   [f"{t} {k}: {l}" for t, d in s["sections"].items() for k, ls in d.items()
+                                    for l in ls if SECRET_RE.search(l)])
+        return not iosconf.diff_configs(run, cand) and secrets(run) == secrets(cand)
+    have = Counter(_lines(run["globals"]))
+    if not all(_satisfied(l, have) for l in _lines(cand["globals"])): return False
+    for typ, secs in cand["sections"].items():
+        for key, lines in secs.items():
+            cur = run["sections"].get(typ, {}).get(key)
+            if cur is None: return False
+            have = Counter(_lines(cur))
+            if not all(_satisfied(l, have) for l in _lines(lines)): return False
+    return True
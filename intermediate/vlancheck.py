@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# vlancheck.py - audit af VLAN-profiler: dublerede VLAN-ID'er og overlappende subnets.
+# Bruger VlanIndex fra newconfdesign.py (samme tjek som profil-editoren laver inline).
+import argparse, json, sys, time
+
+import newconfdesign as ncd
+
+def audit(index, cross_ids=False, same_profile_only=False):
+    """Returnér (overlap-par, dublerede ID'er) som læsbare dicts."""
+    overlaps = [{"a": ncd.vlan_label(a), "b": ncd.vlan_label(b)}
+                for a, b in index.overlap_pairs(same_profile_only=same_profile_only)]
+    dups = [{"id": vid, "vlans": [ncd.vlan_label(r) for r in refs]}
+            for vid, refs in index.duplicate_ids(cross_profile=cross_ids)]
+    return overlaps, dups
+
+def main():
+    ap = argparse.ArgumentParser(prog="vlancheck", description="Find dublerede VLAN-ID'er og overlappende subnets i VLAN-profilerne.")
+    ap.add_argument("-P","--profiles", default=None, help=f"Profil-mappe eller gammel .json-fil (default: {ncd.PROFILE_DIR})")
+    ap.add_argument("--cross-ids", action="store_true", help="Rapportér også samme VLAN-ID på tværs af profiler")
+    ap.add_argument("--same-profile", action="store_true", help="Rapportér kun subnet-overlap inden for samme profil")
+    ap.add_argument("--json", action="store_true", help="Output som JSON")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    try:
+        store = ncd.ProfileStore(args.profiles)
+        index = ncd.build_vlan_index(store)
+    except ncd.ProfileError as e:
+        print(f"ERROR: {e}", file=sys.stderr); sys.exit(2)
+    overlaps, dups = audit(index, args.cross_ids, args.same_profile)
+    wall = time.perf_counter() - t0
+
+    if args.json:
+        print(json.dumps({"overlaps": overlaps, "duplicate_ids": dups}, indent=2, ensure_ascii=False))
+    else:
+        for o in overlaps: print(f"OVERLAP  {o['a']}  <->  {o['b']}")
+        for d in dups: print(f"DUBLET   VLAN {d['id']}: " + ", ".join(d["vlans"]))
+        nvlans = sum(len(r) for r in index.by_id.values())
+        print(f"{len(store)} profiler, {nvlans} VLANs  •  overlap: {len(overlaps)}  •  dubletter: {len(dups)}  •  {wall:.2f}s",
+              file=sys.stderr)
+    sys.exit(1 if overlaps or dups else 0)
+
+if __name__ == "__main__":
+    main()
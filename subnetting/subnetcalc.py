@@ -1,36 +1,69 @@
-import argparse, ipaddress, csv
+import argparse, ipaddress, csv, itertools, sys
 
-def hosts_range(n):
-    if n.prefixlen >= 31:
-        return (None, None)
-    return (n.network_address + 1, n.broadcast_address - 1)
+import subnetmath
 
+# Subnets beregnes og skrives i blokke, så hverken tabel eller CSV koster et systemkald (eller
+# ipaddress-objekter) pr. subnet
+FLUSH_ROWS = 4096
 
-def output_subnets(subnets, csv_path=None):
+def subnet_count(base, new_prefix):
+    return 1 << (new_prefix - base.prefixlen)
+
+
+def iter_blocks(base, new_prefix, offset=0, limit=None):
+    # (første nr., netværksadresser) for hver blok af subnets; offset springes over uden at bygge noget
+    stop = subnet_count(base, new_prefix) if limit is None else min(subnet_count(base, new_prefix), offset + limit)
+    base_int = int(base.network_address)
+    for i in range(offset, stop, FLUSH_ROWS):
+        yield i, subnetmath.split(base_int, base.prefixlen, new_prefix, i, min(FLUSH_ROWS, stop - i)), new_prefix
+
+
+def _blocks_of(subnets, start):
+    it = iter(subnets)
+    while True:
+        chunk = list(itertools.islice(it, FLUSH_ROWS))
+        if not chunk:
+            return
+        yield start, [int(n.network_address) for n in chunk], [n.prefixlen for n in chunk]
+        start += len(chunk)
+
+
+def write_blocks(blocks, csv_path=None, out=None):
+    out = out or sys.stdout
     header = ["#", "Subnet", "Network", "First usable", "Last usable", "Broadcast"]
-    print(" | ".join(header))
-
-    rows = []
-    for i, n in enumerate(subnets):
-        f, l = hosts_range(n)
-        row = [
-            str(i),
-            str(n),
-            str(n.network_address),
-            str(f) if f is not None else "-",
-            str(l) if l is not None else "-",
-            str(n.broadcast_address),
-        ]
-        print(" | ".join(row))
-        rows.append([i, str(n), str(n.network_address), f, l, str(n.broadcast_address)])
+    out.write(" | ".join(header) + "\n")
+
+    f_csv = open(csv_path, "w", newline="", buffering=1 << 20) if csv_path else None
+    w = csv.writer(f_csv) if f_csv else None
+    if w:
+        w.writerow(header)
+
+    count = 0
+    try:
+        for start, nets, prefixes in blocks:
+            r = subnetmath.compute(nets, prefixes)
+            net, first, last, bc = (subnetmath.to_dotted(r[k]) for k in ("network", "first", "last", "broadcast"))
+            usable = subnetmath.tolist(r["usable"])
+            pre = [prefixes] * len(net) if isinstance(prefixes, int) else prefixes
+            for j, u in enumerate(usable):
+                if not u:
+                    first[j] = last[j] = ""
+            out.write("".join(f"{i} | {n}/{p} | {n} | {f or '-'} | {l or '-'} | {b}\n"
+                              for i, n, p, f, l, b in zip(itertools.count(start), net, pre, first, last, bc)))
+            if w:
+                w.writerows(zip(itertools.count(start), (f"{n}/{p}" for n, p in zip(net, pre)), net, first, last, bc))
+            count += len(net)
+    finally:
+        if f_csv:
+            f_csv.close()
 
     if csv_path:
-        with open(csv_path, "w", newline="") as f:
-            w = csv.writer(f)
-            w.writerow(header)
-            for row in rows:
-                w.writerow(row)
-        print(f"CSV gemt: {csv_path}")
+        out.write(f"CSV gemt: {csv_path}\n")
+    return count
+
+
+def output_subnets(subnets, csv_path=None, start=0, out=None):
+    return write_blocks(_blocks_of(subnets, start), csv_path, out)
 
 def main():
     p = argparse.ArgumentParser(description="Subnet calculator (IPv4)")
@@ -48,7 +81,15 @@ def main():
                    help="Interaktiv VLSM-allokering af subnet")
 
     p.add_argument("--csv", help="Gem som CSV til fil")
+    p.add_argument("--offset", type=int, default=0,
+                   help="Spring de første N subnets over (paging)")
+    p.add_argument("--limit", type=int,
+                   help="Vis højst N subnets")
+    p.add_argument("--count-only", action="store_true",
+                   help="Vis kun antallet af subnets")
     args = p.parse_args()
+    if args.offset < 0 or (args.limit is not None and args.limit < 0):
+        p.error("--offset og --limit skal være >= 0")
 
     base = ipaddress.ip_network(args.base, strict=True)
 
@@ -142,9 +183,18 @@ def main():
         if args.target_prefix is None:
             p.error("Kan ikke finde et prefix der opfylder antallet af hosts i det angivne base-net.")
 
-    subs = list(base.subnets(new_prefix=args.target_prefix))
-    #print(f"Base: {base}  →  /{args.target_prefix}, Subnets: {len(subs)}")
-    output_subnets(subs, args.csv)
+    if not base.prefixlen <= args.target_prefix <= 32:
+        p.error(f"Prefix skal være mellem /{base.prefixlen} og /32")
+
+    total = subnet_count(base, args.target_prefix)
+    if args.count_only:
+        shown = max(0, total - args.offset)
+        if args.limit is not None:
+            shown = min(shown, args.limit)
+        print(total if shown == total else f"{shown} af {total}")
+        return
+
+    write_blocks(iter_blocks(base, args.target_prefix, args.offset, args.limit), args.csv)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,5 @@
+# Scripts i intermediate/ importerer hinanden direkte (som når de køres derfra); bench/ har fakeios.
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "intermediate"), os.path.join(ROOT, "bench"), ROOT]
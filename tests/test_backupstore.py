@@ -0,0 +1,28 @@
+from backupstore import MAX_CHAIN, BackupStore, apply_delta, make_delta
+
+def config(i):
+    ports = "".join(f"interface Gi1/0/{p}\n description port {p}{' rev ' + str(i) if p == i % 48 else ''}\n!\n"
+                    for p in range(1, 49))
+    return f"hostname sw1\n!\nntp server 10.0.0.{i % 250}\n!\n{ports}end\n"
+
+def test_delta_roundtrip():
+    a = config(1).split("\n"); b = config(2).split("\n")
+    assert apply_delta(a, make_delta(a, b)) == b
+    assert apply_delta(a, make_delta(a, [])) == [] and apply_delta([], make_delta([], b)) == b
+
+def test_history_roundtrips_through_delta_chains(tmp_path):
+    n = 2 * MAX_CHAIN + 5
+    with BackupStore(str(tmp_path)) as st:
+        for i in range(1, n + 1):
+            rec = st.add("sw1", {"startup": config(0), "running": config(i)}, ts=f"2026-01-01T00:00:{i % 60:02d}+00:00")
+            assert rec["v"] == i and rec["changed"]
+        assert not st.add("sw1", {"startup": config(0), "running": config(n)})["changed"]
+    st = BackupStore(str(tmp_path))          # ny instans: ingen tekst-cache, kæderne udpakkes fra disk
+    depths = []
+    for i in range(1, n + 1):
+        rec, texts = st.get("sw1", i)
+        assert texts == {"startup": config(0), "running": config(i)}
+        depths.append(st._read_obj(rec["running"])[0])
+    assert max(depths) == MAX_CHAIN and depths.count(0) >= 2    # fuld kopi efter MAX_CHAIN deltaer
+    assert st.get("sw1")[1]["running"] == config(n)
+    st.close()
@@ -0,0 +1,150 @@
+import iosconf
+from iosconf import delta_patch
+
+RUNNING = """Building configuration...
+
+Current configuration : 1804 bytes
+!
+version 15.2
+no service pad
+service timestamps log datetime msec
+no service password-encryption
+!
+hostname sw1
+!
+boot-start-marker
+boot-end-marker
+!
+no aaa new-model
+system mtu routing 1500
+ip domain-name corp.local
+ip default-gateway 10.0.10.1
+ntp server 10.0.0.5
+logging host 10.0.0.9
+no ip http server
+!
+spanning-tree mode rapid-pvst
+spanning-tree extend system-id
+!
+interface GigabitEthernet1/0/1
+ description pc
+ switchport access vlan 20
+ switchport mode access
+!
+interface GigabitEthernet1/0/2
+ switchport access vlan 20
+ switchport mode access
+!
+interface Vlan1
+ no ip address
+ shutdown
+!
+interface Vlan10
+ ip address 10.0.10.2 255.255.255.0
+!
+line vty 0 4
+ login local
+ transport input ssh
+!
+end
+"""
+
+def lines(patch): return patch.splitlines()
+
+def test_identical_config_gives_empty_patch():
+    assert delta_patch(RUNNING, RUNNING) == ""
+
+def test_no_lines_are_never_inverted():
+    # baseline uden 'no aaa new-model' osv. må ikke slå aaa/pad/password-encryption til
+    want = RUNNING.replace("no aaa new-model\n", "").replace("no service pad\n", "") \
+                  .replace("no service password-encryption\n", "").replace("no ip http server\n", "")
+    assert delta_patch(RUNNING, want) == ""
+    assert delta_patch(RUNNING, want, prune=True) == ""
+
+def test_boilerplate_is_never_removed():
+    want = "\n".join(l for l in RUNNING.splitlines()
+                     if not l.startswith(("version", "boot-", "system mtu", "spanning-tree extend")))
+    assert delta_patch(RUNNING, want, prune=True) == ""
+
+def test_partial_intended_only_touches_what_it_names():
+    want = "ntp server 10.0.0.6\ninterface Gi1/0/1\n switchport access vlan 30\n switchport mode access\n"
+    assert lines(delta_patch(RUNNING, want)) == [
+        "no ntp server 10.0.0.5", "ntp server 10.0.0.6",
+        "interface GigabitEthernet1/0/1", " no description", " switchport access vlan 30", "!"]
+
+def test_prune_removes_what_the_full_config_lacks():
+    want = RUNNING.replace("logging host 10.0.0.9\n", "").replace(
+        "interface Vlan10\n ip address 10.0.10.2 255.255.255.0\n!\n", "").replace(
+        "interface GigabitEthernet1/0/2\n switchport access vlan 20\n switchport mode access\n!\n", "")
+    assert delta_patch(RUNNING, want) == ""
+    assert lines(delta_patch(RUNNING, want, prune=True)) == [
+        "no logging host 10.0.0.9", "default interface GigabitEthernet1/0/2", "no interface Vlan10"]
+
+def test_negation_in_intended_replaces_positive_line():
+    run = RUNNING.replace("no ip http server", "ip http server")
+    assert lines(delta_patch(run, RUNNING)) == ["no ip http server"]
+
+def test_single_value_settings_are_overwritten():
+    want = RUNNING.replace("ip domain-name corp.local", "ip domain-name new.local")
+    assert lines(delta_patch(RUNNING, want)) == ["ip domain-name new.local"]
+
+def test_vlan1_is_defaulted_not_deleted():
+    want = RUNNING.replace("interface Vlan1\n no ip address\n shutdown\n!\n", "")
+    assert "default interface Vlan1" in lines(delta_patch(RUNNING, want, prune=True))
+
+def test_delta_converges_on_fake_device():
+    import fakeios
+    fleet = fakeios.FakeFleet({"sw1": RUNNING})
+    dev = fakeios.driver(fleet)("sw1", "a", "b"); dev.open()
+    want = "ntp server 10.0.0.6\ninterface Gi1/0/2\n switchport access vlan 30\n switchport mode access\n"
+    dev.load_merge_candidate(config=delta_patch(RUNNING, want)); dev.commit_config()
+    after = dev.get_config(retrieve="running")["running"]
+    assert delta_patch(after, want) == ""
+    assert "logging host 10.0.0.9" in after and "interface GigabitEthernet1/0/1" in after
+
+VRF_QOS = """ip vrf MGMT
+ rd 65000:1
+ description gammel
+!
+class-map match-any VOICE
+ match dscp ef
+!
+policy-map QOS
+ class VOICE
+  priority percent 30
+ class class-default
+  fair-queue
+!
+ip access-list extended MGMT-IN
+ permit tcp 10.0.0.0 0.0.0.255 any eq 22
+ deny ip any any
+!
+interface Vlan10
+ ip vrf forwarding MGMT
+ ip address 10.0.10.2 255.255.255.0
+ service-policy output QOS
+"""
+
+def test_changed_vrf_is_edited_in_place():
+    want = VRF_QOS.replace("description gammel", "description ny")
+    assert lines(delta_patch(VRF_QOS, want)) == ["ip vrf MGMT", " description ny", "!"]
+
+def test_changed_policy_map_is_edited_in_place():
+    want = VRF_QOS.replace("priority percent 30", "priority percent 20").replace("match dscp ef", "match dscp ef cs5")
+    patch = lines(delta_patch(VRF_QOS, want))
+    assert not any(l.startswith(("no policy-map", "no class-map")) for l in patch)
+    assert patch == ["class-map match-any VOICE", " no match dscp ef", " match dscp ef cs5", "!",
+                     "policy-map QOS", " class VOICE", "  no priority percent 30", "  priority percent 20", "!"]
+
+def test_changed_access_list_is_recreated_in_order():
+    want = VRF_QOS.replace(" deny ip any any\n", " permit icmp any any\n deny ip any any\n")
+    assert lines(delta_patch(VRF_QOS, want)) == [
+        "no ip access-list extended MGMT-IN", "ip access-list extended MGMT-IN",
+        " permit tcp 10.0.0.0 0.0.0.255 any eq 22", " permit icmp any any", " deny ip any any", "!"]
+
+def test_prune_leaves_unused_physical_ports_alone():
+    run = RUNNING.replace("interface Vlan1\n", "interface GigabitEthernet1/0/3\n!\ninterface TenGigabitEthernet1/1/1\n!\n"
+                                                "interface Loopback0\n!\ninterface Vlan1\n")
+    patch = lines(delta_patch(run, RUNNING, prune=True))
+    assert patch == ["no interface Loopback0"]
+    assert not any(l.startswith("no interface") and "Ethernet" in l for l in patch)
@@ -0,0 +1,146 @@
+import pytest
+
+from iosconf import MergeConflict, diff_configs, merge_snippets, parse, render, summarize
+
+CONFIG = """Building configuration...
+Current configuration : 512 bytes
+!
+hostname sw1
+banner motd ^C
+  Kun autoriseret adgang!
+interface Gi1/0/9
+^C
+banner login ^CHej^C
+policy-map QOS
+ class VOICE
+  priority percent 30
+ class class-default
+  fair-queue
+!
+interface range Gi1/0/1 - 2
+ switchport mode access
+interface Gi1/0/3
+ description x
+end
+sw1#
+"""
+
+def test_banner_text_is_raw_until_delimiter():
+    root = parse(CONFIG)
+    motd = next(b for b in root.children if b.line.startswith("banner motd"))
+    assert [c.line for c in motd.children] == ["  Kun autoriseret adgang!", "interface Gi1/0/9"]
+    assert all(not c.children for c in motd.children)
+    login = next(b for b in root.children if b.line.startswith("banner login"))
+    assert login.children == []
+    # linjen efter afslutningstegnet er igen config
+    assert [b.line for b in root.children][3] == "policy-map QOS"
+
+def test_nested_sections_and_noise():
+    root = parse(CONFIG)
+    assert [b.line for b in root.children] == ["hostname sw1", "banner motd ^C", "banner login ^CHej^C", "policy-map QOS",
+                                               "interface range Gi1/0/1 - 2", "interface Gi1/0/3"]
+    pm = root.children[3]
+    assert [(c.line, [g.line for g in c.children]) for c in pm.children] == [
+        ("class VOICE", ["priority percent 30"]), ("class class-default", ["fair-queue"])]
+
+def test_summarize_expands_ranges_and_flattens_nesting():
+    s = summarize(CONFIG)
+    assert s["hostname"] == "sw1" and s["globals"] == ["hostname sw1"]
+    assert s["sections"]["banner"] == {"motd": ["  Kun autoriseret adgang!", "interface Gi1/0/9"], "login": ["Hej"]}
+    assert s["sections"]["policy-map"]["QOS"] == ["class VOICE", "class VOICE > priority percent 30",
+                                                  "class class-default", "class class-default > fair-queue"]
+    assert sorted(s["sections"]["interface"]) == ["GigabitEthernet1/0/1", "GigabitEthernet1/0/2", "GigabitEthernet1/0/3"]
+
+def test_render_parse_roundtrip():
+    root = parse(CONFIG); text = render(root)
+    assert "interface Gi1/0/9\n^C\n!\nbanner login ^CHej^C\npolicy-map QOS" in text
+    assert summarize(text) == summarize(CONFIG)
+
+# ---------- diff ----------
+A = """hostname sw1
+enable secret 5 $1$aaa$x
+banner motd ^C
+Linje 1
+Linje 2
+^C
+access-list 10 permit 10.0.0.0 0.255.255.255
+access-list 10 deny any
+policy-map QOS
+ class VOICE
+  priority percent 30
+ class class-default
+  fair-queue
+interface Gi1/0/1
+ switchport mode access
+ spanning-tree portfast
+ no shutdown
+interface Gi1/0/2
+ switchport mode access
+"""
+
+def diff(a, b): return {c["section"]: c for c in diff_configs(summarize(a), summarize(b))}
+
+def test_diff_identical_ignores_order_names_defaults_and_hashes():
+    b = A.replace("$1$aaa$x", "$1$bbb$y").replace("interface Gi1/0/1\n switchport mode access\n spanning-tree portfast\n no shutdown",
+                                                  "interface GigabitEthernet1/0/1\n spanning-tree portfast\n switchport mode access")
+    assert diff(A, b) == {}
+
+def test_diff_banner_is_ordered():
+    d = diff(A, A.replace("Linje 1\nLinje 2", "Linje 2\nLinje 1"))
+    assert list(d) == ["banner motd"]
+    assert d["banner motd"]["status"] == "changed" and d["banner motd"]["add"] == d["banner motd"]["remove"]
+
+def test_diff_nested_section_reports_parent_path():
+    d = diff(A, A.replace("priority percent 30", "priority percent 20"))
+    assert d == {"policy-map QOS": {"section": "policy-map QOS", "status": "changed",
+                                    "add": ["class VOICE > priority percent 20"],
+                                    "remove": ["class VOICE > priority percent 30"]}}
+
+def test_diff_numbered_acl_order_and_added_removed_sections():
+    b = A.replace("access-list 10 permit 10.0.0.0 0.255.255.255\naccess-list 10 deny any",
+                  "access-list 10 deny any\naccess-list 10 permit 10.0.0.0 0.255.255.255")
+    b = b.replace("interface Gi1/0/2\n switchport mode access\n", "interface Vlan10\n ip address 10.0.0.2 255.255.255.0\n")
+    d = diff(A, b)
+    assert d[None]["add"] == d[None]["remove"] == ["access-list 10 deny any"]
+    assert d["interface GigabitEthernet1/0/2"]["status"] == "removed"
+    assert d["interface Vlan10"] == {"section": "interface Vlan10", "status": "added",
+                                     "add": ["ip address 10.0.0.2 255.255.255.0"], "remove": []}
+
+def gen_baseline():
+    import batchconf, newconfdesign as ncd
+    row = {"hostname": "SW-001", "model": "24P", "uplinks": "2", "mgmt_svi": "2", "mgmt_gw": "1"}
+    params, features, chosen, vid = batchconf.build_job(row, ncd.DEFAULT_PROFILE)
+    return ncd.gen_config(params, features, ncd.DEFAULT_PROFILE, chosen, vid)
+
+def test_generated_banner_matches_running_config_delimiters():
+    from iosconf import delta_patch
+    base = gen_baseline()
+    assert "banner login ^\n" in base
+    running = base.replace("banner login ^\n", "banner login ^C\n").replace("\n^\n", "\n^C\n")
+    assert diff(base, running) == {}
+    assert delta_patch(running, base) == "" and delta_patch(running, base, prune=True) == ""
+    changed = running.replace("Uautoriseret", "Ikke-autoriseret")
+    assert list(diff(base, changed)) == ["banner login"]
+    assert delta_patch(changed, base).startswith("banner login ^\n")
+
+# ---------- snippets ----------
+def test_merge_snippets_combines_sections():
+    a = "interface Gi1/0/5\n switchport access vlan 20\nntp server 10.0.0.5\n"
+    b = "interface GigabitEthernet1/0/5\n description pc\n switchport access vlan 20\nntp server 10.0.0.6\n"
+    assert render(merge_snippets([a, b])) == ("ntp server 10.0.0.5\nntp server 10.0.0.6\ninterface GigabitEthernet1/0/5\n"
+                                              " switchport access vlan 20\n description pc\n!\n")
+
+@pytest.mark.parametrize("a, b", [
+    ("interface Gi1/0/5\n switchport access vlan 20\n", "interface Gi1/0/5\n switchport access vlan 30\n"),
+    ("interface Gi1/0/5\n description pc\n", "interface range Gi1/0/4 - 6\n description printer\n"),
+    ("hostname sw1\n", "hostname sw2\n"),
+])
+def test_merge_snippets_rejects_conflicting_single_values(a, b):
+    with pytest.raises(MergeConflict) as e:
+        merge_snippets([a, b], ["vlan.txt", "porte.txt"])
+    assert "vlan.txt" in str(e.value) and "porte.txt" in str(e.value)
+
+def test_merge_snippets_allows_repeats_and_secondary_addresses():
+    a = "interface Vlan10\n ip address 10.0.0.2 255.255.255.0\n description mgmt\n"
+    b = "interface Vlan10\n ip address 10.0.1.2 255.255.255.0 secondary\n description mgmt\n"
+    assert render(merge_snippets([a, b])).count("description mgmt") == 1
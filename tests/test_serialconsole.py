@@ -0,0 +1,44 @@
+from getconf import LOGIN_RE, SerialConsole
+
+class ChunkSer:
+    """Seriel port der leverer forudbestemte chunks, én pr. read()."""
+    def __init__(self, chunks):
+        self.chunks = list(chunks); self.written = b""
+    @property
+    def in_waiting(self): return len(self.chunks[0]) if self.chunks else 0
+    def read(self, n): return self.chunks.pop(0) if self.chunks else b""
+    def write(self, data): self.written += data
+
+CONFIG = b"".join(b"interface Gi1/0/%d\r\n description SW1#uplink\r\n!\r\n" % i for i in range(1, 40))
+
+def test_prompt_split_across_reads():
+    ser = ChunkSer([b"show running-config\r\n", CONFIG, b"end\r\n\r\nSW", b"1", b"#", b"EFTER PROMPTEN"])
+    out = SerialConsole(ser, idle=0.2).read_until()
+    assert out.endswith(CONFIG + b"end\r\n\r\nSW1#")
+    assert ser.chunks == [b"EFTER PROMPTEN"]          # stoppede ved prompten, ikke ved stilhed
+
+def test_prompt_lookalike_mid_line_does_not_stop():
+    ser = ChunkSer([b"\r\n description SW1#", b"uplink\r\n", b"SW1(config-if)#"])
+    out = SerialConsole(ser, idle=0.2).read_until()
+    assert out == b"\r\n description SW1#uplink\r\nSW1(config-if)#" and not ser.chunks
+
+def test_login_prompt_split_and_echo():
+    ser = ChunkSer([b"admin\r\nPass", b"word: "])
+    con = SerialConsole(ser, idle=0.2)
+    assert con.exchange("admin", LOGIN_RE).endswith(b"Password: ")
+    assert ser.written == b"admin\r\n" and con.rx_bytes == len(b"admin\r\nPassword: ")
+
+def test_no_prompt_returns_after_idle():
+    ser = ChunkSer([b"\r\n% Invalid input", b" detected\r\n"])
+    assert SerialConsole(ser).read_until(timeout=1, idle=0.05) == b"\r\n% Invalid input detected\r\n"
+
+def test_console_names_are_unique_within_a_run(tmp_path, monkeypatch):
+    import getconf
+    startup = {"COM3": "hostname Switch\n", "COM4": "hostname Switch\n", "COM5": "hostname sw9\n", "COM6": "hostname sw9\n"}
+    monkeypatch.setattr(getconf, "read_console", lambda com, *a, **k: {"startup": startup[com]})
+    rows = [{"com": c} for c in startup]
+    results = getconf.run_consoles(rows, str(tmp_path), {"baud": 9600, "user": None, "password": None, "enable": None}, False)
+    assert all(ok for _, ok, _, _ in results)
+    names = sorted(p.name for p in tmp_path.iterdir())    # rækkefølgen sw9/sw9-COMx afhænger af hvem der blev færdig først
+    assert len(names) == 4 and names[:2] == ["COM3.txt", "COM4.txt"] and names[3] == "sw9.txt"
+    assert names[2] in ("sw9-COM5.txt", "sw9-COM6.txt")